@@ -1,9 +1,11 @@
+import re
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config, pool
 
 from alembic import context
 from src.config.settings import settings
+from src.models.audit import AuditEvent
 from src.models.base import Base
 from src.models.password import Password
 
@@ -29,6 +31,14 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Leaves the partitions of the password table out of autogenerate,
+    they are created by the migrations, not declared by the models."""
+    table_name = name if type_ == "table" else getattr(getattr(object, "table", None), "name", "")
+    return not (reflected and compare_to is None
+                and re.fullmatch(r"password_p\d+", table_name or ""))
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -53,6 +63,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -74,7 +85,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(connection=connection,
-                          target_metadata=target_metadata)
+                          target_metadata=target_metadata,
+                          include_object=include_object)
 
         with context.begin_transaction():
             context.run_migrations()
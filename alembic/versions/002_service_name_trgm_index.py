@@ -0,0 +1,41 @@
+"""service name trigram index
+
+Revision ID: 9b1c5e7d2a40
+Revises: 3e80f08c2652
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1c5e7d2a40'
+down_revision: Union[str, None] = '3e80f08c2652'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index('ix_password_service_name_trgm',
+                        'password', ['service_name'],
+                        unique=False,
+                        postgresql_using='gin',
+                        postgresql_ops={'service_name': 'gin_trgm_ops'},
+                        postgresql_concurrently=True,
+                        if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_password_service_name_trgm',
+                      table_name='password',
+                      postgresql_concurrently=True,
+                      if_exists=True)
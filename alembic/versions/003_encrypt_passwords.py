@@ -0,0 +1,99 @@
+"""encrypt passwords at rest
+
+Revision ID: 5d7f2a9c8e13
+Revises: 9b1c5e7d2a40
+Create Date: 2026-10-17 14:02:17.540931
+
+The password column is widened for the AES-GCM form and the existing
+rows are encrypted with ENCRYPTION_KEY, walking the table by id in chunks
+of CHUNK_SIZE rows. Downgrade decrypts them back. The rows are read from
+the database, so the migration can't run in offline mode.
+
+The migration is one transaction: the ACCESS EXCLUSIVE lock taken by
+ALTER COLUMN blocks the table until all rows are encrypted and committed,
+the chunks only bound the rows held in memory. A failed run leaves no row
+encrypted, so it can simply be run again.
+
+The cipher is built here from ENCRYPTION_KEY in the format of this
+revision (the service name is the associated data), not imported from
+src.services.encryption, so later changes of the service don't change
+what this migration does.
+
+"""
+import base64
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from src.config.settings import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d7f2a9c8e13'
+down_revision: Union[str, None] = '9b1c5e7d2a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHUNK_SIZE = 1000
+NONCE_SIZE = 12
+
+password_table = sa.table('password',
+                          sa.column('id', sa.Integer),
+                          sa.column('service_name', sa.String),
+                          sa.column('password', sa.String))
+
+
+def encrypt(aead: AESGCM, password: str, service_name: str) -> str:
+    """Returns the stored form of the password of the service."""
+    nonce = os.urandom(NONCE_SIZE)
+    token = aead.encrypt(nonce, password.encode(), service_name.encode())
+    return base64.urlsafe_b64encode(nonce + token).decode('ascii')
+
+
+def decrypt(aead: AESGCM, value: str, service_name: str) -> str:
+    """Returns the password of the service from its stored form."""
+    data = base64.urlsafe_b64decode(value)
+    return aead.decrypt(data[:NONCE_SIZE], data[NONCE_SIZE:],
+                        service_name.encode()).decode()
+
+
+def convert_passwords(convert) -> None:
+    """Replaces the password of every row with convert(aead, password, service_name)."""
+    connection = op.get_bind()
+    aead = AESGCM(base64.urlsafe_b64decode(settings.ENCRYPTION_KEY))
+    update = sa.update(password_table).where(
+        password_table.c.id == sa.bindparam('row_id')).values(
+            password=sa.bindparam('value'))
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(password_table).where(password_table.c.id > last_id)
+            .order_by(password_table.c.id).limit(CHUNK_SIZE)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        connection.execute(update, [
+            {'row_id': row.id, 'value': convert(aead, row.password, row.service_name)}
+            for row in rows
+        ])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('password', 'password',
+                    existing_type=sa.String(length=50),
+                    type_=sa.String(length=512),
+                    existing_nullable=False)
+    convert_passwords(encrypt)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    convert_passwords(decrypt)
+    op.alter_column('password', 'password',
+                    existing_type=sa.String(length=512),
+                    type_=sa.String(length=50),
+                    existing_nullable=False)
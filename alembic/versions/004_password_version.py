@@ -0,0 +1,37 @@
+"""password version and updated_at
+
+Revision ID: 7e4a1c0b9f52
+Revises: 5d7f2a9c8e13
+Create Date: 2026-10-17 16:25:03.118402
+
+Both columns have a non-volatile default, so PostgreSQL adds them without
+rewriting the table.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e4a1c0b9f52'
+down_revision: Union[str, None] = '5d7f2a9c8e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('password',
+                  sa.Column('version', sa.Integer(), server_default='1',
+                            nullable=False))
+    op.add_column('password',
+                  sa.Column('updated_at', sa.DateTime(timezone=True),
+                            server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('password', 'updated_at')
+    op.drop_column('password', 'version')
@@ -0,0 +1,160 @@
+"""owner id and hash partitions
+
+Revision ID: a3c6e8f01d27
+Revises: 7e4a1c0b9f52
+Create Date: 2026-10-17 18:40:52.902614
+
+A table can't be turned into a partitioned one in place, so the rows are
+moved to a new password table partitioned by hash of owner_id, all of them
+are given to DEFAULT_OWNER_ID. The ids and their sequence are kept. The
+keys and indexes are built after the rows are copied.
+
+The owner is bound to the encrypted passwords: before the copy, every
+password is encrypted again with "owner_id\0service_name" as the associated
+data instead of the service name, walking the old table by id in chunks of
+CHUNK_SIZE rows (in the migration transaction). The cipher is built here from
+ENCRYPTION_KEY, not imported from src.services.encryption.
+
+Downgrade encrypts the passwords back for the service name only and moves
+the rows back to an unpartitioned table, it fails if two owners have the
+same service name.
+
+"""
+import base64
+import os
+from typing import Callable, List, Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from src.config.settings import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c6e8f01d27'
+down_revision: Union[str, None] = '7e4a1c0b9f52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OWNER_PARTITIONS = 16
+CHUNK_SIZE = 1000
+NONCE_SIZE = 12
+
+COLUMNS = "id, service_name, password, hashed_password, version, updated_at"
+
+
+def password_columns() -> list:
+    return [
+        sa.Column('id', sa.Integer(),
+                  server_default=sa.text("nextval('password_id_seq'::regclass)"),
+                  nullable=False),
+        sa.Column('service_name', sa.String(length=30), nullable=False),
+        sa.Column('password', sa.String(length=512), nullable=False),
+        sa.Column('hashed_password', sa.String(length=255), nullable=False),
+        sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+    ]
+
+
+def associated_data(owner_id: Optional[str], service_name: str) -> bytes:
+    """The associated data of a password, of the service name only without an owner."""
+    if owner_id is None:
+        return service_name.encode()
+    return f"{owner_id}\0{service_name}".encode()
+
+
+def reencrypt_passwords(table_name: str, key: List[str],
+                        old_owner: Callable, new_owner: Callable) -> None:
+    """
+    Encrypts the password of every row of the table again, bound to the owner
+    new_owner(row) instead of old_owner(row) (None - bound to the service name only).
+
+    The rows are read in chunks ordered by the key columns.
+    """
+    connection = op.get_bind()
+    aead = AESGCM(base64.urlsafe_b64decode(settings.ENCRYPTION_KEY))
+    table = sa.table(table_name, *(sa.column(name) for name in key),
+                     sa.column('service_name'), sa.column('password'))
+    key_columns = [table.c[name] for name in key]
+    update = sa.update(table).where(
+        *(column == sa.bindparam(f'row_{column.name}') for column in key_columns)
+    ).values(password=sa.bindparam('value'))
+    last_key = None
+    while True:
+        query = sa.select(table).order_by(*key_columns).limit(CHUNK_SIZE)
+        if last_key is not None:
+            query = query.where(sa.tuple_(*key_columns) > sa.tuple_(*last_key))
+        rows = connection.execute(query).all()
+        if not rows:
+            break
+        last_key = [getattr(rows[-1], name) for name in key]
+        values = []
+        for row in rows:
+            data = base64.urlsafe_b64decode(row.password)
+            password = aead.decrypt(data[:NONCE_SIZE], data[NONCE_SIZE:],
+                                    associated_data(old_owner(row), row.service_name))
+            nonce = os.urandom(NONCE_SIZE)
+            token = aead.encrypt(nonce, password,
+                                 associated_data(new_owner(row), row.service_name))
+            values.append({**{f'row_{name}': getattr(row, name) for name in key},
+                           'value': base64.urlsafe_b64encode(nonce + token).decode('ascii')})
+        connection.execute(update, values)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    reencrypt_passwords('password', ['id'],
+                        old_owner=lambda row: None,
+                        new_owner=lambda row: settings.DEFAULT_OWNER_ID)
+    op.rename_table('password', 'password_old')
+    op.execute("ALTER SEQUENCE password_id_seq OWNED BY NONE")
+
+    op.create_table('password',
+                    sa.Column('owner_id', sa.String(length=64), nullable=False),
+                    *password_columns(),
+                    postgresql_partition_by='HASH (owner_id)')
+    for remainder in range(OWNER_PARTITIONS):
+        op.execute(f"CREATE TABLE password_p{remainder} PARTITION OF password "
+                   f"FOR VALUES WITH (MODULUS {OWNER_PARTITIONS}, REMAINDER {remainder})")
+    op.get_bind().execute(
+        sa.text(f"INSERT INTO password (owner_id, {COLUMNS}) "
+                f"SELECT :owner_id, {COLUMNS} FROM password_old"),
+        {"owner_id": settings.DEFAULT_OWNER_ID})
+    op.drop_table('password_old')
+    op.execute("ALTER SEQUENCE password_id_seq OWNED BY password.id")
+
+    op.create_primary_key('password_pkey', 'password', ['owner_id', 'id'])
+    op.create_unique_constraint('uq_password_owner_id_service_name', 'password',
+                                ['owner_id', 'service_name'])
+    op.create_index('ix_password_owner_id_service_name_trgm',
+                    'password', ['owner_id', 'service_name'],
+                    unique=False,
+                    postgresql_using='gin',
+                    postgresql_ops={'service_name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    reencrypt_passwords('password', ['owner_id', 'id'],
+                        old_owner=lambda row: row.owner_id,
+                        new_owner=lambda row: None)
+    op.rename_table('password', 'password_partitioned')
+    op.execute("ALTER SEQUENCE password_id_seq OWNED BY NONE")
+
+    op.create_table('password', *password_columns())
+    op.execute(f"INSERT INTO password ({COLUMNS}) "
+               f"SELECT {COLUMNS} FROM password_partitioned")
+    op.drop_table('password_partitioned')
+    op.execute("ALTER SEQUENCE password_id_seq OWNED BY password.id")
+
+    op.create_primary_key('password_pkey', 'password', ['id'])
+    op.create_index('ix_password_service_name', 'password', ['service_name'],
+                    unique=True)
+    op.create_index('ix_password_service_name_trgm',
+                    'password', ['service_name'],
+                    unique=False,
+                    postgresql_using='gin',
+                    postgresql_ops={'service_name': 'gin_trgm_ops'})
@@ -0,0 +1,48 @@
+"""append-only audit log
+
+Revision ID: c8d2f4a61b39
+Revises: a3c6e8f01d27
+Create Date: 2026-10-17 21:02:47.530219
+
+The rows are written in batches by the audit flusher, a trigger rejects
+UPDATE and DELETE, so the log can only grow.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.models.audit import APPEND_ONLY_FUNCTION, APPEND_ONLY_TRIGGER
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8d2f4a61b39'
+down_revision: Union[str, None] = 'a3c6e8f01d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'audit_log',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('owner_id', sa.String(length=64), nullable=False),
+        sa.Column('client', sa.String(length=255), nullable=False),
+        sa.Column('action', sa.String(length=32), nullable=False),
+        sa.Column('service_name', sa.String(length=30), nullable=True),
+        sa.Column('detail', sa.String(length=255), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_audit_log_owner_id_created_at', 'audit_log',
+                    ['owner_id', 'created_at'], unique=False)
+    op.execute(APPEND_ONLY_FUNCTION)
+    op.execute(APPEND_ONLY_TRIGGER)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('audit_log')
+    op.execute("DROP FUNCTION audit_log_append_only()")
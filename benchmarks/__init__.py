@@ -0,0 +1,8 @@
+"""
+Packages benchmarks contains 5 modules:
+    seed.py - seeding of the benchmark database through COPY
+    load.py - concurrent load of the password endpoints with latency percentiles
+    compare.py - comparison of two load results
+    bench_projection.py - per-row CPU cost of ORM entities vs projected rows
+    bench_startup.py - import and startup time of the application
+"""
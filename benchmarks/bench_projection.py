@@ -0,0 +1,83 @@
+"""
+This module measures the per-row CPU cost of the password read path.
+
+It compares loading full Password entities (the old read path) with
+selecting only the response columns as mappings (the current read path),
+both followed by validation into the response schema, on one large
+search result.
+
+The rows are written to the test database (DB_TEST_NAME), the table is
+recreated before and dropped afterwards.
+
+Usage:
+    python -m benchmarks.bench_projection --rows 50000 --repeat 5
+"""
+import argparse
+import asyncio
+import time
+
+from pydantic import TypeAdapter
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.config.settings import settings
+from src.managers.password import READ_COLUMNS
+from src.models.base import Base
+from src.models.password import Password
+from src.schemas.password import PasswordCreate
+
+RESPONSE = TypeAdapter(list[PasswordCreate])
+
+
+async def load_entities(session) -> list:
+    result = await session.execute(select(Password))
+    return RESPONSE.validate_python(result.scalars().all(), from_attributes=True)
+
+
+async def load_projected(session) -> list:
+    result = await session.execute(select(*READ_COLUMNS))
+    return RESPONSE.validate_python(result.mappings().all(), from_attributes=True)
+
+
+async def measure(session_maker, load, repeat: int) -> float:
+    """Returns the best CPU time of one run in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        async with session_maker() as session:
+            start = time.process_time()
+            await load(session)
+            best = min(best, time.process_time() - start)
+    return best
+
+
+async def main(rows: int, repeat: int) -> None:
+    engine = create_async_engine(settings.DATABASE_URL_TEST)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text(
+            "INSERT INTO password (owner_id, service_name, password, hashed_password) "
+            "SELECT :owner_id, 'service_' || i, 'password_' || i, repeat('h', 60) "
+            "FROM generate_series(1, :rows) AS i"),
+            {"rows": rows, "owner_id": settings.DEFAULT_OWNER_ID})
+    try:
+        entities = await measure(session_maker, load_entities, repeat)
+        projected = await measure(session_maker, load_projected, repeat)
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+    print(f"rows: {rows}")
+    print(f"ORM entities:   {entities * 1e6 / rows:8.2f} us/row CPU")
+    print(f"projected rows: {projected * 1e6 / rows:8.2f} us/row CPU")
+    print(f"saving:         {(1 - projected / entities) * 100:8.1f} %")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
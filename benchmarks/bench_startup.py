@@ -0,0 +1,61 @@
+"""
+This module measures the cold start of the application.
+
+Every run is a fresh interpreter that imports src.main and runs the startup
+(lifespan) against the test database (DB_TEST_NAME), the durations of the
+import, of every startup phase and of the whole process are reported as the
+median over the runs. Failed phases (e.g. autocomplete without the table)
+are reported as warnings.
+
+Usage:
+    python -m benchmarks.bench_startup --repeat 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+RUN = """
+import asyncio, json
+from src.config.settings import settings
+from src.main import create_app
+
+
+async def boot():
+    app = create_app(settings.model_copy(update={"DB_NAME": settings.DB_TEST_NAME,
+                                                 "AUTOCOMPLETE_REFRESH_SECONDS": 0}))
+    async with app.router.lifespan_context(app):
+        return {**app.state.startup, "errors": app.state.startup_errors}
+
+
+print(json.dumps(asyncio.run(boot())))
+"""
+
+
+def run_once() -> dict:
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", RUN], capture_output=True,
+                            text=True, check=True)
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    for phase, error in phases.pop("errors").items():
+        print(f"warning: startup phase {phase} failed: {error.splitlines()[0]}",
+              file=sys.stderr)
+    phases["process"] = time.perf_counter() - started
+    return phases
+
+
+def main(repeat: int) -> None:
+    runs = [run_once() for _ in range(repeat)]
+    for phase in runs[0]:
+        values = [run[phase] for run in runs]
+        print(f"{phase:>20}: median {statistics.median(values) * 1000:8.1f} ms, "
+              f"max {max(values) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the cold start of the app")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.repeat)
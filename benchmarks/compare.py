@@ -0,0 +1,72 @@
+"""
+This module compares the results of two load runs (benchmarks.load).
+
+For every endpoint the change of throughput and latency percentiles is
+printed. The exit code is 1 if any endpoint got slower than the threshold
+(lower throughput or higher p95/p99 latency), so it can be used in CI.
+
+Usage:
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+# metric -> True if a higher value is better
+METRICS = {
+    "throughput_rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+}
+# metrics that fail the comparison when they regress
+CHECKED = ("throughput_rps", "p95_ms", "p99_ms")
+
+
+def change(old: float, new: float) -> float:
+    """Returns the relative change in percent."""
+    return (new - old) / old * 100 if old else 0.0
+
+
+def compare(old: dict, new: dict, threshold: float) -> bool:
+    """
+    Prints the changes of every endpoint.
+
+    Returns:
+        bool: True if no checked metric regressed by more than threshold percent.
+    """
+    ok = True
+    print(f"{old['commit']} -> {new['commit']}")
+    for name, new_result in new["endpoints"].items():
+        old_result = old["endpoints"].get(name)
+        if old_result is None:
+            print(f"{name}: no baseline")
+            continue
+        for metric, higher_is_better in METRICS.items():
+            delta = change(old_result[metric], new_result[metric])
+            regression = -delta if higher_is_better else delta
+            flag = ""
+            if metric in CHECKED and regression > threshold:
+                flag = "  REGRESSION"
+                ok = False
+            print(f"{name:<8} {metric:<15} {old_result[metric]:>10.2f} "
+                  f"{new_result[metric]:>10.2f} {delta:>+8.1f}%{flag}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two load results")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="allowed regression in percent")
+    args = parser.parse_args()
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    sys.exit(0 if compare(old, new, args.threshold) else 1)
+
+
+if __name__ == "__main__":
+    main()
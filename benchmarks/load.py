@@ -0,0 +1,165 @@
+"""
+This module drives a concurrent load against the three password endpoints.
+
+The requests go through the ASGI app in-process (httpx ASGITransport), the
+sessions are bound to the benchmark database (DB_TEST_NAME), which has to be
+seeded with benchmarks.seed first. All endpoints are loaded at the same time,
+every one by its own group of concurrent clients:
+
+    - get: GET /password/{service_name} of a random seeded service.
+    - search: GET /password/?service_name= with a random 4-digit part.
+    - create: POST /password/ of a new service.
+
+For every endpoint the throughput and p50/p95/p99 latency are printed and
+written as JSON, so results of two commits can be compared with
+benchmarks.compare.
+
+Usage:
+    python -m benchmarks.seed --rows 100000
+    python -m benchmarks.load --rows 100000 --duration 20 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import uuid
+from typing import Callable, Dict, List
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks.seed import service_name
+from src.config.dependencies import get_async_session, get_session_maker
+from src.config.settings import settings
+from src.main import app
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Returns the q-th percentile (0-100) of the sorted values."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))
+    return values[index]
+
+
+def summarize(latencies: List[float], errors: int, duration: float) -> dict:
+    """Builds the result of one endpoint, latencies are in seconds."""
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / duration,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+
+def scenarios(rows: int) -> Dict[str, Callable]:
+    """Returns the request builders of the endpoints."""
+    return {
+        "get": lambda: ("GET", f"/password/{service_name(random.randrange(rows))}", None),
+        "search": lambda: ("GET", f"/password/?service_name={random.randrange(10000):04d}", None),
+        "create": lambda: ("POST", "/password/", {
+            "service_name": f"load_{uuid.uuid4().hex[:20]}",
+            "password": "load_password",
+        }),
+    }
+
+
+async def client_loop(client: AsyncClient, build: Callable, deadline: float,
+                      latencies: List[float], errors: List[int]) -> None:
+    while time.perf_counter() < deadline:
+        method, url, body = build()
+        start = time.perf_counter()
+        response = await client.request(method, url, json=body)
+        elapsed = time.perf_counter() - start
+        # 404 is a valid answer of the search for a random part
+        if response.status_code < 400 or response.status_code == 404:
+            latencies.append(elapsed)
+        else:
+            errors[0] += 1
+
+
+async def run(rows: int, duration: float, concurrency: int, endpoints: List[str]) -> dict:
+    engine = create_async_engine(settings.DATABASE_URL_TEST,
+                                 pool_size=concurrency * len(endpoints))
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_async_session():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = override_get_async_session
+    app.dependency_overrides[get_session_maker] = lambda: session_maker
+
+    builders = scenarios(rows)
+    latencies = {name: [] for name in endpoints}
+    errors = {name: [0] for name in endpoints}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app),
+                               base_url="http://bench") as client:
+            deadline = time.perf_counter() + duration
+            await asyncio.gather(*(
+                client_loop(client, builders[name], deadline, latencies[name], errors[name])
+                for name in endpoints for _ in range(concurrency)))
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+    return {name: summarize(latencies[name], errors[name][0], duration)
+            for name in endpoints}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load the password endpoints")
+    parser.add_argument("--rows", type=int, default=100000, help="number of seeded rows")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load")
+    parser.add_argument("--concurrency", type=int, default=16, help="clients per endpoint")
+    parser.add_argument("--endpoints", default="get,search,create")
+    parser.add_argument("--output", help="JSON file of the results, "
+                                         "default benchmarks/results/<commit>.json")
+    args = parser.parse_args()
+
+    endpoints = args.endpoints.split(",")
+    results = asyncio.run(run(args.rows, args.duration, args.concurrency, endpoints))
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "rows": args.rows,
+        "duration": args.duration,
+        "concurrency": args.concurrency,
+        "endpoints": results,
+    }
+
+    print(f"{'endpoint':<8} {'requests':>9} {'errors':>7} {'rps':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, result in results.items():
+        print(f"{name:<8} {result['requests']:>9} {result['errors']:>7} "
+              f"{result['throughput_rps']:>9.1f} {result['p50_ms']:>8.2f} "
+              f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+
+    output = args.output or os.path.join("benchmarks", "results", f"{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
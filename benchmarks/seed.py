@@ -0,0 +1,83 @@
+"""
+This module seeds the benchmark database with a large number of passwords.
+
+The rows are written with COPY (asyncpg copy_records_to_table) in chunks,
+all of them share one precomputed bcrypt hash, so seeding 10^6 rows takes
+seconds instead of hours of hashing. The passwords are encrypted as the
+service stores them, all rows belong to DEFAULT_OWNER_ID, the owner of the
+load test requests. The table is created from the models
+and analyzed after the load.
+
+The benchmark database is the test database (DB_TEST_NAME).
+
+Usage:
+    python -m benchmarks.seed --rows 1000000
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from src.config.settings import settings
+from src.models.base import Base
+from src.services.encryption import password_cipher
+from src.services.hashing import hash_password
+
+CHUNK_SIZE = 50000
+
+
+def service_name(i: int) -> str:
+    """Returns the service name of the i-th seeded row."""
+    return f"bench_{i:08d}"
+
+
+async def seed(engine: AsyncEngine, rows: int) -> float:
+    """
+    Recreates the password table, fills it with rows passwords and
+    updates the statistics of the table.
+
+    Returns:
+        float: Duration of the load in seconds, without the ANALYZE.
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    hashed = hash_password("bench_password")
+    start = time.perf_counter()
+    async with engine.connect() as conn:
+        raw = (await conn.get_raw_connection()).driver_connection
+        for first in range(0, rows, CHUNK_SIZE):
+            records = [(settings.DEFAULT_OWNER_ID,
+                        service_name(i),
+                        password_cipher.encrypt(f"password_{i}", settings.DEFAULT_OWNER_ID,
+                                                service_name(i)),
+                        hashed)
+                       for i in range(first, min(first + CHUNK_SIZE, rows))]
+            await raw.copy_records_to_table(
+                "password",
+                records=records,
+                columns=["owner_id", "service_name", "password", "hashed_password"])
+        await conn.commit()
+    elapsed = time.perf_counter() - start
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE password"))
+    return elapsed
+
+
+async def main(rows: int) -> None:
+    engine = create_async_engine(settings.DATABASE_URL_TEST)
+    try:
+        elapsed = await seed(engine, rows)
+    finally:
+        await engine.dispose()
+    print(f"seeded {rows} rows in {elapsed:.1f} s ({rows / elapsed:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed the benchmark database")
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows))
@@ -1,9 +1,11 @@
 """
-Packages src contains 5 packages and 1 module:
+Packages src contains 7 packages and 1 module:
     config - connection settings
+    jobs - background and CLI jobs
     managers - managers for CRUD operations
     models - database models
     routers - routers and API
     schemas - pydantic models
+    services - services shared by managers (hashing)
     main.py - entry point
 """
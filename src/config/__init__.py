@@ -1,5 +1,7 @@
 """
-Packages maangers contains 2 modules:
+Packages maangers contains 4 modules:
     dependencies.py - module for creating asynchronous connection to db
+    pool.py - connection pool with checkout statistics
+    replicas.py - routing of reads to the read replicas
     settings.py - module for getting db url and secret for password
 """
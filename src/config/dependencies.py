@@ -2,22 +2,183 @@
 This module defines an async connection to the database.
 
 It provides methods for obtaining an asynchronous database session and a user database instance.
+The pool of the engine is configured from Settings and collects checkout statistics,
+the statements of the engine are timed in the metrics. Reads can be sent to the
+read replicas of DB_REPLICA_URLS (see src.config.replicas).
+The engines are created on first use, so importing the application does not
+configure any database connection.
 Additionally, it includes error handling for cases where the database connection fails.
 
+Classes:
+    - Database: the lazily created engines of the primary and of the read replicas.
+
 Methods:
+    - create_engine: Creates an instrumented engine with the pool configured from Settings.
     - get_async_session: A dependency function that provides an asynchronous database session.
+    - get_session_maker: A dependency function that provides the session factory,
+      for work that outlives the request handler (e.g. streaming responses).
+    - get_owner_id: A dependency function that provides the owner of the request.
+    - get_read_session_maker: A dependency function that provides the session factory
+      of the database a read is sent to (a replica or the primary).
+    - get_read_session: A dependency function that provides a session for reads.
+    - require_internal: A dependency function that admits only operators to the internal routes.
 """
-from typing import AsyncGenerator
+import asyncio
+import hmac
+import ipaddress
+from typing import AsyncGenerator, Optional
 
-from fastapi import HTTPException
+from fastapi import Depends, Header, HTTPException, Request
+from sqlalchemy.engine import make_url
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
-                                    create_async_engine)
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker, create_async_engine)
+
+from src.config.pool import TimedAsyncAdaptedQueuePool
+from src.config.replicas import Replica, ReplicaRouter
+from src.config.settings import Settings, settings
+from src.services.admission import client_key
+from src.services.metrics import instrument_engine, registry
+
+
+def create_engine(url: str, app_settings: Settings = settings) -> AsyncEngine:
+    """
+    Creates an engine with the pool configured from Settings.
+    """
+    new_engine = create_async_engine(
+        url,
+        echo=False,
+        poolclass=TimedAsyncAdaptedQueuePool,
+        pool_size=app_settings.DB_POOL_SIZE,
+        max_overflow=app_settings.DB_MAX_OVERFLOW,
+        pool_timeout=app_settings.DB_POOL_TIMEOUT,
+        pool_recycle=app_settings.DB_POOL_RECYCLE,
+        pool_pre_ping=app_settings.DB_POOL_PRE_PING,
+        connect_args={"statement_cache_size": app_settings.DB_STATEMENT_CACHE_SIZE},
+    )
+    instrument_engine(new_engine)
+    return new_engine
+
+
+class Database:
+    """
+    Database class holds the engines of the primary and of the read replicas.
+
+    The engines are created on the first access of engine or session_maker,
+    the replicas are added to replica_router at the same time.
+
+    Attributes:
+        settings (Settings): The settings the engines are created from.
+        replica_router (ReplicaRouter): The router of the reads.
+    """
+
+    def __init__(self, app_settings: Settings):
+        self.settings = app_settings
+        self.replica_router = ReplicaRouter([], app_settings.READ_YOUR_WRITES_SECONDS)
+        self._engine: Optional[AsyncEngine] = None
+        self._session_maker: Optional[async_sessionmaker[AsyncSession]] = None
+
+    @property
+    def connected(self) -> bool:
+        """Whether the engines have been created."""
+        return self._engine is not None
+
+    def configure(self, app_settings: Settings) -> None:
+        """
+        Replaces the settings, before the engines are created.
+
+        Raises:
+            RuntimeError: If the engines already exist.
+        """
+        if app_settings is self.settings:
+            return
+        if self.connected:
+            raise RuntimeError("The database engines are already created")
+        self.settings = app_settings
+        self.replica_router.read_your_writes = app_settings.READ_YOUR_WRITES_SECONDS
+
+    def _connect(self) -> None:
+        self._engine = create_engine(self.settings.DATABASE_URL, self.settings)
+        self._session_maker = async_sessionmaker(self._engine, expire_on_commit=False)
+        self.replica_router.replicas = [
+            Replica(f"{make_url(url).host}:{make_url(url).port or 5432}",
+                    async_sessionmaker(create_engine(url, self.settings),
+                                       expire_on_commit=False))
+            for url in self.settings.DB_REPLICA_URLS]
+
+    @property
+    def engine(self) -> AsyncEngine:
+        """The engine of the primary."""
+        if self._engine is None:
+            self._connect()
+        return self._engine
 
-from src.config.settings import settings
+    @property
+    def session_maker(self) -> async_sessionmaker[AsyncSession]:
+        """The session factory of the primary."""
+        if self._session_maker is None:
+            self._connect()
+        return self._session_maker
 
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async def warm_up(self, connections: int) -> int:
+        """
+        Opens connections of the primary pool, so the first requests don't wait for them.
+
+        If a connection fails, the connections that were opened are returned
+        to the pool before the error is raised.
+
+        Args:
+            connections (int): Number of connections, at most the pool size.
+
+        Returns:
+            int: The number of connections opened.
+        """
+        connections = min(connections, self.settings.DB_POOL_SIZE)
+        results = await asyncio.gather(*(self.engine.connect().start()
+                                         for _ in range(connections)),
+                                       return_exceptions=True)
+        opened = [result for result in results if not isinstance(result, BaseException)]
+        for connection in opened:
+            await connection.close()
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return len(opened)
+
+    async def dispose(self) -> None:
+        """Closes the connections of all engines, they are created again on the next use."""
+        if self._engine is None:
+            return
+        engines = [self._engine] + [replica.session_maker.kw["bind"]
+                                    for replica in self.replica_router.replicas]
+        self._engine = self._session_maker = None
+        self.replica_router.replicas = []
+        for old_engine in engines:
+            await old_engine.dispose()
+
+
+database = Database(settings)
+replica_router = database.replica_router
+db_reads = registry.counter("db_reads_total", "Read sessions by the database they were sent to.",
+                            ("target",))
+registry.gauge("db_replicas_healthy", "Read replicas getting reads.",
+               callback=lambda: sum(replica.healthy for replica in replica_router.replicas))
+registry.gauge("db_pool_checked_out", "Connections checked out from the pool.",
+               callback=lambda: database.engine.pool.checkedout() if database.connected else 0)
+registry.gauge("db_pool_overflow", "Connections opened above the pool size.",
+               callback=lambda: (max(database.engine.pool.overflow(), 0)
+                                 if database.connected else 0))
+
+
+def __getattr__(name: str):
+    """
+    Creates the engine on the first import of engine or async_session_maker.
+    """
+    if name == "engine":
+        return database.engine
+    if name == "async_session_maker":
+        return database.session_maker
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
@@ -31,9 +192,114 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
         HTTPException: If the database connection fails.
     """
     try:
-        async with async_session_maker() as session:
+        async with database.session_maker() as session:
             yield session
     except SQLAlchemyError as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to connect to the database: {str(e)}")
+
+
+def get_session_maker() -> async_sessionmaker[AsyncSession]:
+    """
+    Dependency to get the factory of asynchronous database sessions.
+
+    Sessions from get_async_session are closed before a streaming response
+    is sent, so streaming responses open their own session with this factory.
+
+    Returns:
+        async_sessionmaker[AsyncSession]: The session factory.
+    """
+    return database.session_maker
+
+
+def get_owner_id(
+        x_owner_id: Optional[str] = Header(
+            None, min_length=1, max_length=64, pattern=r"^[A-Za-z0-9_.-]+$",
+            description="Owner (team) of the passwords, DEFAULT_OWNER_ID if not set")) -> str:
+    """
+    Dependency to get the owner (team) the request works with.
+
+    The header is trusted, it is expected to be set by the gateway that
+    authenticates the client.
+
+    Returns:
+        str: The X-Owner-Id header or DEFAULT_OWNER_ID.
+    """
+    return x_owner_id or settings.DEFAULT_OWNER_ID
+
+
+def get_read_session_maker(
+        request: Request,
+        session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker)
+) -> async_sessionmaker[AsyncSession]:
+    """
+    Dependency to get the session factory of the database a read goes to.
+
+    Args:
+        request (Request): The request, identifies the client for read-your-writes.
+        session_maker (async_sessionmaker): The session factory of the primary.
+
+    Returns:
+        async_sessionmaker[AsyncSession]: A healthy replica or the primary.
+    """
+    read_session_maker = replica_router.choose(client_key(request), session_maker)
+    db_reads.inc(target="primary" if read_session_maker is session_maker else "replica")
+    return read_session_maker
+
+
+async def get_read_session(
+        session_maker: async_sessionmaker[AsyncSession] = Depends(get_read_session_maker)
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency to get an asynchronous session for reads.
+
+    A replica that fails the request (a database or a connection error) gets no reads
+    until its next successful health check.
+
+    Yields:
+        AsyncSession: A session of a replica or of the primary.
+
+    Raises:
+        HTTPException: If the database connection fails.
+    """
+    try:
+        async with session_maker() as session:
+            yield session
+    except (SQLAlchemyError, OSError) as e:
+        replica_router.mark_unhealthy(session_maker, e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to connect to the database: {str(e)}")
+
+
+async def require_internal(
+        request: Request,
+        x_internal_token: Optional[str] = Header(None, include_in_schema=False)) -> None:
+    """
+    Dependency admitting only operators to the internal routes.
+
+    A request is admitted if its peer address (not ADMISSION_CLIENT_HEADER,
+    which the client can set) is in INTERNAL_ALLOWED_NETWORKS or if it sends
+    INTERNAL_TOKEN in the X-Internal-Token header.
+
+    Args:
+        request (Request): The request, gives the peer address and the settings of the app.
+        x_internal_token (Optional[str]): The token of the request.
+
+    Raises:
+        HTTPException: 403 if the request is not admitted.
+    """
+    app_settings = request.app.state.settings
+    if (app_settings.INTERNAL_TOKEN and x_internal_token
+            and hmac.compare_digest(x_internal_token.encode(),
+                                    app_settings.INTERNAL_TOKEN.encode())):
+        return
+    try:
+        address = ipaddress.ip_address(request.client.host if request.client else "")
+    except ValueError:
+        address = None
+    if address is not None and any(address in ipaddress.ip_network(network)
+                                   for network in app_settings.INTERNAL_ALLOWED_NETWORKS):
+        return
+    raise HTTPException(status_code=403, detail="Internal endpoints are not available")
@@ -0,0 +1,84 @@
+"""
+This module defines the connection pool with checkout statistics.
+
+Classes:
+    - PoolStats: counters of connection checkouts.
+    - TimedAsyncAdaptedQueuePool: asyncio queue pool that measures checkouts.
+"""
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolStats:
+    """
+    Counters of connection checkouts.
+
+    The checkout time is the time from asking the pool for a connection to
+    getting it: waiting for a free connection, opening a new one and the
+    pre-ping, if it is enabled.
+
+    Attributes:
+        checkouts (int): Number of successful checkouts.
+        timeouts (int): Number of checkouts that failed after pool_timeout.
+        total_wait (float): Sum of checkout times in seconds.
+        max_wait (float): Longest checkout time in seconds.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, elapsed: float) -> None:
+        """Records the time of one successful checkout."""
+        self.checkouts += 1
+        self.total_wait += elapsed
+        self.max_wait = max(self.max_wait, elapsed)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that counts checkout times and timeouts.
+
+    Attributes:
+        stats (PoolStats): Counters of connection checkouts.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self) -> "TimedAsyncAdaptedQueuePool":
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return connection
+
+    def snapshot(self) -> dict:
+        """
+        Returns the current state of the pool and the checkout counters.
+        """
+        checkouts = self.stats.checkouts
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "checkouts": checkouts,
+            "timeouts": self.stats.timeouts,
+            "wait_avg_ms": self.stats.total_wait / checkouts * 1000 if checkouts else 0.0,
+            "wait_max_ms": self.stats.max_wait * 1000,
+        }
@@ -0,0 +1,169 @@
+"""
+This module defines the routing of read queries to read replicas.
+
+Reads are spread over the healthy replicas round-robin. A replica is
+healthy while its periodic check (SELECT of the replication lag) succeeds
+within DB_REPLICA_HEALTH_TIMEOUT and the lag is at most
+DB_REPLICA_MAX_LAG_SECONDS, a replica that fails a request is marked
+unhealthy until its next successful check. Without healthy replicas the
+reads go to the primary.
+
+The lag is the age of the last replayed transaction only while the replica
+is behind (it has received WAL it hasn't replayed yet). A replica that has
+replayed all it received has no lag, so an idle primary, whose last
+transaction gets older without new WAL, doesn't make its replicas lagging.
+
+A client that wrote in the last READ_YOUR_WRITES_SECONDS reads from the
+primary, so it sees its own writes even if the replicas lag. The writes
+are remembered by the worker that handled them, a read handled by another
+worker in the window can still go to a replica.
+
+Classes:
+    - Replica: a replica and its health.
+    - ReplicaRouter: chooses the database of a read.
+"""
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+LAG_QUERY = text(
+    "SELECT pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() AS caught_up, "
+    "EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) AS replay_age")
+
+
+class Replica:
+    """
+    Replica class holds a replica and its health.
+
+    Attributes:
+        name (str): The name of the replica in the stats (host and port).
+        session_maker (async_sessionmaker): The factory of sessions of the replica.
+        healthy (bool): Whether reads are sent to the replica.
+        lag (Optional[float]): The replication lag of the last check in seconds.
+        checked_at (Optional[float]): Unix time of the last check.
+        error (Optional[str]): The error of the last failed check or request.
+    """
+
+    def __init__(self, name: str, session_maker: async_sessionmaker[AsyncSession]):
+        self.name = name
+        self.session_maker = session_maker
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    async def check(self, timeout: float, max_lag: float) -> bool:
+        """
+        Checks the connection and the replication lag of the replica.
+
+        Returns:
+            bool: Whether the replica is healthy.
+        """
+        try:
+            self.lag = await asyncio.wait_for(self._lag(), timeout)
+            self.error = None if self.lag <= max_lag else f"lag {self.lag:.1f} s"
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+        self.checked_at = time.time()
+        self.healthy = self.error is None
+        return self.healthy
+
+    async def _lag(self) -> float:
+        async with self.session_maker() as session:
+            caught_up, replay_age = (await session.execute(LAG_QUERY)).one()
+        # replay_age is NULL on a primary or before the first replayed transaction
+        if caught_up or replay_age is None:
+            return 0.0
+        return float(replay_age)
+
+
+class ReplicaRouter:
+    """
+    ReplicaRouter class chooses the database of every read.
+
+    Attributes:
+        replicas (List[Replica]): The replicas.
+        read_your_writes (float): Seconds after a write of a client its reads go to the primary.
+        max_clients (int): Number of clients whose last write is remembered.
+
+    Methods:
+        - choose: returns the session factory for a read of the client.
+        - record_write: remembers a write of the client.
+        - wrote_recently: whether the client is in its read-your-writes window.
+        - mark_unhealthy: stops reads from the replica of a failed request.
+        - check: checks all replicas.
+        - snapshot: returns the state of the replicas.
+    """
+
+    def __init__(self,
+                 replicas: List[Replica],
+                 read_your_writes: float = 5,
+                 max_clients: int = 10000):
+        self.replicas = replicas
+        self.read_your_writes = read_your_writes
+        self.max_clients = max_clients
+        self._turn = itertools.count()
+        self._writes: "OrderedDict[str, float]" = OrderedDict()
+
+    def record_write(self, client: str) -> None:
+        if not self.replicas:
+            return
+        self._writes[client] = time.monotonic()
+        self._writes.move_to_end(client)
+        if len(self._writes) > self.max_clients:
+            self._writes.popitem(last=False)
+
+    def wrote_recently(self, client: str) -> bool:
+        written = self._writes.get(client)
+        return written is not None and time.monotonic() - written < self.read_your_writes
+
+    def choose(self, client: str,
+               primary: async_sessionmaker[AsyncSession]) -> async_sessionmaker[AsyncSession]:
+        """
+        Returns the session factory for a read of the client.
+
+        Args:
+            client (str): The identifier of the client.
+            primary (async_sessionmaker): The session factory of the primary.
+
+        Returns:
+            async_sessionmaker: A healthy replica in turn, the primary in the
+            read-your-writes window of the client or without healthy replicas.
+        """
+        if not self.replicas or self.wrote_recently(client):
+            return primary
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return primary
+        return healthy[next(self._turn) % len(healthy)].session_maker
+
+    def mark_unhealthy(self, session_maker: async_sessionmaker[AsyncSession],
+                       error: Exception) -> None:
+        for replica in self.replicas:
+            if replica.session_maker is session_maker:
+                replica.healthy = False
+                replica.error = str(error) or type(error).__name__
+
+    async def check(self, timeout: float, max_lag: float) -> int:
+        """
+        Checks all replicas concurrently.
+
+        Returns:
+            int: The number of healthy replicas.
+        """
+        return sum(await asyncio.gather(*(replica.check(timeout, max_lag)
+                                          for replica in self.replicas)))
+
+    def snapshot(self) -> List[dict]:
+        return [{
+            "name": replica.name,
+            "healthy": replica.healthy,
+            "lag": replica.lag,
+            "checked_at": replica.checked_at,
+            "error": replica.error,
+        } for replica in self.replicas]
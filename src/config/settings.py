@@ -4,6 +4,8 @@ This module defines an settings for app
 Classes:
     - Settings: contains const settings from enviroment
 """
+from typing import List, Literal, Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -25,6 +27,68 @@ class Settings(BaseSettings):
         DB_NAME (str): Name of the main database.
         DB_TEST_NAME (str): Name of the test database.
         ENV (str): Application environment mode ("TEST" - migrations for testing db, "DEV" - migrations for dev db)
+        DB_POOL_SIZE (int): Number of connections kept open in the pool of every worker.
+        DB_MAX_OVERFLOW (int): Number of connections opened above DB_POOL_SIZE under load.
+        DB_POOL_TIMEOUT (float): Seconds to wait for a free connection before failing.
+        DB_POOL_RECYCLE (int): Seconds after which a connection is reopened, -1 - never.
+        DB_POOL_PRE_PING (bool): Check connections with a ping on checkout.
+        READ_COALESCING (bool): Whether identical concurrent reads share one query.
+        CREATE_BATCH_WINDOW_MS (float): Milliseconds concurrent creates are collected into one INSERT and commit, 0 - no batching.
+        CREATE_BATCH_MAX_SIZE (int): Number of creates that flushes a batch before the window ends.
+        WARMUP_DB_CONNECTIONS (int): Pool connections opened at startup (at most DB_POOL_SIZE).
+        WARMUP_HASHING (bool): Whether the hashing workers are started at startup.
+        READINESS_TIMEOUT (float): Seconds the database check of /internal/ready may take.
+        DB_REPLICA_URLS (List[str]): SQLAlchemy URLs (postgresql+asyncpg://...) of the read replicas (JSON list in .env).
+        DB_REPLICA_HEALTH_INTERVAL (float): Seconds between the health checks of the replicas.
+        DB_REPLICA_HEALTH_TIMEOUT (float): Seconds a health check may take.
+        DB_REPLICA_MAX_LAG_SECONDS (float): Replication lag above which a replica gets no reads.
+        READ_YOUR_WRITES_SECONDS (float): Seconds after a write of a client its reads go to the primary.
+        DB_STATEMENT_CACHE_SIZE (int): Size of the asyncpg prepared statement cache, 0 - disabled (e.g. for pgbouncer).
+        ENCRYPTION_KEY (str): urlsafe base64 of the AES-GCM key (16, 24 or 32 bytes) of the stored passwords.
+        DECRYPT_THREAD_THRESHOLD (int): Rows decrypted in the event loop, larger batches are decrypted in a thread.
+        ADMISSION_ENABLED (bool): Enables the rate limits and the hashing cap of the password routes.
+        ADMISSION_READ_RATE (float): Read requests per second allowed to one client in one worker.
+        ADMISSION_READ_BURST (int): Read requests one client can send at once.
+        ADMISSION_WRITE_RATE (float): Hash-heavy write requests per second allowed to one client in one worker.
+        ADMISSION_WRITE_BURST (int): Write requests one client can send at once.
+        ADMISSION_MAX_HASHING (int): Write requests of all clients running at once in one worker.
+        ADMISSION_MAX_CLIENTS (int): Number of clients whose buckets are kept.
+        ADMISSION_CLIENT_HEADER (Optional[str]): Header identifying the client, the peer address if not set.
+        FAST_JSON (bool): Serialize responses with orjson and skip the second response_model validation.
+        HASH_EXECUTOR (Literal["process", "thread"]): Worker pool for password hashing.
+        HASH_WORKERS (Optional[int]): Number of hashing workers, defaults to the number of CPUs.
+        HASH_QUEUE_SIZE (int): Number of hashes allowed to wait for a free worker.
+        HASH_SCHEMES (List[str]): passlib schemes, the first one is used for new hashes (JSON list in .env).
+        HASH_BCRYPT_ROUNDS (int): Cost of bcrypt, hashes with other cost are upgraded by the rehash job.
+        REHASH_BATCH_SIZE (int): Number of rows checked by the rehash job in one transaction.
+        REHASH_PAUSE_SECONDS (float): Pause of the rehash job between batches.
+        BULK_BATCH_SIZE (int): Number of rows written by one INSERT of the bulk import.
+        BULK_MAX_ERRORS (int): Maximum number of rejected rows listed in the bulk import report.
+        BULK_MAX_LINE_LENGTH (int): Maximum length of one line of the bulk import body in bytes.
+        BULK_HASH_RETRIES (int): Retries of a bulk import batch while the hashing queue is full.
+        DEFAULT_OWNER_ID (str): Owner of the requests without the X-Owner-Id header.
+        SEARCH_DEFAULT_LIMIT (int): Default number of passwords on one page of the search.
+        SEARCH_MAX_LIMIT (int): Maximum number of passwords on one page of the search.
+        BATCH_GET_MAX_NAMES (int): Maximum number of service names in one batch lookup.
+        AUTOCOMPLETE_DEFAULT_LIMIT (int): Default number of service names returned by the autocomplete.
+        AUTOCOMPLETE_MAX_LIMIT (int): Maximum number of service names returned by the autocomplete.
+        AUTOCOMPLETE_REFRESH_SECONDS (float): Interval of the reload of the autocomplete index, 0 - only at startup.
+        EXPORT_FETCH_SIZE (int): Number of rows fetched from the server-side cursor of the export at once.
+        CACHE_BACKEND (Literal["memory", "redis", "none"]): Backend of the password cache.
+        CACHE_URL (Optional[str]): URL of the shared cache, required for the "redis" backend.
+        CACHE_MAX_SIZE (int): Maximum number of entries of the in-process cache.
+        CACHE_TTL_SECONDS (int): Time to live of a cache entry in seconds.
+        AUDIT_BACKEND (Literal["table", "file", "none"]): Where the audit events of password access are written.
+        AUDIT_QUEUE_SIZE (int): Number of audit events that can wait for the writer of the worker.
+        AUDIT_BATCH_SIZE (int): Maximum number of audit events in one write.
+        AUDIT_FLUSH_INTERVAL (float): Seconds the audit writer collects events before a write.
+        AUDIT_DROP_POLICY (Literal["drop_new", "drop_oldest"]): Event lost when the audit queue is full.
+        AUDIT_FILE_PATH (str): File of the "file" backend.
+        AUDIT_FILE_MAX_BYTES (int): Size at which the audit file is rotated.
+        AUDIT_FILE_BACKUPS (int): Number of rotated audit files kept.
+        INTERNAL_ENABLED (bool): Whether the /internal routes are mounted.
+        INTERNAL_TOKEN (Optional[str]): Token of the X-Internal-Token header admitting any client to the /internal routes.
+        INTERNAL_ALLOWED_NETWORKS (List[str]): Networks of the peers admitted to the /internal routes without the token (JSON list in .env).
     """
 
     DB_HOST: str
@@ -35,6 +99,75 @@ class Settings(BaseSettings):
     DB_TEST_NAME: str
     ENV: str
 
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_REPLICA_URLS: List[str] = []
+    WARMUP_DB_CONNECTIONS: int = 5
+    CREATE_BATCH_WINDOW_MS: float = 0
+    READ_COALESCING: bool = True
+    CREATE_BATCH_MAX_SIZE: int = 100
+    WARMUP_HASHING: bool = True
+    READINESS_TIMEOUT: float = 2
+    DB_REPLICA_HEALTH_INTERVAL: float = 5
+    DB_REPLICA_HEALTH_TIMEOUT: float = 1
+    DB_REPLICA_MAX_LAG_SECONDS: float = 10
+    READ_YOUR_WRITES_SECONDS: float = 5
+
+    ENCRYPTION_KEY: str
+    DECRYPT_THREAD_THRESHOLD: int = 256
+
+    ADMISSION_ENABLED: bool = False
+    ADMISSION_READ_RATE: float = 50
+    ADMISSION_READ_BURST: int = 100
+    ADMISSION_WRITE_RATE: float = 2
+    ADMISSION_WRITE_BURST: int = 10
+    ADMISSION_MAX_HASHING: int = 32
+    ADMISSION_MAX_CLIENTS: int = 10000
+    ADMISSION_CLIENT_HEADER: Optional[str] = None
+
+    FAST_JSON: bool = False
+
+    HASH_EXECUTOR: Literal["process", "thread"] = "process"
+    HASH_WORKERS: Optional[int] = None
+    HASH_QUEUE_SIZE: int = 64
+    HASH_SCHEMES: List[str] = ["bcrypt"]
+    HASH_BCRYPT_ROUNDS: int = 12
+    REHASH_BATCH_SIZE: int = 500
+    REHASH_PAUSE_SECONDS: float = 0.5
+
+    BULK_BATCH_SIZE: int = 1000
+    BULK_MAX_ERRORS: int = 1000
+    BULK_MAX_LINE_LENGTH: int = 64 * 1024
+    BULK_HASH_RETRIES: int = 30
+    DEFAULT_OWNER_ID: str = "default"
+    SEARCH_DEFAULT_LIMIT: int = 50
+    SEARCH_MAX_LIMIT: int = 500
+    BATCH_GET_MAX_NAMES: int = 500
+    AUTOCOMPLETE_DEFAULT_LIMIT: int = 10
+    AUTOCOMPLETE_MAX_LIMIT: int = 100
+    AUTOCOMPLETE_REFRESH_SECONDS: float = 60
+    EXPORT_FETCH_SIZE: int = 1000
+
+    CACHE_BACKEND: Literal["memory", "redis", "none"] = "memory"
+    CACHE_URL: Optional[str] = None
+    CACHE_MAX_SIZE: int = 10000
+    CACHE_TTL_SECONDS: int = 60
+    AUDIT_BACKEND: Literal["table", "file", "none"] = "table"
+    AUDIT_QUEUE_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL: float = 1.0
+    AUDIT_DROP_POLICY: Literal["drop_new", "drop_oldest"] = "drop_new"
+    AUDIT_FILE_PATH: str = "audit.log"
+    AUDIT_FILE_MAX_BYTES: int = 10 * 1024 * 1024
+    AUDIT_FILE_BACKUPS: int = 5
+    INTERNAL_ENABLED: bool = True
+    INTERNAL_TOKEN: Optional[str] = None
+    INTERNAL_ALLOWED_NETWORKS: List[str] = ["127.0.0.0/8", "::1/128"]
+
     @property
     def DATABASE_URL(self) -> str:
         """
@@ -0,0 +1,4 @@
+"""
+Packages jobs contains 1 module:
+    rehash.py - background upgrade of outdated password hashes
+"""
@@ -0,0 +1,120 @@
+"""
+This module defines the job that upgrades outdated password hashes.
+
+The job walks the password table by its primary key (owner_id, id) in
+batches of REHASH_BATCH_SIZE rows.
+Every batch is one short transaction: the rows are read, outdated hashes
+(other scheme or cost than in Settings) are computed again in the hashing
+worker pool and written back, then the job sleeps REHASH_PAUSE_SECONDS, so
+it doesn't hold long transactions or starve live traffic. A hash is only
+replaced if it didn't change since it was read.
+
+Usage:
+    python -m src.jobs.rehash --batch-size 500 --pause 0.5 --workers 1
+
+Methods:
+    - rehash_passwords: upgrades outdated hashes of all rows.
+"""
+import argparse
+import asyncio
+from typing import List
+
+from fastapi import HTTPException
+from sqlalchemy import bindparam, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config.settings import settings
+from src.models.password import Password
+from src.services.encryption import password_cipher
+from src.services.hashing import HashingService, needs_rehash
+
+password_table = Password.__table__
+
+update_hash_query = update(password_table).where(
+    password_table.c.owner_id == bindparam("row_owner_id"),
+    password_table.c.id == bindparam("row_id"),
+    password_table.c.hashed_password == bindparam("old_hash"),
+).values(hashed_password=bindparam("new_hash"))
+
+
+async def _hash_many(hashing_service: HashingService, passwords: List[str]) -> List[str]:
+    while True:
+        try:
+            return await hashing_service.hash_many(passwords)
+        except HTTPException as e:
+            if e.status_code != 503:
+                raise
+            await asyncio.sleep(1)
+
+
+async def rehash_passwords(session_maker: async_sessionmaker[AsyncSession],
+                           hashing_service: HashingService,
+                           batch_size: int = settings.REHASH_BATCH_SIZE,
+                           pause: float = settings.REHASH_PAUSE_SECONDS) -> dict:
+    """
+    Upgrades outdated hashes of all rows.
+
+    Args:
+        session_maker (async_sessionmaker): The factory of database sessions.
+        hashing_service (HashingService): The pool that computes the new hashes.
+        batch_size (int): Number of rows in one transaction.
+        pause (float): Seconds to sleep between batches.
+
+    Returns:
+        dict: Number of checked and upgraded rows.
+    """
+    checked = upgraded = 0
+    last_key = ("", 0)
+    while True:
+        async with session_maker() as session:
+            query = select(Password.owner_id, Password.id, Password.service_name,
+                           Password.password, Password.hashed_password).where(
+                tuple_(Password.owner_id, Password.id) > tuple_(*last_key)).order_by(
+                    Password.owner_id, Password.id).limit(batch_size)
+            rows = (await session.execute(query)).all()
+            # don't keep the snapshot open while hashing
+            await session.rollback()
+            if not rows:
+                break
+            last_key = (rows[-1].owner_id, rows[-1].id)
+            checked += len(rows)
+
+            outdated = [row for row in rows if needs_rehash(row.hashed_password)]
+            if outdated:
+                hashes = await _hash_many(hashing_service,
+                                          [password_cipher.decrypt(row.password, row.owner_id,
+                                                                   row.service_name)
+                                           for row in outdated])
+                result = await session.execute(update_hash_query, [
+                    {"row_owner_id": row.owner_id, "row_id": row.id,
+                     "old_hash": row.hashed_password, "new_hash": hashed}
+                    for row, hashed in zip(outdated, hashes)
+                ])
+                await session.commit()
+                upgraded += result.rowcount if result.rowcount >= 0 else len(outdated)
+        await asyncio.sleep(pause)
+    return {"checked": checked, "upgraded": upgraded}
+
+
+async def main(batch_size: int, pause: float, workers: int) -> None:
+    from src.config.dependencies import database
+
+    hashing_service = HashingService(executor_type=settings.HASH_EXECUTOR,
+                                     max_workers=workers)
+    try:
+        result = await rehash_passwords(database.session_maker, hashing_service,
+                                        batch_size, pause)
+    finally:
+        hashing_service.shutdown()
+        await database.dispose()
+    print(f"checked {result['checked']} rows, upgraded {result['upgraded']} hashes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upgrade outdated password hashes")
+    parser.add_argument("--batch-size", type=int, default=settings.REHASH_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=settings.REHASH_PAUSE_SECONDS)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="hashing workers, keep it low to leave CPU for live traffic")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.pause, args.workers))
@@ -5,21 +5,193 @@ It initializes the FastAPI app and includes the routers for password management.
 
 Routers:
     - passwordroute: Handles password endpoints.
+    - internalroute: Handles service endpoints for operators.
+    - metricsroute: Serves the metrics.
 
 Endpoints:
     - Password-related endpoints are available under the `/password` path.
+    - Service endpoints are available under the `/internal` path.
+    - Metrics in the Prometheus text format are available at `/metrics`.
+
+With FAST_JSON enabled, responses are encoded with orjson app-wide.
+
+Methods:
+    - create_app: Creates the application for the settings.
+
+The startup warms up the pool connections and the hashing workers, the duration
+of the import and of every startup phase is exported as app_startup_seconds.
 
 Usage:
-    Run this module to start the FastAPI application. The application will be accessible 
+    Run this module to start the FastAPI application. The application will be accessible
     at the specified host and port (e.g., http://localhost:8000).
+    The module level `app` is created from the environment settings,
+    `uvicorn --factory src.main:create_app` creates a new one.
 """
+import time
+
+IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
 
+from src.config.dependencies import database, replica_router
+from src.config.settings import Settings, settings
+from src.managers.password import create_batcher, load_service_name_index
+from src.routers.internal import internalroute
+from src.routers.metrics import metricsroute
 from src.routers.password import passwordroute
+from src.services.audit import audit_log, build_sink
+from src.services.hashing import hashing_service
+from src.services.metrics import MetricsMiddleware, registry
+
+
+logger = logging.getLogger(__name__)
+startup_seconds = registry.gauge("app_startup_seconds",
+                                 "Duration of the import and of the startup phases.",
+                                 ("phase",))
+
+
+async def refresh_autocomplete(interval: float) -> None:
+    """
+    Reloads the autocomplete index every interval seconds.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await load_service_name_index(database.session_maker)
+        except Exception as e:
+            logger.warning("Autocomplete index reload failed: %s", e)
+
+
+async def check_replicas(app_settings: Settings) -> None:
+    """
+    Checks the health and the lag of the read replicas every DB_REPLICA_HEALTH_INTERVAL seconds.
+    """
+    while True:
+        healthy = await replica_router.check(app_settings.DB_REPLICA_HEALTH_TIMEOUT,
+                                             app_settings.DB_REPLICA_MAX_LAG_SECONDS)
+        if healthy < len(replica_router.replicas):
+            logger.warning("%d of %d read replicas are unhealthy",
+                           len(replica_router.replicas) - healthy,
+                           len(replica_router.replicas))
+        await asyncio.sleep(app_settings.DB_REPLICA_HEALTH_INTERVAL)
+
+
+async def run_phase(app: FastAPI, phase: str, step) -> None:
+    """
+    Runs a startup step and records its duration, a failed step is logged
+    and doesn't stop the startup.
+    """
+    started = time.perf_counter()
+    try:
+        await step()
+    except Exception as e:
+        logger.warning("Startup phase %s failed: %s", phase, e)
+        app.state.startup_errors[phase] = str(e) or type(e).__name__
+    elapsed = time.perf_counter() - started
+    app.state.startup[phase] = elapsed
+    startup_seconds.set(elapsed, phase=phase)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan.
+
+    Opens WARMUP_DB_CONNECTIONS pool connections, starts the hashing workers,
+    loads the autocomplete index and starts its periodic reload, the health
+    checks of the read replicas and the audit writer on startup, stops them,
+    flushes the batched creates and the audit queue and stops the hashing
+    worker pool and the engines on shutdown.
+    """
+    app_settings: Settings = app.state.settings
+    started = time.perf_counter()
+    if app_settings.WARMUP_DB_CONNECTIONS > 0:
+        await run_phase(app, "database", lambda: database.warm_up(
+            app_settings.WARMUP_DB_CONNECTIONS))
+    if app_settings.WARMUP_HASHING:
+        await run_phase(app, "hashing", hashing_service.warm_up)
+    await run_phase(app, "autocomplete",
+                    lambda: load_service_name_index(database.session_maker))
+    tasks = []
+    if app_settings.AUTOCOMPLETE_REFRESH_SECONDS > 0:
+        tasks.append(asyncio.create_task(
+            refresh_autocomplete(app_settings.AUTOCOMPLETE_REFRESH_SECONDS)))
+    if replica_router.replicas:
+        tasks.append(asyncio.create_task(check_replicas(app_settings)))
+    audit_sink = build_sink(app_settings, database.session_maker)
+    if audit_sink is not None:
+        audit_log.start(audit_sink)
+    app.state.startup["total"] = time.perf_counter() - started
+    startup_seconds.set(app.state.startup["total"], phase="total")
+    app.state.started = True
+    logger.info("Startup finished: %s", {phase: round(seconds, 3)
+                                         for phase, seconds in app.state.startup.items()})
+    yield
+    app.state.started = False
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await create_batcher.drain()
+    await audit_log.stop()
+    hashing_service.shutdown()
+    await database.dispose()
+
+
+def create_app(app_settings: Settings = settings) -> FastAPI:
+    """
+    Creates the application.
+
+    app_settings is kept in app.state.settings and is honored by:
+        - the database engines and the read replicas (DB_*, READ_YOUR_WRITES_SECONDS),
+          created on the first request or the warm-up;
+        - the lifespan (WARMUP_*, AUTOCOMPLETE_REFRESH_SECONDS, the replica health
+          checks, AUDIT_BACKEND and its file);
+        - the responses (FAST_JSON), the internal routes (INTERNAL_*, READINESS_TIMEOUT).
+    The other services are module singletons of the process, built from the
+    environment settings on import: the hashing pool and its cost, the password
+    cache, the encryption key, the admission limits, the audit queue, the read
+    coalescing, the create batching and the limits of the route parameters.
+    An application with other values for them needs its own process with
+    those values in the environment.
+
+    Args:
+        app_settings (Settings): The settings of the application.
+
+    Returns:
+        FastAPI: The application with the routers and the middleware.
+    """
+    database.configure(app_settings)
+    new_app = FastAPI(
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse if app_settings.FAST_JSON else JSONResponse,
+    )
+    new_app.state.settings = app_settings
+    new_app.state.started = False
+    new_app.state.startup = {"import": IMPORT_SECONDS}
+    new_app.state.startup_errors = {}
+    new_app.include_router(
+        passwordroute,
+        prefix="/password",
+        tags=["password"],
+    )
+    if app_settings.INTERNAL_ENABLED:
+        new_app.include_router(
+            internalroute,
+            prefix="/internal",
+            tags=["internal"],
+            include_in_schema=False,
+        )
+    new_app.include_router(metricsroute, include_in_schema=False)
+    new_app.add_middleware(MetricsMiddleware)
+    return new_app
+
 
-app = FastAPI()
-app.include_router(
-    passwordroute,
-    prefix="/password",
-    tags=["password"],
-)
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+startup_seconds.set(IMPORT_SECONDS, phase="import")
+app = create_app()
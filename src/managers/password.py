@@ -6,21 +6,48 @@ Classes:
 
 Methods:
     get_password_manager: Dependency to retrieve a PasswordManager instance.
+    get_read_password_manager: Dependency to retrieve a PasswordManager for reads.
+    load_service_name_index: Reloads the autocomplete index from the database.
     is_password_data_empty: Raise HTTPException if password(s) not found
+    raise_service_name_exists: Raise HTTPException if the service name is taken
 """
 
-from typing import List
+import asyncio
+from typing import AsyncIterator, List, Optional, Tuple
 
-from fastapi import Depends, HTTPException
-from passlib.context import CryptContext
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy import Select, String, any_, bindparam, func, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.future import select
 
-from src.config.dependencies import get_async_session
+from src.config.dependencies import (get_async_session, get_owner_id,
+                                     get_read_session, get_read_session_maker,
+                                     get_session_maker, replica_router)
+from src.config.settings import settings
 from src.models.password import Password
-from src.schemas.password import PasswordCreate
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from src.schemas.password import (BulkImportError, BulkImportReport,
+                                  PasswordCreate)
+from src.services.admission import client_key
+from src.services.autocomplete import service_name_index
+from src.services.batching import GroupCommitBatcher
+from src.services.cache import password_cache
+from src.services.encryption import password_cipher
+from src.services.formats import encode_csv, encode_ndjson
+from src.services.hashing import hashing_service
+from src.services.metrics import password_hash_duration
+from src.services.pagination import decode_cursor, encode_cursor
+from src.services.singleflight import SingleFlight
+
+# columns returned by the read endpoints, the read path selects only them,
+# the password is stored encrypted and decrypted after the query
+READ_COLUMNS = (Password.service_name, Password.password)
+# columns the entity tags of the read endpoints are computed from
+VERSION_COLUMNS = (Password.id, Password.version)
+# identical concurrent reads share one query
+read_flights = SingleFlight(enabled=settings.READ_COALESCING)
 
 
 class PasswordManager:
@@ -28,93 +55,513 @@ class PasswordManager:
     PasswordManager class for handling password-related operations.
 
     This class provides methods to create, retrieve, search passwords
-    associated with the user identified by user id.
+    associated with the owner (team) identified by owner id. Every query
+    is scoped to the owner, so it reads only the partition of the owner.
 
     Attributes:
         session (AsyncSession): The SQLAlchemy session for database operations.
+        session_maker (async_sessionmaker): The factory of sessions for streaming operations.
+        owner_id (str): The owner of the passwords.
+        read_cache (bool): Whether reads are answered from the password cache,
+            off in the read-your-writes window of the client.
+        fill_cache (bool): Whether rows read are stored in the password cache,
+            off for the sessions of read replicas, which can return rows older
+            than the last write.
     """
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self,
+                 session: AsyncSession,
+                 session_maker: Optional[async_sessionmaker[AsyncSession]] = None,
+                 owner_id: str = settings.DEFAULT_OWNER_ID,
+                 read_cache: bool = True,
+                 fill_cache: bool = True):
         self.session = session
+        self.session_maker = session_maker
+        self.owner_id = owner_id
+        self.read_cache = read_cache
+        self.fill_cache = fill_cache
+
+    def _cache_key(self, service_name: str) -> str:
+        # owner ids can't contain "/"
+        return f"{self.owner_id}/{service_name}"
+
+    async def _read_shared(self, name: str, key: tuple, query: Select) -> list:
+        """
+        Runs the read query and returns its rows as mappings.
+
+        Identical concurrent reads (same key) of the same database share one
+        execution through read_flights, the rows must not be modified.
+        """
+        async def run() -> list:
+            return (await self.session.execute(query)).mappings().all()
+
+        return await read_flights.do(name, (self.session.bind, self.owner_id, *key), run)
 
     @staticmethod
-    def get_password_hash(password: str) -> str:
-        """Generate a hashed password."""
-        return pwd_context.hash(password)
+    def search_query(owner_id: str, service_name: str) -> Select:
+        """
+        Builds the substring search query by service name within the owner.
+
+        Only VERSION_COLUMNS and READ_COLUMNS are selected, rows are returned as mappings.
+
+        The pattern is passed as one bound value ('%part%') with escaped
+        wildcards, so the planner can use the ix_password_owner_id_service_name_trgm
+        index of the owner's partition for both conditions. Parts shorter than 3
+        characters have no trigrams, so the index can't narrow them down
+        and such searches still scan the whole partition.
+        """
+        pattern = (service_name.replace("/", "//")
+                   .replace("%", "/%").replace("_", "/_"))
+        return select(*VERSION_COLUMNS, *READ_COLUMNS).where(
+            Password.owner_id == owner_id,
+            Password.service_name.like(f"%{pattern}%", escape="/"))
 
-    async def get_password(self, service_name: str) -> Password:
+    async def get_password(self, service_name: str) -> dict:
         """
         Retrieves a specific password by its service name.
 
+        Only the columns of the response and VERSION_COLUMNS are selected,
+        without building a Password entity. Found passwords are kept in the
+        password cache encrypted, as stored, missing ones are not. A row is
+        not cached if the service was written while it was read, or if it was
+        read from a replica (fill_cache). With read_cache off, the cache is not
+        looked up. Concurrent misses of the same service share one query.
+
         Args:
             service_name (str): The name of the service to retrieve.
 
         Returns:
-            Password: The password associated with the given service.
+            dict: The id, version, service name and password of the given service.
 
         Raises:
             HTTPException: If the passwords is not found.
         """
-        query = select(Password).where(Password.service_name == service_name)
+        cache_key = self._cache_key(service_name)
+        existing_password = await password_cache.get(cache_key) if self.read_cache else None
+        if existing_password is None:
+            generation = await password_cache.generation(cache_key)
+            query = select(*VERSION_COLUMNS, *READ_COLUMNS).where(
+                Password.owner_id == self.owner_id,
+                Password.service_name == service_name)
+            existing_password = await self._read_shared("get", (service_name,), query)
+            is_password_data_empty(existing_password)
+            existing_password = dict(existing_password[0])
+            if self.fill_cache:
+                await password_cache.set(cache_key, existing_password, generation)
+        return {**existing_password,
+                "password": password_cipher.decrypt(existing_password["password"],
+                                                    self.owner_id, service_name)}
+
+    async def get_password_version(self, service_name: str) -> Optional[dict]:
+        """
+        Retrieves the id and the version of the password of the service.
+
+        Used to answer conditional requests, the cached entry is used when
+        present (and read_cache is on), otherwise only VERSION_COLUMNS are read.
+
+        Args:
+            service_name (str): The name of the service.
+
+        Returns:
+            Optional[dict]: The id and the version, None if the password is not found.
+        """
+        if self.read_cache:
+            cached = await password_cache.get(self._cache_key(service_name))
+            if cached is not None:
+                return cached
+        query = select(*VERSION_COLUMNS).where(Password.owner_id == self.owner_id,
+                                               Password.service_name == service_name)
+        existing_password = (await self.session.execute(query)).mappings().first()
+        return dict(existing_password) if existing_password else None
+
+    async def batch_get_passwords(self, service_names: List[str]) -> dict:
+        """
+        Retrieves the passwords of many services with one query.
+
+        The names are passed as one array parameter (service_name = ANY($1)),
+        so the statement is the same for any number of names and stays in
+        the prepared statement cache. Duplicate names are looked up once.
+
+        Args:
+            service_names (List[str]): The names of the services to retrieve.
+
+        Returns:
+            dict: The found passwords in the order of the request ("items")
+            and the names that were not found ("missing").
+        """
+        service_names = list(dict.fromkeys(service_names))
+        query = select(*READ_COLUMNS).where(
+            Password.owner_id == self.owner_id,
+            Password.service_name == any_(
+                bindparam("service_names", service_names, type_=ARRAY(String))))
         existing_password = await self.session.execute(query)
-        existing_password = existing_password.scalars().first()
-        is_password_data_empty(existing_password)
-        return existing_password
+        existing_password = await password_cipher.decrypt_rows(
+            existing_password.mappings().all(), self.owner_id)
+        found = {row["service_name"]: row for row in existing_password}
+        return {
+            "items": [found[name] for name in service_names if name in found],
+            "missing": [name for name in service_names if name not in found],
+        }
+
+    async def search_password(self,
+                              service_name: str,
+                              limit: int,
+                              cursor: Optional[str] = None) -> dict:
+        """
+        Retrieves one page of passwords by part of the service name, decrypted.
+
+        Args:
+            service_name (str): The part of name of the service to retrieve.
+            limit (int): The maximum number of passwords on the page.
+            cursor (Optional[str]): The cursor of the page, None for the first page.
 
-    async def search_password(self, service_name: str) -> List[Password]:
+        Returns:
+            dict: The page of search_page with decrypted passwords.
         """
-        Retrieves a specific password by its service name.
+        return await self.decrypt_page(
+            await self.search_page(service_name, limit, cursor))
+
+    async def decrypt_page(self, page: dict) -> dict:
+        """
+        Decrypts the passwords of a page of search_page in one batch.
+        """
+        return {**page, "items": await password_cipher.decrypt_rows(page["items"],
+                                                                     self.owner_id)}
+
+    async def search_page(self,
+                          service_name: str,
+                          limit: int,
+                          cursor: Optional[str] = None) -> dict:
+        """
+        Retrieves one page of passwords by part of the service name, still encrypted.
+
+        Uses keyset pagination over (service_name, id): the page starts right
+        after the row encoded in the cursor, so every page is read through
+        the index in the same time, unlike OFFSET. Concurrent identical
+        searches share one query.
 
         Args:
             service_name (str): The part of name of the service to retrieve.
+            limit (int): The maximum number of passwords on the page.
+            cursor (Optional[str]): The cursor of the page, None for the first page.
 
         Returns:
-            Password: The password associated with the given service.
+            dict: The rows of the page as mappings ("items") and the cursor of the next page ("next_cursor").
 
         Raises:
-            HTTPException: If the password is not found.
+            HTTPException: If the cursor is invalid or nothing is found on the first page.
         """
-        query = select(Password).where(Password.service_name.contains(service_name))
-        existing_password = await self.session.execute(query)
-        existing_password = existing_password.scalars().all()
-        is_password_data_empty(existing_password)
-        return existing_password
-
-    async def create_password(self, password: PasswordCreate) -> Password:
+        query = PasswordManager.search_query(self.owner_id, service_name).order_by(
+            Password.service_name, Password.id).limit(limit + 1)
+        if cursor is not None:
+            last_name, last_id = decode_cursor(cursor)
+            # the first condition lets the planner start from the btree index
+            query = query.where(
+                Password.service_name >= last_name,
+                tuple_(Password.service_name, Password.id) > tuple_(last_name, last_id))
+        existing_password = await self._read_shared(
+            "search", (service_name, limit, cursor), query)
+        if cursor is None:
+            is_password_data_empty(existing_password)
+
+        next_cursor = None
+        if len(existing_password) > limit:
+            existing_password = existing_password[:limit]
+            last = existing_password[-1]
+            next_cursor = encode_cursor(last["service_name"], last["id"])
+        return {"items": existing_password, "next_cursor": next_cursor}
+
+    async def create_password(self, password: PasswordCreate) -> dict:
         """
         Creates a new password for the service.
 
+        A service name already in the autocomplete index is rejected before
+        hashing. The row is written with one INSERT ... ON CONFLICT DO NOTHING
+        RETURNING, so a name created meanwhile by another worker is rejected
+        by the database without an IntegrityError. With CREATE_BATCH_WINDOW_MS,
+        the rows of concurrent creates are written together by create_batcher.
+
         Args:
             password (PasswordCreate): The password data to create.
 
         Returns:
-            Password: The newly created password.
+            dict: The id, version, service name and password of the new password.
+
+        Raises:
+            HTTPException: If the service name already exists or the hashing queue is full.
+        """
+        if (self.owner_id, password.service_name) in service_name_index:
+            raise_service_name_exists()
+        values = await _password_values(self.owner_id, password)
+        if create_batcher.enabled:
+            new_password = await create_batcher.submit(values, key=self.session_maker)
+        else:
+            query = insert(Password).values(**values).on_conflict_do_nothing(
+                index_elements=[Password.owner_id, Password.service_name]
+            ).returning(*VERSION_COLUMNS)
+            new_password = (await self.session.execute(query)).mappings().first()
+            await self.session.commit()
+        if new_password is None:
+            service_name_index.add(self.owner_id, password.service_name)
+            raise_service_name_exists()
+        await password_cache.delete(self._cache_key(password.service_name))
+        service_name_index.add(self.owner_id, password.service_name)
+        return {**new_password, **password.model_dump()}
+
+    async def upsert_password(self, password: PasswordCreate) -> dict:
+        """
+        Creates the password of the service or replaces the existing one.
+
+        One INSERT ... ON CONFLICT (service_name) DO UPDATE RETURNING, the
+        version of a replaced password is incremented.
+
+        Args:
+            password (PasswordCreate): The password data to write.
+
+        Returns:
+            dict: The id, version, service name and password, version 1 if the password was created.
 
         Raises:
-            HTTPException: If the data invalid.
-        """
-        new_password = Password(
-            service_name=password.service_name,
-            password=password.password,
-            hashed_password=PasswordManager.get_password_hash(password.password),
-        )
-        self.session.add(new_password)
+            HTTPException: If the hashing queue is full.
+        """
+        query = insert(Password).values(**await _password_values(self.owner_id, password))
+        query = query.on_conflict_do_update(
+            index_elements=[Password.owner_id, Password.service_name],
+            set_={
+                "password": query.excluded.password,
+                "hashed_password": query.excluded.hashed_password,
+                "version": Password.version + 1,
+                "updated_at": func.now(),
+            }).returning(*VERSION_COLUMNS)
+        new_password = (await self.session.execute(query)).mappings().one()
         await self.session.commit()
-        await self.session.refresh(new_password)
-        return password
+        await password_cache.delete(self._cache_key(password.service_name))
+        service_name_index.add(self.owner_id, password.service_name)
+        return {**new_password, **password.model_dump()}
 
+    async def export_passwords(self, export_format: str) -> AsyncIterator[bytes]:
+        """
+        Streams all passwords of the owner as NDJSON or CSV.
+
+        The rows are read in the order of the primary key (owner_id, id) from a server-side cursor in partitions of
+        EXPORT_FETCH_SIZE rows, every partition is decrypted and encoded
+        into one chunk.
+        The generator opens its own session, because it is consumed after
+        the request handler has returned.
+
+        Args:
+            export_format (str): "ndjson" or "csv".
+
+        Yields:
+            bytes: Encoded chunks of the export.
+        """
+        query = select(*READ_COLUMNS).where(
+            Password.owner_id == self.owner_id).order_by(
+                Password.id).execution_options(yield_per=settings.EXPORT_FETCH_SIZE)
+        if export_format == "csv":
+            yield encode_csv([("service_name", "password")])
+        async with self.session_maker() as session:
+            result = await session.stream(query)
+            async for rows in result.mappings().partitions():
+                rows = await password_cipher.decrypt_rows(rows, self.owner_id)
+                if export_format == "csv":
+                    yield encode_csv((row["service_name"], row["password"])
+                                     for row in rows)
+                else:
+                    yield encode_ndjson(rows)
+
+    async def bulk_create_passwords(
+            self, rows: AsyncIterator[Tuple[int, object]]) -> BulkImportReport:
+        """
+        Creates passwords from a stream of rows.
 
-async def get_password_manager(session: AsyncSession = Depends(get_async_session)):
+        Rows are validated with PasswordCreate, hashed in parallel and written
+        in batches of BULK_BATCH_SIZE rows, one INSERT and one commit per batch.
+        Invalid rows and already existing service names are reported and skipped.
+        When the hashing queue stays full after BULK_HASH_RETRIES retries, the
+        import stops and the report of the already committed batches is returned
+        with the reason in its detail.
+
+        Args:
+            rows (AsyncIterator[Tuple[int, object]]): Line numbers and parsed rows.
+
+        Returns:
+            BulkImportReport: The number of inserted rows and the rejected rows.
+        """
+        report = BulkImportReport()
+        batch: List[Tuple[int, PasswordCreate]] = []
+        async for line, row in rows:
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                batch.append((line, PasswordCreate.model_validate(row)))
+            except ValidationError as e:
+                _report_error(report, line, "; ".join(
+                    f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                    for error in e.errors()))
+                continue
+            except ValueError as e:
+                _report_error(report, line, str(e))
+                continue
+            if len(batch) >= settings.BULK_BATCH_SIZE:
+                if not await self._insert_batch(batch, report):
+                    return report
+                batch = []
+        if batch:
+            await self._insert_batch(batch, report)
+        return report
+
+    async def _insert_batch(self, batch: List[Tuple[int, PasswordCreate]],
+                            report: BulkImportReport) -> bool:
+        names = [password.service_name for _, password in batch]
+        query = select(Password.service_name).where(
+            Password.owner_id == self.owner_id,
+            Password.service_name.in_(names))
+        existing = set((await self.session.execute(query)).scalars().all())
+
+        accepted = []
+        for line, password in batch:
+            if password.service_name in existing:
+                _report_error(report, line, "Service name already exists")
+                continue
+            existing.add(password.service_name)
+            accepted.append((line, password))
+        if not accepted:
+            return True
+
+        hashes = await _hash_with_retry(
+            [password.password for _, password in accepted])
+        if hashes is None:
+            for line, _ in accepted:
+                _report_error(report, line, "Hashing queue is full")
+            report.detail = "Import stopped, the hashing queue is full"
+            return False
+        query = insert(Password).values([
+            {
+                "owner_id": self.owner_id,
+                "service_name": password.service_name,
+                "password": password_cipher.encrypt(password.password, self.owner_id,
+                                                    password.service_name),
+                "hashed_password": hashed,
+            } for (_, password), hashed in zip(accepted, hashes)
+        ]).on_conflict_do_nothing(
+            index_elements=[Password.owner_id, Password.service_name]
+        ).returning(Password.service_name)
+        inserted = set((await self.session.execute(query)).scalars().all())
+        await self.session.commit()
+        for service_name in inserted:
+            service_name_index.add(self.owner_id, service_name)
+
+        report.inserted += len(inserted)
+        for line, password in accepted:
+            if password.service_name not in inserted:
+                _report_error(report, line, "Service name already exists")
+        return True
+
+
+async def _insert_created(session_maker: async_sessionmaker[AsyncSession],
+                          rows: List[dict]) -> List[Optional[dict]]:
+    """
+    Writes a batch of created passwords in one INSERT ... ON CONFLICT DO NOTHING
+    and one commit.
+
+    Of the rows with the same owner and service name, only the first one is written.
+
+    Returns:
+        List[Optional[dict]]: The id and version of every row, None if its service name exists.
+    """
+    unique = {}
+    for row in rows:
+        unique.setdefault((row["owner_id"], row["service_name"]), row)
+    query = insert(Password).values(list(unique.values())).on_conflict_do_nothing(
+        index_elements=[Password.owner_id, Password.service_name]
+    ).returning(Password.owner_id, Password.service_name, *VERSION_COLUMNS)
+    async with session_maker() as session:
+        inserted = {(row.owner_id, row.service_name): {"id": row.id, "version": row.version}
+                    for row in (await session.execute(query)).all()}
+        await session.commit()
+    return [inserted.pop((row["owner_id"], row["service_name"]), None) for row in rows]
+
+
+create_batcher = GroupCommitBatcher("password_create", _insert_created,
+                                    window=settings.CREATE_BATCH_WINDOW_MS / 1000,
+                                    max_size=settings.CREATE_BATCH_MAX_SIZE)
+
+
+async def get_password_manager(
+        request: Request,
+        session: AsyncSession = Depends(get_async_session),
+        session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker),
+        owner_id: str = Depends(get_owner_id)):
     """
-    Dependency to retrieve a PasswordManager instance.
+    Dependency to retrieve a PasswordManager instance on the primary.
+
+    The client is recorded as a writer, so its reads go to the primary
+    for READ_YOUR_WRITES_SECONDS after the request.
 
     Args:
+        request (Request): The request, identifies the client.
         session (AsyncSession): The SQLAlchemy session for database operations.
+        session_maker (async_sessionmaker): The factory of sessions for streaming operations.
+        owner_id (str): The owner of the request.
+
+    Returns:
+        PasswordManager: An instance of PasswordManager for the owner.
+    """
+    client = client_key(request)
+    replica_router.record_write(client)
+    try:
+        yield PasswordManager(session, session_maker, owner_id)
+    finally:
+        replica_router.record_write(client)
+
+
+async def get_read_password_manager(
+        request: Request,
+        session: AsyncSession = Depends(get_read_session),
+        session_maker: async_sessionmaker[AsyncSession] = Depends(get_read_session_maker),
+        primary_session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker),
+        owner_id: str = Depends(get_owner_id)):
+    """
+    Dependency to retrieve a PasswordManager instance for reads.
+
+    The session is of a read replica when one is healthy and the client
+    has not written recently, of the primary otherwise. Only rows read from
+    the primary are cached, and a client in its read-your-writes window
+    doesn't get answers from the cache, which can be filled by other workers.
+
+    Args:
+        request (Request): The request, identifies the client.
+        session (AsyncSession): The SQLAlchemy session for the reads.
+        session_maker (async_sessionmaker): The factory of sessions of the same database.
+        primary_session_maker (async_sessionmaker): The factory of sessions of the primary.
+        owner_id (str): The owner of the request.
 
     Returns:
-        PasswordManager: An instance of PasswordManager for the user.
+        PasswordManager: An instance of PasswordManager for the owner.
     """
-    yield PasswordManager(session)
+    yield PasswordManager(session, session_maker, owner_id,
+                          read_cache=not replica_router.wrote_recently(client_key(request)),
+                          fill_cache=session_maker is primary_session_maker)
+
+
+async def load_service_name_index(
+        session_maker: async_sessionmaker[AsyncSession]) -> int:
+    """
+    Reloads the autocomplete index with the service names of all owners.
+
+    Args:
+        session_maker (async_sessionmaker): The factory of database sessions.
+
+    Returns:
+        int: The number of service names in the index.
+    """
+    service_name_index.begin_load()
+    async with session_maker() as session:
+        names = (await session.execute(
+            select(Password.owner_id, Password.service_name))).all()
+    service_name_index.load(names)
+    return len(service_name_index)
 
 
 def is_password_data_empty(data):
@@ -134,3 +581,51 @@ def is_password_data_empty(data):
     """
     if not data:
         raise HTTPException(status_code=404, detail="Password(s) not found")
+
+
+def raise_service_name_exists():
+    """
+    Raises:
+        HTTPException: With status code 409 and detail "Service name already exists".
+    """
+    raise HTTPException(status_code=409, detail="Service name already exists")
+
+
+async def _password_values(owner_id: str, password: PasswordCreate) -> dict:
+    """
+    Hashes and encrypts the password of the owner into the values of a row.
+    """
+    with password_hash_duration.time():
+        hashed_password = await hashing_service.hash(password.password)
+    return {
+        "owner_id": owner_id,
+        "service_name": password.service_name,
+        "password": password_cipher.encrypt(password.password, owner_id,
+                                            password.service_name),
+        "hashed_password": hashed_password,
+    }
+
+
+async def _hash_with_retry(passwords: List[str]) -> Optional[List[str]]:
+    """
+    Hashes the passwords, waiting for the hashing queue while it is full.
+
+    Returns:
+        Optional[List[str]]: The hashes, None if the queue is still full after
+        BULK_HASH_RETRIES retries.
+    """
+    for attempt in range(settings.BULK_HASH_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(1)
+        try:
+            return await hashing_service.hash_many(passwords)
+        except HTTPException as e:
+            if e.status_code != 503:
+                raise
+    return None
+
+
+def _report_error(report: BulkImportReport, line: int, detail: str) -> None:
+    report.failed += 1
+    if len(report.errors) < settings.BULK_MAX_ERRORS:
+        report.errors.append(BulkImportError(line=line, detail=detail))
@@ -1,8 +1,10 @@
 """
-Packages models contains 2 modules:
+Packages models contains 3 modules:
     base.py - defining a base class of data models
     password.py - defining a Password class for database modeling
+    audit.py - defining an AuditEvent class of the append-only audit log
 """
 
+from .audit import AuditEvent
 from .base import Base
 from .password import Password
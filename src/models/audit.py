@@ -0,0 +1,70 @@
+"""
+This module defines the AuditEvent db models class
+
+The audit_log table is append-only, a trigger rejects UPDATE and DELETE
+of its rows.
+
+Classes:
+    AuditEvent: AuditEvent db model class
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import (DDL, BigInteger, DateTime, Index, String, event)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base
+
+APPEND_ONLY_FUNCTION = """
+CREATE OR REPLACE FUNCTION audit_log_append_only() RETURNS trigger AS $$
+BEGIN
+    RAISE EXCEPTION 'audit_log is append-only';
+END;
+$$ LANGUAGE plpgsql
+"""
+APPEND_ONLY_TRIGGER = """
+CREATE TRIGGER audit_log_append_only BEFORE UPDATE OR DELETE ON audit_log
+FOR EACH ROW EXECUTE FUNCTION audit_log_append_only()
+"""
+
+
+class AuditEvent(Base):
+    """
+    Represents an access to passwords in the audit log.
+
+    Attributes:
+        id (int): The unique identifier for the event, auto-incremented.
+        created_at (datetime): The time of the access (not of the write to the log).
+        owner_id (str): The owner (team) of the passwords.
+        client (str): The client of the request (see src.services.admission.client_key).
+        action (str): The kind of access, e.g. "read", "create", "export".
+        service_name (Optional[str]): The service of the password, None for access to many.
+        detail (Optional[str]): Additional data, e.g. the number of imported passwords.
+
+    Indexes:
+        ix_audit_log_owner_id_created_at: the trail of one owner by time.
+    """
+    __tablename__ = "audit_log"
+    __table_args__ = (
+        Index("ix_audit_log_owner_id_created_at", "owner_id", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger,
+                                    primary_key=True,
+                                    autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True),
+                                                 nullable=False)
+    owner_id: Mapped[str] = mapped_column(String(64),
+                                          nullable=False)
+    client: Mapped[str] = mapped_column(String(255),
+                                        nullable=False)
+    action: Mapped[str] = mapped_column(String(32),
+                                        nullable=False)
+    service_name: Mapped[Optional[str]] = mapped_column(String(30),
+                                                        nullable=True)
+    detail: Mapped[Optional[str]] = mapped_column(String(255),
+                                                  nullable=True)
+
+
+event.listen(AuditEvent.__table__, "after_create", DDL(APPEND_ONLY_FUNCTION))
+event.listen(AuditEvent.__table__, "after_create", DDL(APPEND_ONLY_TRIGGER))
@@ -1,34 +1,66 @@
 """
 This module defines the Password db models class
 
+The password table is partitioned by hash of owner_id into OWNER_PARTITIONS
+partitions, a query scoped to one owner reads only its partition and the
+indexes of that partition.
+
 Classes:
     Password: Password db model class
 """
-from sqlalchemy import Integer, String
+from datetime import datetime
+
+from sqlalchemy import (DDL, DateTime, Index, Integer, PrimaryKeyConstraint,
+                        String, UniqueConstraint, event, func)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.models.base import Base
 
+# number of hash partitions, changing it requires moving the rows to a new table
+OWNER_PARTITIONS = 16
+
 
 class Password(Base):
     """
     Represents a password in the database.
 
     Attributes:
+        owner_id (str): The owner (team) of the password, the partition key.
         id (int): The unique identifier for the password, auto-incremented.
-        service (str): The title of the password.
-        password (str): A detailed description of the password.
+        service (str): The title of the password, unique within the owner.
+        password (str): The password encrypted with AES-GCM (see src.services.encryption).
+        version (int): The version of the row, incremented when the password changes.
+        updated_at (datetime): The time of the last change of the row.
+
+    Indexes (every partition has its own copy):
+        primary key (owner_id, id): walks of one owner's rows by id.
+        uq_password_owner_id_service_name: unique btree index for lookups and
+            ordering by service name within the owner.
+        ix_password_owner_id_service_name_trgm: GIN index of the owner and the
+            trigrams of the service name for substring search (LIKE '%...%')
+            within the owner, requires the pg_trgm and btree_gin extensions.
+            Only parts of at least 3 characters can be narrowed down by trigrams.
     """
     __tablename__ = "password"
+    __table_args__ = (
+        PrimaryKeyConstraint("owner_id", "id"),
+        UniqueConstraint("owner_id", "service_name",
+                         name="uq_password_owner_id_service_name"),
+        Index("ix_password_owner_id_service_name_trgm",
+              "owner_id",
+              "service_name",
+              postgresql_using="gin",
+              postgresql_ops={"service_name": "gin_trgm_ops"}),
+        {"postgresql_partition_by": "HASH (owner_id)"},
+    )
 
+    owner_id: Mapped[str] = mapped_column(String(64),
+                                          nullable=False)
     id: Mapped[int] = mapped_column(Integer,
-                                    primary_key=True,
                                     autoincrement=True)
     service_name: Mapped[str] = mapped_column(String(30),
-                                              index=True,
-                                              nullable=False,
-                                              unique=True)
-    password: Mapped[str] = mapped_column(String(50),
+                                              nullable=False)
+    password: Mapped[str] = mapped_column(String(512),
                                                  index=False,
                                                  nullable=False,
                                                  unique=False)
@@ -36,3 +68,21 @@ class Password(Base):
                                                  index=False,
                                                  nullable=False,
                                                  unique=False)
+    version: Mapped[int] = mapped_column(Integer,
+                                         nullable=False,
+                                         default=1,
+                                         server_default="1")
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True),
+                                                 nullable=False,
+                                                 server_default=func.now(),
+                                                 onupdate=func.now())
+
+
+event.listen(Password.__table__, "before_create",
+             DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+event.listen(Password.__table__, "before_create",
+             DDL("CREATE EXTENSION IF NOT EXISTS btree_gin"))
+for remainder in range(OWNER_PARTITIONS):
+    event.listen(Password.__table__, "after_create", DDL(
+        f"CREATE TABLE password_p{remainder} PARTITION OF password "
+        f"FOR VALUES WITH (MODULUS {OWNER_PARTITIONS}, REMAINDER {remainder})"))
@@ -1,4 +1,7 @@
 """
-Packages routers contains 1 module:
+Packages routers contains 4 modules:
     password.py - creating API to create and read password
+    internal.py - service endpoints for operators
+    responses.py - fast serialization path of the password responses
+    metrics.py - metrics endpoint for Prometheus
 """
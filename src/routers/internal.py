@@ -0,0 +1,129 @@
+"""
+This module defines the internal router with service endpoints for operators.
+
+The endpoints are not a part of the public API and are hidden from the schema.
+They are admitted only from INTERNAL_ALLOWED_NETWORKS or with INTERNAL_TOKEN
+(see require_internal) and are not mounted with INTERNAL_ENABLED=false.
+
+Endpoints:
+    - GET /cache: Returns the counters of the password cache.
+    - GET /pool: Returns the state of the database connection pool.
+    - POST /autocomplete: Reloads the autocomplete index of this worker.
+    - GET /replicas: Returns the health and the lag of the read replicas.
+    - GET /ready: Readiness check, 503 until the startup is finished or without the database.
+"""
+import asyncio
+import os
+
+from fastapi import Depends, Request
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRouter
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config.dependencies import (get_session_maker, replica_router,
+                                     require_internal)
+from src.managers.password import load_service_name_index
+from src.services.autocomplete import service_name_index
+from src.services.cache import password_cache
+
+internalroute = APIRouter(dependencies=[Depends(require_internal)])
+
+
+@internalroute.get("/cache")
+async def get_cache_stats():
+    """
+    Returns the counters of the password cache.
+
+    Returns:
+        dict: Backend, hits, misses and hit ratio (and size for the in-process cache).
+    """
+    return password_cache.stats()
+
+
+@internalroute.get("/pool")
+async def get_pool_stats(
+        session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker)):
+    """
+    Returns the state of the database connection pool of this worker.
+
+    Every uvicorn worker has its own pool, the pid tells which one answered.
+
+    Args:
+        session_maker (async_sessionmaker): The factory of sessions bound to the engine.
+
+    Returns:
+        dict: Pool size, checked out, idle and overflow connections, checkout counters and wait times.
+    """
+    pool = session_maker.kw["bind"].pool
+    stats = pool.snapshot() if hasattr(pool, "snapshot") else {"status": pool.status()}
+    return {"pid": os.getpid(), **stats}
+
+
+@internalroute.post("/autocomplete")
+async def reload_autocomplete(
+        session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker)):
+    """
+    Reloads the autocomplete index of this worker from the database.
+
+    Args:
+        session_maker (async_sessionmaker): The factory of database sessions.
+
+    Returns:
+        dict: The pid of the worker, the number of names and the time of the load.
+    """
+    size = await load_service_name_index(session_maker)
+    return {"pid": os.getpid(), "size": size,
+            "loaded_at": service_name_index.loaded_at}
+
+
+@internalroute.get("/replicas")
+async def get_replicas():
+    """
+    Returns the state of the read replicas as seen by this worker.
+
+    Returns:
+        dict: The pid of the worker and health, lag and last check of every replica.
+    """
+    return {"pid": os.getpid(), "replicas": replica_router.snapshot()}
+
+
+async def select_one(session_maker: async_sessionmaker[AsyncSession]) -> None:
+    async with session_maker() as session:
+        await session.execute(text("SELECT 1"))
+
+
+@internalroute.get("/ready")
+async def get_readiness(
+        request: Request,
+        session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker)):
+    """
+    Returns whether the worker is ready to serve requests.
+
+    The worker is ready when its startup (warm-up) is finished and the
+    primary database answers within READINESS_TIMEOUT.
+
+    Args:
+        request (Request): The request, gives access to the application state.
+        session_maker (async_sessionmaker): The factory of sessions of the primary.
+
+    Returns:
+        JSONResponse: 200 if ready, 503 otherwise, with the checks, the durations
+        of the startup phases and the errors of the failed phases.
+    """
+    state = request.app.state
+    checks = {"startup": state.started}
+    try:
+        await asyncio.wait_for(select_one(session_maker), state.settings.READINESS_TIMEOUT)
+        checks["database"] = True
+    except Exception:
+        checks["database"] = False
+    checks["replicas"] = sum(replica.healthy for replica in replica_router.replicas)
+    ready = checks["startup"] and checks["database"]
+    return JSONResponse(status_code=200 if ready else 503, content={
+        "pid": os.getpid(),
+        "ready": ready,
+        "checks": checks,
+        "startup": state.startup,
+        "startup_errors": state.startup_errors,
+    })
@@ -0,0 +1,24 @@
+"""
+This module defines the metrics router.
+
+Endpoints:
+    - GET /metrics: Returns the metrics of this worker in the Prometheus text format.
+"""
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRouter
+
+from src.services.metrics import registry
+
+metricsroute = APIRouter()
+
+
+@metricsroute.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Returns the metrics of this worker in the Prometheus text format.
+
+    Returns:
+        PlainTextResponse: Route latency, in-flight requests, query timing, hashing and cache metrics.
+    """
+    return PlainTextResponse(registry.render(),
+                             media_type="text/plain; version=0.0.4")
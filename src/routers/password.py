@@ -2,31 +2,127 @@
 This module defines the password router, which handles all password-related API endpoints.
 
 The router provides Create, Read, Search operations for password.
+Every route passes the admission control (admit_read or admit_write) and
+works with the passwords of the owner from the X-Owner-Id header.
+The reads (GET and POST /batch-get) may be served by a read replica.
+Every returned or written password is recorded in the audit log (see src.services.audit).
 
 Endpoints:
-    - GET /?service_name={service_name}: Search all password for the services name.
+    - GET /export/{format}: Streams all passwords as NDJSON or CSV.
+    - GET /autocomplete/{prefix}?limit={limit}: Service names starting with the prefix.
+    - GET /?service_name={service_name}&limit={limit}&cursor={cursor}: Search password for the services name page by page.
     - GET /{service_name}: Retrieves a specific password by its services.
     - POST /: Creates a new password.
+    - PUT /{service_name}: Creates or replaces the password of a service.
+    - POST /batch-get: Retrieves the passwords of many services at once.
+    - POST /bulk: Creates passwords from an NDJSON or CSV body.
 """
-from typing import List
-from fastapi import Depends, Query
+from typing import List, Literal, Optional
+from fastapi import (Depends, Header, HTTPException, Path, Query, Request,
+                     Response)
+from fastapi.responses import StreamingResponse
 from fastapi.routing import APIRouter
 
-from src.managers.password import PasswordManager, get_password_manager
-from src.schemas.password import PasswordCreate, PasswordRead
+from src.config.dependencies import get_owner_id
+from src.config.settings import settings
+from src.managers.password import (PasswordManager, get_password_manager,
+                                   get_read_password_manager)
+from src.schemas.password import (BatchGetRequest, BatchGetResponse,
+                                  BulkImportReport, PasswordCreate,
+                                  PasswordPage, PasswordRead, PasswordUpdate)
+from src.routers.responses import (batch_content, fast_response, not_modified,
+                                   page_content, password_content)
+from src.services.admission import admit_read, admit_write
+from src.services.audit import audit_access
+from src.services.autocomplete import service_name_index
+from src.services.etag import etag_matches, page_etag, row_etag
+from src.services.formats import iter_csv, iter_ndjson
 
 passwordroute = APIRouter()
 
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
 
-@passwordroute.get("/{service_name}", response_model=PasswordCreate)
+
+@passwordroute.get(
+    "/export/{export_format}",
+    dependencies=[Depends(admit_read)],
+    response_class=StreamingResponse,
+    responses={200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}}})
+async def export_password(
+    request: Request,
+    export_format: Literal["ndjson", "csv"],
+    password_manager: PasswordManager = Depends(get_read_password_manager)):
+    """
+    Streams all passwords.
+
+    The path has two segments, so it never shadows GET /{service_name}
+    (a service can be named "export").
+
+    Args:
+        request (Request): The request, identifies the client in the audit log.
+        export_format (str): "ndjson" or "csv".
+        password_manager (PasswordManager, optional): The password manager dependency to handle password operations.
+
+    Returns:
+        StreamingResponse: The passwords in the requested format.
+    """
+    audit_access(request, password_manager.owner_id, "export", detail=export_format)
+    return StreamingResponse(
+        password_manager.export_passwords(export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="passwords.{export_format}"'})
+
+
+@passwordroute.get("/autocomplete/{prefix}",
+                   response_model=List[str],
+                   dependencies=[Depends(admit_read)])
+async def autocomplete_service_name(
+        request: Request,
+        prefix: str,
+        limit: int = Query(
+            settings.AUTOCOMPLETE_DEFAULT_LIMIT, ge=1, le=settings.AUTOCOMPLETE_MAX_LIMIT,
+            description="Maximum number of service names"),
+        owner_id: str = Depends(get_owner_id)):
+    """
+    Returns the service names of the owner starting with the prefix.
+
+    The names come from the in-memory index of this worker, the database
+    is not queried. Names created by other workers appear after the next
+    reload of the index.
+
+    Args:
+        request (Request): The request, gives the settings of the app.
+        prefix (str): The beginning of the service name.
+        limit (int): The maximum number of service names.
+        owner_id (str): The owner of the request.
+
+    Returns:
+        List[str]: The service names in sorted order.
+    """
+    return fast_response(request, service_name_index.complete(owner_id, prefix, limit))
+
+
+@passwordroute.get("/{service_name}",
+                   response_model=PasswordCreate,
+                   dependencies=[Depends(admit_read)],
+                   responses={304: {"description": "Not Modified"}})
 async def get_password(
     service_name: str,
-    password_manager: PasswordManager = Depends(get_password_manager)):
+    request: Request,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    password_manager: PasswordManager = Depends(get_read_password_manager)):
     """
     Retrieves a specific password by its service.
 
+    The response has a strong ETag. If it matches If-None-Match, 304 is
+    returned after reading only the id and the version of the row.
+
     Args:
         service_name (str): The service name of the password to retrieve.
+        request (Request): The request, identifies the client in the audit log.
+        response (Response): The response the ETag header is set on.
+        if_none_match (Optional[str]): The ETags the client already has.
         password_manager (PasswordManager, optional): The password manager dependency to handle password operations.
 
     Returns:
@@ -35,47 +131,207 @@ async def get_password(
     Raises:
         HTTPException: If the password with the specified service does not exist.
     """
+    if if_none_match:
+        version = await password_manager.get_password_version(service_name)
+        if version is not None and etag_matches(if_none_match, row_etag(version)):
+            return not_modified(row_etag(version))
 
-    return await password_manager.get_password(service_name)
+    password = await password_manager.get_password(service_name)
+    audit_access(request, password_manager.owner_id, "read", [service_name])
+    headers = {"ETag": row_etag(password)}
+    response.headers.update(headers)
+    return fast_response(request, password, password_content, headers=headers)
 
 
-@passwordroute.get("/", response_model=List[PasswordCreate])
+@passwordroute.get("/",
+                   response_model=PasswordPage,
+                   dependencies=[Depends(admit_read)],
+                   responses={304: {"description": "Not Modified"}})
 async def search_password(
+        request: Request,
+        response: Response,
         service_name: str = Query(
             ..., description="Part of service name"),
-        password_manager: PasswordManager = Depends(get_password_manager)):
+        limit: int = Query(
+            settings.SEARCH_DEFAULT_LIMIT, ge=1, le=settings.SEARCH_MAX_LIMIT,
+            description="Maximum number of passwords on the page"),
+        cursor: Optional[str] = Query(
+            None, description="next_cursor of the previous page"),
+        if_none_match: Optional[str] = Header(None),
+        password_manager: PasswordManager = Depends(get_read_password_manager)):
     """
-    Search a specific by part of the service name.
+    Search a specific by part of the service name, one page at a time.
+
+    The page has a strong ETag computed from the ids and versions of its rows.
+    If it matches If-None-Match, 304 is returned and the passwords are
+    neither decrypted nor encoded.
 
     Args:
+        request (Request): The request, identifies the client in the audit log.
+        response (Response): The response the ETag header is set on.
         service_name (str): The service name of the password to retrieve.
+        limit (int): The maximum number of passwords on the page.
+        cursor (Optional[str]): The next_cursor of the previous page.
+        if_none_match (Optional[str]): The ETags the client already has.
         password_manager (PasswordManager, optional): The password manager dependency to handle password operations.
 
     Returns:
-        Password: The Password object representing the requested password.
+        PasswordPage: The passwords of the page and the cursor of the next page.
 
     Raises:
         HTTPException: If the password with the specified service does not exist.
     """
 
-    return await password_manager.search_password(service_name)
+    page = await password_manager.search_page(service_name, limit, cursor)
+    etag = page_etag(page["items"], page["next_cursor"])
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    audit_access(request, password_manager.owner_id, "read",
+                 [row["service_name"] for row in page["items"]], detail=f"search {service_name}")
+    headers = {"ETag": etag}
+    response.headers.update(headers)
+    return fast_response(request, await password_manager.decrypt_page(page),
+                         page_content, headers=headers)
 
 
-@passwordroute.post("/", response_model=PasswordCreate, status_code=201)
+@passwordroute.post("/",
+                    response_model=PasswordCreate,
+                    status_code=201,
+                    dependencies=[Depends(admit_write)])
 async def post_password(
     password: PasswordCreate,
+    request: Request,
+    response: Response,
     password_manager: PasswordManager = Depends(get_password_manager)):
     """
     Creates a new password.
 
     Args:
         password (PasswordCreate): The password data to create a new password.
+        request (Request): The request, identifies the client in the audit log.
+        response (Response): The response the ETag header is set on.
         password_manager (PasswordManager, optional): The password manager dependency to handle password operations.
 
     Returns:
         Password: The created Password object.
     
+    Raises:
+        HTTPException: If the password data invalid or the service name already exists (409).
+    """
+    password = await password_manager.create_password(password)
+    audit_access(request, password_manager.owner_id, "create", [password["service_name"]])
+    headers = {"ETag": row_etag(password)}
+    response.headers.update(headers)
+    return fast_response(request, password, password_content,
+                         status_code=201, headers=headers)
+
+
+@passwordroute.put("/{service_name}",
+                   response_model=PasswordCreate,
+                   dependencies=[Depends(admit_write)],
+                   responses={201: {"model": PasswordCreate}})
+async def put_password(
+    password: PasswordUpdate,
+    request: Request,
+    response: Response,
+    service_name: str = Path(..., min_length=2, max_length=30),
+    password_manager: PasswordManager = Depends(get_password_manager)):
+    """
+    Creates or replaces the password of a service.
+
+    Args:
+        password (PasswordUpdate): The new password.
+        request (Request): The request, identifies the client in the audit log.
+        response (Response): The response the status code and the ETag header are set on.
+        service_name (str): The service name of the password.
+        password_manager (PasswordManager, optional): The password manager dependency to handle password operations.
+
+    Returns:
+        Password: The written Password object, 201 if it was created, 200 if it was replaced.
+
     Raises:
         HTTPException: If the password data invalid.
     """
-    return await password_manager.create_password(password)
+    password = await password_manager.upsert_password(
+        PasswordCreate(service_name=service_name, password=password.password))
+    status_code = 201 if password["version"] == 1 else 200
+    audit_access(request, password_manager.owner_id,
+                 "create" if status_code == 201 else "update", [service_name])
+    headers = {"ETag": row_etag(password)}
+    response.status_code = status_code
+    response.headers.update(headers)
+    return fast_response(request, password, password_content,
+                         status_code=status_code, headers=headers)
+
+
+@passwordroute.post("/batch-get",
+                    response_model=BatchGetResponse,
+                    dependencies=[Depends(admit_read)])
+async def batch_get_password(
+    batch: BatchGetRequest,
+    request: Request,
+    password_manager: PasswordManager = Depends(get_read_password_manager)):
+    """
+    Retrieves the passwords of many services with one query.
+
+    Missing services don't fail the request, they are listed in "missing".
+
+    Args:
+        batch (BatchGetRequest): The service names to retrieve.
+        request (Request): The request, identifies the client in the audit log.
+        password_manager (PasswordManager, optional): The password manager dependency to handle password operations.
+
+    Returns:
+        BatchGetResponse: The found passwords and the missing service names.
+    """
+    passwords = await password_manager.batch_get_passwords(batch.service_names)
+    audit_access(request, password_manager.owner_id, "read",
+                 [row["service_name"] for row in passwords["items"]], detail="batch-get")
+    return fast_response(request, passwords, batch_content)
+
+
+@passwordroute.post(
+    "/bulk",
+    dependencies=[Depends(admit_write)],
+    response_model=BulkImportReport,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    })
+async def bulk_post_password(
+    request: Request,
+    password_manager: PasswordManager = Depends(get_password_manager)):
+    """
+    Creates passwords from an NDJSON or CSV body.
+
+    The body is read as a stream, every line (after the CSV header) is one password
+    with the fields service_name and password.
+
+    Args:
+        request (Request): The request with the NDJSON or CSV body.
+        password_manager (PasswordManager, optional): The password manager dependency to handle password operations.
+
+    Returns:
+        BulkImportReport: The number of created passwords and the rejected rows.
+
+    Raises:
+        HTTPException: If the content type is not supported.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("text/csv"):
+        rows = iter_csv(request.stream(), settings.BULK_MAX_LINE_LENGTH)
+    elif content_type.startswith(("application/x-ndjson", "application/jsonl")):
+        rows = iter_ndjson(request.stream(), settings.BULK_MAX_LINE_LENGTH)
+    else:
+        raise HTTPException(status_code=415,
+                            detail="Expected application/x-ndjson or text/csv body")
+    report = await password_manager.bulk_create_passwords(rows)
+    audit_access(request, password_manager.owner_id, "bulk_create",
+                 detail=f"inserted {report.inserted}")
+    return report
@@ -0,0 +1,79 @@
+"""
+This module defines the fast serialization path of the password responses.
+
+With FAST_JSON enabled, the routes build plain dicts that already have the
+shape of their response_model and return them as ORJSONResponse. FastAPI
+doesn't validate a returned Response, so the second validation through the
+response_model and the jsonable_encoder pass are skipped. The response_model
+stays on the routes, so the OpenAPI schema doesn't change.
+
+Methods:
+    - password_content: builds the PasswordCreate response from a row.
+    - page_content: builds the PasswordPage response from a search page.
+    - batch_content: builds the BatchGetResponse response from a batch lookup.
+    - fast_response: returns the prepared content as ORJSONResponse in the fast mode.
+    - not_modified: returns the 304 response of a matching conditional request.
+"""
+from typing import Any, Mapping, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+
+
+def password_content(row: Mapping) -> dict:
+    """
+    Builds the content of a PasswordCreate response from a row.
+    """
+    return {"service_name": row["service_name"], "password": row["password"]}
+
+
+def page_content(page: Mapping) -> dict:
+    """
+    Builds the content of a PasswordPage response from a search page.
+    """
+    return {
+        "items": [password_content(row) for row in page["items"]],
+        "next_cursor": page["next_cursor"],
+    }
+
+
+def batch_content(batch: Mapping) -> dict:
+    """
+    Builds the content of a BatchGetResponse response from a batch lookup.
+    """
+    return {
+        "items": [password_content(row) for row in batch["items"]],
+        "missing": batch["missing"],
+    }
+
+
+def fast_response(request: Request, content: Any, build=None, status_code: int = 200,
+                  headers: Optional[Mapping[str, str]] = None) -> Any:
+    """
+    Returns the content as ORJSONResponse if FAST_JSON is enabled in the
+    settings of the application of the request.
+
+    Args:
+        request (Request): The request, gives the settings of the app.
+        content (Any): The data returned by the manager.
+        build (Callable, optional): Builds the response content from the data.
+        status_code (int): The status code of the response.
+        headers (Mapping[str, str], optional): Headers of the fast response, in the
+            usual mode the route sets them on its injected Response.
+
+    Returns:
+        Any: ORJSONResponse in the fast mode, the unchanged content otherwise
+        (it is validated and encoded through the response_model as usual).
+    """
+    if not request.app.state.settings.FAST_JSON:
+        return content
+    return ORJSONResponse(build(content) if build else content,
+                          status_code=status_code,
+                          headers=headers)
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Returns the 304 response without a body for the tag.
+    """
+    return Response(status_code=304, headers={"ETag": etag})
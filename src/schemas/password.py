@@ -7,22 +7,30 @@ for password-related data, such as password creation, password reading.
 Classes:
     - PasswordCreate: A model representing the data required to create a new password.
     - PasswordRead: A model representing a password with additional details, inheriting from PasswordCreate.
+    - PasswordUpdate: A model representing the new password of a service.
+    - PasswordPage: A model representing one page of the password search.
+    - BatchGetRequest: A model representing the service names of a batch lookup.
+    - BatchGetResponse: A model representing the result of a batch lookup.
+    - BulkImportError: A model representing a rejected row of a bulk import.
+    - BulkImportReport: A model representing the result of a bulk import.
 """
-from typing import Annotated
+from typing import Annotated, List, Optional
 
 from pydantic import BaseModel, Field
 
+from src.config.settings import settings
+
 
 class PasswordCreate(BaseModel):
     """
     Class PasswordCreate represents the data required to create a new password
 
     Args:
-        service_name (str): The name of the service, must be at least 2 characters long
-        password (str): The password of service, must be at least 8 characters long.
+        service_name (str): The name of the service, must be from 2 to 30 characters long
+        password (str): The password of service, must be from 8 to 50 characters long.
     """
-    service_name: Annotated[str, Field(min_length=2)]
-    password: Annotated[str, Field(min_length=8)]
+    service_name: Annotated[str, Field(min_length=2, max_length=30)]
+    password: Annotated[str, Field(min_length=8, max_length=50)]
 
 
 class PasswordRead(PasswordCreate):
@@ -37,3 +45,76 @@ class PasswordRead(PasswordCreate):
     """
     id: int
     password_hash: str
+
+
+class PasswordUpdate(BaseModel):
+    """
+    Class PasswordUpdate represents the new password of a service
+
+    Args:
+        password (str): The password of service, must be from 8 to 50 characters long.
+    """
+    password: Annotated[str, Field(min_length=8, max_length=50)]
+
+
+class PasswordPage(BaseModel):
+    """
+    Class PasswordPage represents one page of the password search
+
+    Args:
+        items (List[PasswordCreate]): The passwords of the page.
+        next_cursor (Optional[str]): The cursor of the next page, None on the last page.
+    """
+    items: List[PasswordCreate]
+    next_cursor: Optional[str] = None
+
+
+class BatchGetRequest(BaseModel):
+    """
+    Class BatchGetRequest represents the service names of a batch lookup
+
+    Args:
+        service_names (List[str]): The service names, from 1 to BATCH_GET_MAX_NAMES.
+    """
+    service_names: Annotated[List[str], Field(min_length=1,
+                                              max_length=settings.BATCH_GET_MAX_NAMES)]
+
+
+class BatchGetResponse(BaseModel):
+    """
+    Class BatchGetResponse represents the result of a batch lookup
+
+    Args:
+        items (List[PasswordCreate]): The found passwords in the order of the request.
+        missing (List[str]): The service names that were not found.
+    """
+    items: List[PasswordCreate]
+    missing: List[str]
+
+
+class BulkImportError(BaseModel):
+    """
+    Class BulkImportError represents a rejected row of a bulk import
+
+    Args:
+        line (int): The line number of the row in the request body.
+        detail (str): The reason why the row was rejected.
+    """
+    line: int
+    detail: str
+
+
+class BulkImportReport(BaseModel):
+    """
+    Class BulkImportReport represents the result of a bulk import
+
+    Args:
+        inserted (int): The number of inserted passwords.
+        failed (int): The number of rejected rows.
+        errors (List[BulkImportError]): The rejected rows, limited by BULK_MAX_ERRORS.
+        detail (Optional[str]): The reason why the import stopped early, if it did.
+    """
+    inserted: int = 0
+    failed: int = 0
+    errors: List[BulkImportError] = []
+    detail: Optional[str] = None
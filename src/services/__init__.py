@@ -0,0 +1,15 @@
+"""
+Packages services contains 12 modules:
+    hashing.py - asynchronous password hashing in a worker pool
+    formats.py - streaming NDJSON and CSV readers and writers
+    pagination.py - opaque cursors for keyset pagination
+    cache.py - read-through cache of passwords
+    metrics.py - Prometheus-style metrics of routes, queries and hashing
+    encryption.py - AES-GCM encryption of stored passwords
+    autocomplete.py - in-memory prefix index of service names
+    etag.py - strong entity tags of password responses
+    admission.py - per-client rate limits and the hashing cap of the password routes
+    batching.py - group commit of concurrent writes
+    singleflight.py - coalescing of identical concurrent reads
+    audit.py - asynchronous audit log of password access
+"""
@@ -0,0 +1,198 @@
+"""
+This module defines the admission control of the password routes.
+
+Every client has two token buckets: one for reads and one for the
+hash-heavy writes, refilled at ADMISSION_READ_RATE and ADMISSION_WRITE_RATE
+tokens per second up to their burst. A request without a token is rejected
+at once with 429 and the Retry-After of the next token. The writes admitted
+at the same time are also capped globally by ADMISSION_MAX_HASHING, above it
+they are rejected with 503, so a burst of writes can't take all the CPU
+from the reads. Nothing waits in a queue.
+
+The client is identified by the ADMISSION_CLIENT_HEADER header if it is
+configured and present (e.g. an API key set by a gateway), by the peer
+address otherwise. The buckets live in the worker, so with N workers a
+client gets up to N times the configured rates.
+
+Classes:
+    - TokenBucket: tokens refilled at a constant rate.
+    - RateLimiter: token buckets of the clients.
+    - ConcurrencyLimit: non-blocking cap of concurrent operations.
+
+Methods:
+    - admit_read: dependency admitting a read request.
+    - admit_write: dependency admitting a write request for its whole duration.
+"""
+import math
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import HTTPException, Request
+
+from src.config.settings import settings
+from src.services.metrics import registry
+
+
+class TokenBucket:
+    """
+    TokenBucket class with tokens refilled at a constant rate.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        burst (float): Maximum number of tokens.
+        tokens (float): Tokens available now.
+        updated (float): Monotonic time of the last refill.
+    """
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """
+        Takes one token.
+
+        Returns:
+            float: 0 if the token was taken, otherwise seconds until the next token.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    RateLimiter class with one token bucket per client.
+
+    The buckets of the least recently seen clients are dropped above
+    max_clients, a dropped client starts again with a full bucket.
+
+    Attributes:
+        rate (float): Tokens added per second to every bucket.
+        burst (int): Maximum number of tokens of every bucket.
+        max_clients (int): Maximum number of buckets kept.
+    """
+
+    def __init__(self, rate: float, burst: int, max_clients: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def acquire(self, client: str) -> float:
+        """
+        Takes a token of the client.
+
+        Returns:
+            float: 0 if the request is admitted, otherwise seconds until the next token.
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket.take(now)
+
+
+class ConcurrencyLimit:
+    """
+    ConcurrencyLimit class, a semaphore that rejects instead of waiting.
+
+    Attributes:
+        limit (int): Maximum number of concurrent operations.
+        active (int): Operations running now.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+
+    def try_acquire(self) -> bool:
+        if self.active >= self.limit:
+            return False
+        self.active += 1
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+
+
+read_limiter = RateLimiter(settings.ADMISSION_READ_RATE,
+                           settings.ADMISSION_READ_BURST,
+                           settings.ADMISSION_MAX_CLIENTS)
+write_limiter = RateLimiter(settings.ADMISSION_WRITE_RATE,
+                            settings.ADMISSION_WRITE_BURST,
+                            settings.ADMISSION_MAX_CLIENTS)
+hashing_limit = ConcurrencyLimit(settings.ADMISSION_MAX_HASHING)
+
+admission_rejected = registry.counter(
+    "admission_rejected_total", "Requests rejected by the admission control.",
+    labelnames=("kind", "reason"))
+registry.gauge("admission_hashing_active", "Write requests admitted and running.",
+               callback=lambda: hashing_limit.active)
+
+
+def client_key(request: Request) -> str:
+    """
+    Returns the identifier of the client of the request.
+    """
+    if settings.ADMISSION_CLIENT_HEADER:
+        value: Optional[str] = request.headers.get(settings.ADMISSION_CLIENT_HEADER)
+        if value:
+            return value
+    return request.client.host if request.client else "unknown"
+
+
+def _acquire(limiter: RateLimiter, request: Request, kind: str) -> None:
+    wait = limiter.acquire(client_key(request))
+    if wait:
+        admission_rejected.inc(kind=kind, reason="rate")
+        raise HTTPException(status_code=429,
+                            detail="Too many requests",
+                            headers={"Retry-After": str(math.ceil(wait))})
+
+
+async def admit_read(request: Request) -> None:
+    """
+    Dependency admitting a read request.
+
+    Raises:
+        HTTPException: 429 if the client has no read token.
+    """
+    if settings.ADMISSION_ENABLED:
+        _acquire(read_limiter, request, "read")
+
+
+async def admit_write(request: Request):
+    """
+    Dependency admitting a hash-heavy write request.
+
+    The place under ADMISSION_MAX_HASHING is held until the request is done.
+
+    Raises:
+        HTTPException: 429 if the client has no write token,
+            503 if ADMISSION_MAX_HASHING writes are already running.
+    """
+    if not settings.ADMISSION_ENABLED:
+        yield
+        return
+    _acquire(write_limiter, request, "write")
+    if not hashing_limit.try_acquire():
+        admission_rejected.inc(kind="write", reason="concurrency")
+        raise HTTPException(status_code=503,
+                            detail="Too many passwords are being hashed",
+                            headers={"Retry-After": "1"})
+    try:
+        yield
+    finally:
+        hashing_limit.release()
@@ -0,0 +1,273 @@
+"""
+This module defines the asynchronous audit log of password access.
+
+Recording an event only puts it on a bounded in-memory queue, a background
+task of the worker takes the events off the queue and writes them in batches
+(one INSERT per batch to the append-only audit_log table, or one write per
+batch to a rotating local file), so the audit adds no database round trip
+to the requests.
+
+When the queue is full (the sink is slower than the requests or down), the
+drop policy decides which event is lost: the new one ("drop_new") or the
+oldest one in the queue ("drop_oldest"). Dropped, written and failed events
+are counted in audit_events_total. Events still in the queue are lost if
+the worker is killed, on a normal shutdown they are written.
+
+Backends (AUDIT_BACKEND):
+    - "table": the audit_log table of the primary database.
+    - "file": JSON lines in AUDIT_FILE_PATH, rotated at AUDIT_FILE_MAX_BYTES.
+    - "none": the audit is disabled.
+
+Classes:
+    - TableSink: writes batches to the audit_log table.
+    - FileSink: writes batches to a rotating file.
+    - AuditLog: the queue and the background flusher.
+
+Methods:
+    - build_sink: creates the sink selected in Settings.
+    - audit_access: records an access of the request.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import suppress
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi import Request
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config.settings import Settings, settings
+from src.models.audit import AuditEvent
+from src.services.admission import client_key
+from src.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+audit_events = registry.counter(
+    "audit_events_total", "Audit events by outcome (queued, dropped, written, failed).",
+    ("outcome",))
+
+
+class TableSink:
+    """
+    TableSink class writes the events to the audit_log table.
+
+    Attributes:
+        session_maker (async_sessionmaker): The factory of sessions of the primary.
+    """
+
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession]):
+        self.session_maker = session_maker
+
+    async def write(self, events: List[dict]) -> None:
+        """Writes the events with one INSERT and one commit."""
+        async with self.session_maker() as session:
+            await session.execute(insert(AuditEvent), [
+                {**event, "created_at": datetime.fromtimestamp(event["created_at"],
+                                                               timezone.utc)}
+                for event in events])
+            await session.commit()
+
+
+class FileSink:
+    """
+    FileSink class writes the events as JSON lines to a rotating file.
+
+    The file is written in a thread, so a slow disk doesn't block the event loop.
+    A batch is never split between two files, so a file can exceed max_bytes
+    by one batch.
+
+    Attributes:
+        path (str): The path of the file.
+        max_bytes (int): Size at which the file is rotated.
+        backups (int): Number of rotated files kept (path.1, path.2, ...).
+    """
+
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def _rotate(self) -> None:
+        if self.backups == 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def _write(self, data: bytes) -> None:
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size > 0 and size + len(data) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "ab") as file:
+            file.write(data)
+
+    async def write(self, events: List[dict]) -> None:
+        """Appends the events, one JSON object per line."""
+        data = "".join(json.dumps(event, separators=(",", ":")) + "\n"
+                       for event in events).encode()
+        await asyncio.to_thread(self._write, data)
+
+
+class AuditLog:
+    """
+    AuditLog class queues the events and writes them in batches in the background.
+
+    Attributes:
+        queue_size (int): Number of events that can wait for the flusher.
+        batch_size (int): Maximum number of events in one write.
+        flush_interval (float): Seconds the flusher collects events before a write
+            that is not full.
+        drop_policy (str): "drop_new" or "drop_oldest", what is lost on a full queue.
+    """
+
+    def __init__(self,
+                 queue_size: int = 10000,
+                 batch_size: int = 500,
+                 flush_interval: float = 1.0,
+                 drop_policy: str = "drop_new"):
+        if drop_policy not in ("drop_new", "drop_oldest"):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self.sink = None
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self._batch: List[dict] = []
+        self._writing: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """Number of events waiting in the queue."""
+        return self._queue.qsize()
+
+    def record(self, owner_id: str, client: str, action: str,
+               service_name: Optional[str] = None, detail: Optional[str] = None) -> bool:
+        """
+        Puts an event on the queue without waiting.
+
+        The client and the detail are cut to the 255 characters of their columns.
+
+        Returns:
+            bool: Whether the event was queued (with drop_oldest, an older one may be lost).
+        """
+        if self.sink is None:
+            return False
+        event = {"created_at": time.time(), "owner_id": owner_id, "client": client[:255],
+                 "action": action, "service_name": service_name,
+                 "detail": detail[:255] if detail is not None else None}
+        if self._queue.full():
+            audit_events.inc(outcome="dropped")
+            if self.drop_policy == "drop_new":
+                return False
+            self._queue.get_nowait()
+        self._queue.put_nowait(event)
+        audit_events.inc(outcome="queued")
+        return True
+
+    def start(self, sink) -> None:
+        """Starts the flusher writing to the sink."""
+        self.sink = sink
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            self._batch.append(await self._queue.get())
+            if self._queue.qsize() < self.batch_size - 1:
+                await asyncio.sleep(self.flush_interval)
+            self._batch.extend(self._take(self.batch_size - len(self._batch)))
+            batch, self._batch = self._batch, []
+            # a write in progress is finished even if the flusher is stopped
+            self._writing = asyncio.ensure_future(self._write(batch))
+            await asyncio.shield(self._writing)
+
+    def _take(self, count: int) -> List[dict]:
+        events = []
+        while len(events) < count and not self._queue.empty():
+            events.append(self._queue.get_nowait())
+        return events
+
+    async def _write(self, batch: List[dict]) -> None:
+        try:
+            await self.sink.write(batch)
+        except Exception as e:
+            audit_events.inc(len(batch), outcome="failed")
+            logger.warning("Audit write of %d events failed: %s", len(batch), e)
+        else:
+            audit_events.inc(len(batch), outcome="written")
+
+    async def stop(self, timeout: float = 5) -> None:
+        """
+        Stops the flusher and writes the events left in the queue.
+
+        Args:
+            timeout (float): Seconds the final writes may take, the rest is lost.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+
+        async def flush_rest():
+            if self._writing is not None:
+                await self._writing
+            if self._batch:
+                await self._write(self._batch)
+            while not self._queue.empty():
+                await self._write(self._take(self.batch_size))
+
+        try:
+            await asyncio.wait_for(flush_rest(), timeout)
+        except asyncio.TimeoutError:
+            lost = self._queue.qsize() + len(self._batch)
+            audit_events.inc(lost, outcome="dropped")
+            logger.warning("Audit stopped with %d events not written", lost)
+        self.sink = self._task = self._writing = None
+        self._batch = []
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+
+
+def build_sink(app_settings: Settings, session_maker: async_sessionmaker[AsyncSession]):
+    """
+    Creates the sink of the audit backend selected in Settings.
+
+    Returns:
+        The sink, None if the audit is disabled.
+    """
+    if app_settings.AUDIT_BACKEND == "table":
+        return TableSink(session_maker)
+    if app_settings.AUDIT_BACKEND == "file":
+        return FileSink(app_settings.AUDIT_FILE_PATH, app_settings.AUDIT_FILE_MAX_BYTES,
+                        app_settings.AUDIT_FILE_BACKUPS)
+    return None
+
+
+def audit_access(request: Request, owner_id: str, action: str,
+                 service_names: Optional[List[str]] = None,
+                 detail: Optional[str] = None) -> None:
+    """
+    Records the access of the request, one event per service name
+    (one event without a name, if service_names is None).
+    """
+    if audit_log.sink is None:
+        return
+    client = client_key(request)
+    for service_name in service_names if service_names is not None else [None]:
+        audit_log.record(owner_id, client, action, service_name, detail)
+
+
+audit_log = AuditLog(queue_size=settings.AUDIT_QUEUE_SIZE,
+                     batch_size=settings.AUDIT_BATCH_SIZE,
+                     flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+                     drop_policy=settings.AUDIT_DROP_POLICY)
+registry.gauge("audit_queue_size", "Audit events waiting to be written.",
+               callback=lambda: audit_log.pending)
@@ -0,0 +1,94 @@
+"""
+This module defines the in-memory index of service names for autocomplete.
+
+The names of every owner are kept in a sorted list, a prefix query is a
+binary search for the first name not less than the prefix followed by a
+walk over the names that start with it, so it never touches the database.
+
+Every worker has its own index: it is loaded at startup, a name is added
+when this worker creates a password and the whole index is reloaded every
+AUTOCOMPLETE_REFRESH_SECONDS to pick up the names created by other workers.
+Names added while a reload is running are merged into the reloaded list.
+
+Classes:
+    - ServiceNameIndex: sorted index of service names.
+"""
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class ServiceNameIndex:
+    """
+    ServiceNameIndex class for prefix queries over the service names of the owners.
+
+    Attributes:
+        loaded_at (Optional[float]): Unix time of the last load, None before the first one.
+
+    Methods:
+        - begin_load: starts recording added names before the names are read for a reload.
+        - load: replaces the names of the index.
+        - add: adds one name of an owner.
+        - complete: returns the names of an owner starting with a prefix.
+    """
+
+    def __init__(self):
+        self._names: Dict[str, List[str]] = {}
+        self._added: Optional[Set[Tuple[str, str]]] = None
+        self.loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return sum(len(names) for names in self._names.values())
+
+    def __contains__(self, owner_name: Tuple[str, str]) -> bool:
+        owner_id, name = owner_name
+        names = self._names.get(owner_id, ())
+        position = bisect_left(names, name)
+        return position < len(names) and names[position] == name
+
+    def begin_load(self) -> None:
+        self._added = set()
+
+    def load(self, owner_names: Iterable[Tuple[str, str]]) -> None:
+        added, self._added = self._added or set(), None
+        grouped = defaultdict(set)
+        for owner_id, name in owner_names:
+            grouped[owner_id].add(name)
+        for owner_id, name in added:
+            grouped[owner_id].add(name)
+        # the new lists are built aside and swapped in, readers never see a partial one
+        self._names = {owner_id: sorted(names) for owner_id, names in grouped.items()}
+        self.loaded_at = time.time()
+
+    def add(self, owner_id: str, name: str) -> None:
+        if self._added is not None:
+            self._added.add((owner_id, name))
+        names = self._names.setdefault(owner_id, [])
+        position = bisect_left(names, name)
+        if position == len(names) or names[position] != name:
+            names.insert(position, name)
+
+    def complete(self, owner_id: str, prefix: str, limit: int) -> List[str]:
+        """
+        Returns the names of the owner starting with the prefix in sorted order.
+
+        Args:
+            owner_id (str): The owner of the names.
+            prefix (str): The beginning of the service name.
+            limit (int): The maximum number of names.
+
+        Returns:
+            List[str]: At most limit names.
+        """
+        names = self._names.get(owner_id, [])
+        result = []
+        for position in range(bisect_left(names, prefix), len(names)):
+            name = names[position]
+            if not name.startswith(prefix) or len(result) >= limit:
+                break
+            result.append(name)
+        return result
+
+
+service_name_index = ServiceNameIndex()
@@ -0,0 +1,116 @@
+"""
+This module defines a group-commit batcher for concurrent writes.
+
+Every write waits for its own transaction commit (one WAL flush), so a burst
+of small writes is bound by the flushes. The batcher collects the writes
+submitted within a short window (or until the batch is full) and hands them
+to one flush call, which writes them in one statement and one commit, then
+resolves the future of every caller with its own result.
+
+Batches are kept per key (e.g. per session factory), so writes of different
+databases are never mixed.
+
+Classes:
+    - GroupCommitBatcher: collects concurrent writes into batches.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Set, Tuple
+
+from src.services.metrics import registry
+
+batch_size = registry.histogram(
+    "write_batch_size", "Writes committed together by the group-commit batcher.",
+    ("batcher",), buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+
+
+class GroupCommitBatcher:
+    """
+    GroupCommitBatcher class collects concurrent writes and flushes them together.
+
+    The first write of a key starts the window, the batch is flushed when the
+    window elapses or when it reaches max_size writes. A caller that is
+    cancelled while waiting doesn't withdraw its write from the batch.
+
+    Attributes:
+        name (str): The name of the batcher in the metrics.
+        flush (Callable): Writes a batch, called with the key and the items,
+            returns one result per item in the same order.
+        window (float): Seconds a batch collects writes, 0 disables the batching.
+        max_size (int): Number of writes that flushes the batch at once.
+    """
+
+    def __init__(self,
+                 name: str,
+                 flush: Callable[[Hashable, List[Any]], Awaitable[List[Any]]],
+                 window: float = 0,
+                 max_size: int = 100):
+        self.name = name
+        self.flush = flush
+        self.window = window
+        self.max_size = max_size
+        self._pending: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.Task] = {}
+        self._flushing: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the writes are batched."""
+        return self.window > 0
+
+    async def submit(self, item: Any, key: Hashable = None) -> Any:
+        """
+        Adds the write to the batch of the key and waits for the flush.
+
+        Args:
+            item (Any): The write, passed to flush.
+            key (Hashable): The batch the write belongs to.
+
+        Returns:
+            Any: The result of flush for the item.
+
+        Raises:
+            Exception: The error of flush, raised to every caller of the batch.
+        """
+        future = asyncio.get_running_loop().create_future()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = []
+            self._timers[key] = asyncio.create_task(self._flush_after_window(key))
+        batch.append((item, future))
+        if len(batch) >= self.max_size:
+            self._timers.pop(key).cancel()
+            self._start_flush(key)
+        return await future
+
+    async def _flush_after_window(self, key: Hashable) -> None:
+        await asyncio.sleep(self.window)
+        self._timers.pop(key, None)
+        self._start_flush(key)
+
+    def _start_flush(self, key: Hashable) -> None:
+        task = asyncio.create_task(self._flush_batch(key, self._pending.pop(key)))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _flush_batch(self, key: Hashable,
+                           batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        batch_size.observe(len(batch), batcher=self.name)
+        try:
+            results = await self.flush(key, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def drain(self) -> None:
+        """Flushes the pending batches at once and waits for all flushes."""
+        for key, timer in list(self._timers.items()):
+            timer.cancel()
+            del self._timers[key]
+            self._start_flush(key)
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
@@ -0,0 +1,295 @@
+"""
+This module defines the read-through cache of passwords.
+
+The cache keeps the response data of GET /password/{service_name} by service
+name. It is bounded by size (least recently used entries are evicted first)
+and by age (entries older than CACHE_TTL_SECONDS are treated as missing).
+Writes invalidate the entry of the service.
+
+A read that missed takes the invalidation generation of the key before its
+query and stores the row only if the key wasn't invalidated meanwhile, so
+a row read before a concurrent write is not cached after the write.
+
+Backends:
+    - "memory": in-process cache, one per worker.
+    - "redis": shared cache for multi-worker deployments, requires the
+      redis package. Eviction is done by Redis (TTL per key, LRU with
+      maxmemory-policy allkeys-lru).
+    - "none": caching is disabled.
+
+Classes:
+    - CacheBackend: base class of the cache backends with hit/miss counters.
+    - MemoryCache: in-process LRU cache with TTL.
+    - RedisCache: cache in a shared Redis.
+    - NullCache: cache that never stores anything.
+
+Methods:
+    - build_cache: creates the backend selected in Settings.
+"""
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from src.config.settings import Settings, settings
+from src.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """
+    Base class of the cache backends.
+
+    Subclasses implement _get, generation, set and delete and define the
+    name of the backend.
+
+    Attributes:
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups not found in the cache.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[dict]:
+        """Returns the cached value or None, counts hits and misses."""
+        value = await self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    @abstractmethod
+    async def _get(self, key: str) -> Optional[dict]:
+        """Returns the cached value or None."""
+
+    @abstractmethod
+    async def generation(self, key: str) -> int:
+        """
+        Returns the invalidation generation of the key, changed by every delete.
+
+        Taken before reading the value that is passed to set.
+        """
+
+    @abstractmethod
+    async def set(self, key: str, value: dict, generation: Optional[int] = None) -> None:
+        """
+        Stores the value.
+
+        Args:
+            key (str): The key of the value.
+            value (dict): The value to store.
+            generation (Optional[int]): The generation of the key before the value
+                was read, the value is not stored if the key was invalidated since.
+                None stores the value unconditionally.
+        """
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Removes the value, if it is cached, and invalidates the reads in progress."""
+
+    async def clear(self) -> None:
+        """Removes all values and resets the counters."""
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """Returns the counters of the cache."""
+        total = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+class NullCache(CacheBackend):
+    """
+    Cache that never stores anything.
+    """
+    name = "none"
+
+    async def _get(self, key: str) -> Optional[dict]:
+        return None
+
+    async def generation(self, key: str) -> int:
+        return 0
+
+    async def set(self, key: str, value: dict, generation: Optional[int] = None) -> None:
+        pass
+
+    async def delete(self, key: str) -> None:
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-process LRU cache with TTL.
+
+    The generations are stamps of a counter incremented by every delete,
+    the stamps of the last max_size deleted keys are kept, an evicted stamp
+    raises the stamp of all keys without one.
+
+    Attributes:
+        max_size (int): Maximum number of entries.
+        ttl (float): Time to live of an entry in seconds.
+    """
+    name = "memory"
+
+    def __init__(self, max_size: int, ttl: float):
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._deletes = 0
+        self._stamps: OrderedDict[str, int] = OrderedDict()
+        self._evicted_stamp = 0
+
+    async def _get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def generation(self, key: str) -> int:
+        return self._deletes
+
+    async def set(self, key: str, value: dict, generation: Optional[int] = None) -> None:
+        if (generation is not None
+                and self._stamps.get(key, self._evicted_stamp) > generation):
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+        self._deletes += 1
+        self._stamps[key] = self._deletes
+        self._stamps.move_to_end(key)
+        while len(self._stamps) > self.max_size:
+            _, stamp = self._stamps.popitem(last=False)
+            self._evicted_stamp = max(self._evicted_stamp, stamp)
+
+    async def clear(self) -> None:
+        await super().clear()
+        self._entries.clear()
+        self._stamps.clear()
+        self._evicted_stamp = self._deletes
+
+    def stats(self) -> dict:
+        return {**super().stats(), "size": len(self._entries), "max_size": self.max_size}
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache in a shared Redis, values are stored as JSON with a TTL.
+
+    Errors of Redis are logged and treated as misses, so an unavailable
+    cache doesn't fail the requests.
+
+    The generation of a key is a counter in Redis incremented by delete,
+    shared by all workers, set compares it and stores the value in one script.
+
+    Attributes:
+        ttl (int): Time to live of an entry in seconds.
+    """
+    name = "redis"
+    prefix = "password:"
+    generation_prefix = "password-generation:"
+    set_script = """
+        if (redis.call('GET', KEYS[2]) or '0') == ARGV[2] then
+            redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+        end
+    """
+
+    def __init__(self, url: str, ttl: int):
+        super().__init__()
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "CACHE_BACKEND=redis requires the redis package, "
+                "install it with: pip install redis") from e
+        self._error = redis.RedisError
+        self._redis = redis.from_url(url)
+        self._set = self._redis.register_script(self.set_script)
+        self.ttl = ttl
+
+    async def _get(self, key: str) -> Optional[dict]:
+        try:
+            raw = await self._redis.get(self.prefix + key)
+        except self._error as e:
+            logger.warning("Password cache get failed: %s", e)
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    async def generation(self, key: str) -> int:
+        try:
+            return int(await self._redis.get(self.generation_prefix + key) or 0)
+        except self._error as e:
+            logger.warning("Password cache generation failed: %s", e)
+            # unknown generation, the value read is not stored
+            return -1
+
+    async def set(self, key: str, value: dict, generation: Optional[int] = None) -> None:
+        if generation == -1:
+            return
+        try:
+            if generation is None:
+                await self._redis.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+            else:
+                await self._set(keys=[self.prefix + key, self.generation_prefix + key],
+                                args=[json.dumps(value), generation, self.ttl])
+        except self._error as e:
+            logger.warning("Password cache set failed: %s", e)
+
+    async def delete(self, key: str) -> None:
+        try:
+            # the generation outlives the reads in progress, an expired one
+            # only means no delete happened during a whole TTL
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.delete(self.prefix + key)
+                pipe.incr(self.generation_prefix + key)
+                pipe.expire(self.generation_prefix + key, self.ttl * 2)
+                await pipe.execute()
+        except self._error as e:
+            logger.warning("Password cache delete failed: %s", e)
+
+    async def clear(self) -> None:
+        await super().clear()
+        async for key in self._redis.scan_iter(match=self.prefix + "*"):
+            await self._redis.delete(key)
+
+
+def build_cache(settings: Settings) -> CacheBackend:
+    """
+    Creates the cache backend selected by CACHE_BACKEND.
+    """
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryCache(max_size=settings.CACHE_MAX_SIZE,
+                           ttl=settings.CACHE_TTL_SECONDS)
+    if settings.CACHE_BACKEND == "redis":
+        if not settings.CACHE_URL:
+            raise RuntimeError("CACHE_BACKEND=redis requires CACHE_URL")
+        return RedisCache(url=settings.CACHE_URL, ttl=settings.CACHE_TTL_SECONDS)
+    return NullCache()
+
+
+password_cache = build_cache(settings)
+registry.counter("password_cache_hits_total", "Lookups answered from the password cache.",
+                 callback=lambda: password_cache.hits)
+registry.counter("password_cache_misses_total", "Lookups not found in the password cache.",
+                 callback=lambda: password_cache.misses)
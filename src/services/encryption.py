@@ -0,0 +1,120 @@
+"""
+This module defines the encryption of stored passwords.
+
+Passwords are encrypted with AES-GCM, the owner and the service name are
+bound to the ciphertext as associated data ("owner_id\0service_name",
+owner ids can't contain NUL), so a ciphertext copied to another row, of
+the same or of another owner, doesn't decrypt. A stored value is urlsafe base64 of the 12 byte nonce
+followed by the ciphertext and the tag.
+
+The AESGCM object is created once per key and reused for every row.
+Pages of at most DECRYPT_THREAD_THRESHOLD rows are decrypted in the event
+loop, larger ones (long search pages, export partitions) in a thread, so
+the loop isn't blocked while they are decrypted.
+
+Classes:
+    - PasswordCipher: encrypts and decrypts passwords with one key.
+
+Methods:
+    - load_key: decodes the key from its base64 form.
+    - associated_data: the associated data of the password of a row.
+"""
+import asyncio
+import base64
+import binascii
+import os
+from typing import Iterable, List, Mapping
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from src.config.settings import settings
+
+NONCE_SIZE = 12
+
+
+def load_key(value: str) -> bytes:
+    """
+    Decodes the key from its urlsafe base64 form.
+
+    Raises:
+        ValueError: If the value is not base64 of a 16, 24 or 32 byte key.
+    """
+    try:
+        key = base64.urlsafe_b64decode(value)
+    except (binascii.Error, ValueError):
+        raise ValueError("ENCRYPTION_KEY is not valid base64") from None
+    if len(key) not in (16, 24, 32):
+        raise ValueError("ENCRYPTION_KEY must be 16, 24 or 32 bytes long")
+    return key
+
+
+def associated_data(owner_id: str, service_name: str) -> bytes:
+    """Returns the associated data binding a ciphertext to its row."""
+    return f"{owner_id}\0{service_name}".encode()
+
+
+class PasswordCipher:
+    """
+    PasswordCipher class for encrypting passwords at rest.
+
+    Attributes:
+        thread_threshold (int): Rows decrypted in the event loop, larger batches go to a thread.
+
+    Methods:
+        - encrypt: encrypts the password of the service of the owner.
+        - decrypt: decrypts the stored password of the service of the owner.
+        - decrypt_rows: decrypts the "password" of every row of the owner.
+    """
+
+    def __init__(self, key: bytes, thread_threshold: int = 256):
+        self._aead = AESGCM(key)
+        self.thread_threshold = thread_threshold
+
+    def encrypt(self, password: str, owner_id: str, service_name: str) -> str:
+        """
+        Returns the stored form of the password of the service of the owner.
+        """
+        nonce = os.urandom(NONCE_SIZE)
+        token = self._aead.encrypt(nonce, password.encode(),
+                                   associated_data(owner_id, service_name))
+        return base64.urlsafe_b64encode(nonce + token).decode("ascii")
+
+    def decrypt(self, value: str, owner_id: str, service_name: str) -> str:
+        """
+        Returns the password of the service of the owner from its stored form.
+
+        Raises:
+            ValueError: If the value was not encrypted with this key for the service of the owner.
+        """
+        try:
+            data = base64.urlsafe_b64decode(value)
+            return self._aead.decrypt(data[:NONCE_SIZE], data[NONCE_SIZE:],
+                                      associated_data(owner_id, service_name)).decode()
+        except (binascii.Error, InvalidTag, ValueError):
+            raise ValueError(
+                f"Password of {service_name!r} can't be decrypted") from None
+
+    def _decrypt_rows(self, rows: Iterable[Mapping], owner_id: str) -> List[dict]:
+        decrypt = self.decrypt
+        return [{**row, "password": decrypt(row["password"], owner_id, row["service_name"])}
+                for row in rows]
+
+    async def decrypt_rows(self, rows: List[Mapping], owner_id: str) -> List[dict]:
+        """
+        Decrypts the "password" of every row.
+
+        Args:
+            rows (List[Mapping]): Rows with "service_name" and the stored "password".
+            owner_id (str): The owner of the rows.
+
+        Returns:
+            List[dict]: Copies of the rows with the decrypted password.
+        """
+        if len(rows) <= self.thread_threshold:
+            return self._decrypt_rows(rows, owner_id)
+        return await asyncio.to_thread(self._decrypt_rows, rows, owner_id)
+
+
+password_cipher = PasswordCipher(load_key(settings.ENCRYPTION_KEY),
+                                 settings.DECRYPT_THREAD_THRESHOLD)
@@ -0,0 +1,48 @@
+"""
+This module defines the entity tags of the password responses.
+
+A password row gets a new version whenever its password changes, so the
+id and the version of the rows identify the body of a response exactly and
+the tags are strong. They are computed from these two columns only, before
+the passwords are decrypted and encoded, so a matching If-None-Match is
+answered with 304 without building the body.
+
+Methods:
+    - row_etag: returns the tag of one password.
+    - page_etag: returns the tag of a search page.
+    - etag_matches: checks an If-None-Match header against a tag.
+"""
+import hashlib
+from typing import Iterable, Mapping, Optional
+
+
+def row_etag(row: Mapping) -> str:
+    """
+    Returns the tag of a row with "id" and "version".
+    """
+    return f'"{row["id"]}-{row["version"]}"'
+
+
+def page_etag(rows: Iterable[Mapping], next_cursor: Optional[str]) -> str:
+    """
+    Returns the tag of a page from the ids and versions of its rows and its next cursor.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for row in rows:
+        digest.update(f'{row["id"]}-{row["version"]},'.encode())
+    digest.update((next_cursor or "").encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Checks whether an If-None-Match header matches the tag.
+
+    The weak comparison is used, as required for If-None-Match.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag
+               for tag in if_none_match.split(","))
@@ -0,0 +1,142 @@
+"""
+This module defines streaming readers and writers for NDJSON and CSV bodies.
+
+The readers consume the request body chunk by chunk and yield one row at
+a time, so the memory does not depend on the size of the body. The writers
+encode a batch of rows into one chunk of a streaming response.
+
+Methods:
+    - iter_lines: splits a stream of bytes into numbered lines.
+    - iter_ndjson: yields rows of an NDJSON stream.
+    - iter_csv: yields rows of a CSV stream with a header line.
+    - encode_ndjson: encodes rows as NDJSON lines.
+    - encode_csv: encodes rows as CSV lines.
+"""
+import csv
+import io
+import json
+from typing import (AsyncIterable, AsyncIterator, Iterable, Mapping, Sequence,
+                    Tuple, Union)
+
+MAX_LINE_LENGTH = 64 * 1024
+
+
+async def iter_lines(
+        stream: AsyncIterable[bytes],
+        max_line_length: int = MAX_LINE_LENGTH
+) -> AsyncIterator[Tuple[int, Union[str, ValueError]]]:
+    """
+    Splits a stream of bytes into lines.
+
+    A line that is not valid UTF-8 or longer than max_line_length bytes is
+    yielded as an instance of ValueError, the rest of a too long line is
+    skipped without buffering it.
+
+    Args:
+        stream (AsyncIterable[bytes]): The body of the request.
+        max_line_length (int): Maximum length of one line in bytes.
+
+    Yields:
+        Tuple[int, Union[str, ValueError]]: Line number (starting from 1) and
+        the decoded line or the error.
+    """
+    buffer = b""
+    line_no = 0
+    skipping = False
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if skipping:
+                skipping = False
+                continue
+            yield line_no, _decode_line(line, max_line_length)
+        if len(buffer) > max_line_length:
+            if not skipping:
+                skipping = True
+                yield line_no + 1, _decode_line(buffer, max_line_length)
+            buffer = b""
+    if buffer and not skipping:
+        yield line_no + 1, _decode_line(buffer, max_line_length)
+
+
+def _decode_line(line: bytes, max_line_length: int) -> Union[str, ValueError]:
+    if len(line) > max_line_length:
+        return ValueError(f"Line is longer than {max_line_length} bytes")
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError as e:
+        return ValueError(f"Invalid UTF-8: {e}")
+
+
+async def iter_ndjson(
+        stream: AsyncIterable[bytes],
+        max_line_length: int = MAX_LINE_LENGTH
+) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Yields rows of an NDJSON stream, empty lines are skipped.
+
+    A line that can't be read or is not valid JSON is yielded as an instance
+    of ValueError, so the caller can report it and continue with the next line.
+    """
+    async for line_no, line in iter_lines(stream, max_line_length):
+        if isinstance(line, ValueError):
+            yield line_no, line
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, ValueError(f"Invalid JSON: {e}")
+
+
+async def iter_csv(
+        stream: AsyncIterable[bytes],
+        max_line_length: int = MAX_LINE_LENGTH
+) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Yields rows of a CSV stream, the first line is the header.
+
+    Quoted values with line breaks are not supported, every row must be
+    on its own line. A line that can't be read or parsed is yielded as an
+    instance of ValueError, if it is the header line, the next line is
+    taken as the header.
+    """
+    header = None
+    async for line_no, line in iter_lines(stream, max_line_length):
+        if isinstance(line, ValueError):
+            yield line_no, line
+            continue
+        if not line.strip():
+            continue
+        try:
+            values = next(csv.reader([line], strict=True))
+        except csv.Error as e:
+            yield line_no, ValueError(f"Invalid CSV: {e}")
+            continue
+        if header is None:
+            header = values
+            continue
+        if len(values) != len(header):
+            yield line_no, ValueError(
+                f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        yield line_no, dict(zip(header, values))
+
+
+def encode_ndjson(rows: Iterable[Mapping]) -> bytes:
+    """
+    Encodes rows as NDJSON, one JSON object per line.
+    """
+    return "".join(json.dumps(dict(row)) + "\n" for row in rows).encode("utf-8")
+
+
+def encode_csv(rows: Iterable[Sequence]) -> bytes:
+    """
+    Encodes rows as CSV lines.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
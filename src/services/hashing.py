@@ -0,0 +1,246 @@
+"""
+This module defines an asynchronous service for password hashing.
+
+bcrypt is CPU bound and blocks the event loop for the whole hashing cost,
+so the hashing is executed in a bounded worker pool (process pool by default,
+thread pool optional). When too many hashes are pending, new requests are
+rejected with 503 instead of piling up in the queue.
+
+Classes:
+    - HashingService: runs password hashing in a worker pool with backpressure.
+
+Methods:
+    - build_crypt_context: creates the CryptContext from the schemes and the cost.
+    - needs_rehash: checks if a stored hash is outdated.
+    - hash_password: hashes a password with the shared CryptContext.
+    - hash_passwords: hashes a list of passwords with the shared CryptContext.
+    - load_backend: loads the backends of the hashing schemes.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import (Executor, Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from typing import List, Optional
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from src.config.settings import settings
+from src.services.metrics import registry
+
+
+def build_crypt_context(schemes: List[str], bcrypt_rounds: int) -> CryptContext:
+    """
+    Creates the CryptContext of the stored hashes.
+
+    The first scheme is used for new hashes, the others are only verified
+    and reported by needs_update. New bcrypt hashes use bcrypt_rounds, hashes
+    of any other cost are still accepted, the cost is compared by needs_rehash.
+    """
+    options = {}
+    if "bcrypt" in schemes:
+        options = {"bcrypt__default_rounds": bcrypt_rounds}
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
+
+pwd_context = build_crypt_context(settings.HASH_SCHEMES, settings.HASH_BCRYPT_ROUNDS)
+
+
+def needs_rehash(hashed_password: str,
+                 bcrypt_rounds: int = settings.HASH_BCRYPT_ROUNDS) -> bool:
+    """
+    Checks if the stored hash should be replaced by a new one.
+
+    Hashes of a deprecated scheme, hashes that the context can't identify
+    (e.g. of a removed scheme) and bcrypt hashes with another cost than
+    bcrypt_rounds are reported, so the cost can be raised or lowered per
+    environment and changed by the rehash job.
+    """
+    scheme = pwd_context.identify(hashed_password)
+    if scheme is None:
+        return True
+    if pwd_context.needs_update(hashed_password):
+        return True
+    if scheme == "bcrypt":
+        return pwd_context.handler("bcrypt").from_string(hashed_password).rounds != bcrypt_rounds
+    return False
+
+
+def hash_password(password: str) -> str:
+    """
+    Generate a hashed password.
+
+    Module level function, so it can be pickled and sent to a worker process.
+    """
+    return pwd_context.hash(password)
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    Generate hashes for a list of passwords in one call to the worker.
+    """
+    return [pwd_context.hash(password) for password in passwords]
+
+
+def load_backend() -> int:
+    """
+    Loads the backends of the schemes (e.g. the bcrypt library), which passlib
+    otherwise does on the first hash.
+
+    Returns:
+        int: The pid of the worker.
+    """
+    for scheme in pwd_context.schemes():
+        handler = pwd_context.handler(scheme)
+        if hasattr(handler, "get_backend"):
+            handler.get_backend()
+    return os.getpid()
+
+
+class HashingService:
+    """
+    HashingService class for hashing passwords outside of the event loop.
+
+    The worker pool is created lazily on the first hash, so importing the
+    module does not spawn any processes.
+
+    Attributes:
+        executor_type (str): "process" or "thread".
+        max_workers (int): Number of workers in the pool.
+        queue_size (int): Number of hashes allowed to wait for a free worker.
+    """
+
+    def __init__(self,
+                 executor_type: str = "process",
+                 max_workers: Optional[int] = None,
+                 queue_size: int = 64):
+        if executor_type not in ("process", "thread"):
+            raise ValueError(f"Unknown executor type: {executor_type}")
+        self.executor_type = executor_type
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of hashes running or waiting for a worker."""
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="hashing")
+        return self._executor
+
+    def _reserve(self, count: int) -> None:
+        with self._lock:
+            if self._pending + count > self.max_workers + self.queue_size:
+                raise HTTPException(status_code=503,
+                                    detail="Hashing queue is full",
+                                    headers={"Retry-After": "1"})
+            self._pending += count
+
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _submit(self, fn, *args) -> Future:
+        """
+        Submits a job that takes one place in the queue.
+
+        The place is released by a callback of the executor future, when the
+        worker has really finished. If the awaiting task is cancelled, the job
+        keeps running in the worker and still counts as pending.
+        """
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def hash(self, password: str) -> str:
+        """
+        Hashes the password in the worker pool.
+
+        Args:
+            password (str): The password to hash.
+
+        Returns:
+            str: The hashed password.
+
+        Raises:
+            HTTPException: If the hashing queue is full.
+        """
+        self._reserve(1)
+        return await asyncio.wrap_future(self._submit(hash_password, password))
+
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        """
+        Hashes the passwords in parallel, one chunk per worker.
+
+        Every chunk takes one place in the queue.
+
+        Args:
+            passwords (List[str]): The passwords to hash.
+
+        Returns:
+            List[str]: The hashed passwords in the same order.
+
+        Raises:
+            HTTPException: If the hashing queue is full.
+        """
+        if not passwords:
+            return []
+        size = -(-len(passwords) // self.max_workers)
+        chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+        self._reserve(len(chunks))
+        futures = []
+        for i, chunk in enumerate(chunks):
+            try:
+                futures.append(asyncio.wrap_future(
+                    self._submit(hash_passwords, chunk)))
+            except BaseException:
+                with self._lock:
+                    self._pending -= len(chunks) - i - 1
+                raise
+        results = await asyncio.gather(*futures)
+        return [hashed for chunk in results for hashed in chunk]
+
+    async def warm_up(self) -> int:
+        """
+        Starts the workers and loads the hashing backends in them, so the first
+        requests don't pay for spawning the processes.
+
+        Returns:
+            int: The number of workers that answered.
+        """
+        executor = self._get_executor()
+        pids = await asyncio.gather(*(asyncio.wrap_future(executor.submit(load_backend))
+                                      for _ in range(self.max_workers)))
+        return len(set(pids)) if self.executor_type == "process" else self.max_workers
+
+    def shutdown(self) -> None:
+        """Stops the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hashing_service = HashingService(executor_type=settings.HASH_EXECUTOR,
+                                 max_workers=settings.HASH_WORKERS,
+                                 queue_size=settings.HASH_QUEUE_SIZE)
+registry.gauge("password_hash_pending", "Hashes running or waiting for a worker.",
+               callback=lambda: hashing_service.pending)
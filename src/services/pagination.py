@@ -0,0 +1,41 @@
+"""
+This module defines opaque cursors for keyset pagination.
+
+A cursor holds the sort key of the last row of a page, the next page
+starts right after it, so deep pages cost the same as the first one.
+
+Methods:
+    - encode_cursor: encodes the sort key of a row into a cursor.
+    - decode_cursor: decodes a cursor into the sort key of a row.
+"""
+import base64
+import binascii
+import json
+from typing import Tuple
+
+from fastapi import HTTPException
+
+
+def encode_cursor(service_name: str, id: int) -> str:
+    """
+    Encodes the sort key (service_name, id) into an opaque cursor.
+    """
+    raw = json.dumps([service_name, id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Decodes an opaque cursor into the sort key (service_name, id).
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        service_name, id = json.loads(raw)
+        if not isinstance(service_name, str) or not isinstance(id, int):
+            raise ValueError(cursor)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return service_name, id
@@ -0,0 +1,87 @@
+"""
+This module defines the coalescing of identical concurrent reads (single flight).
+
+When many requests read the same row at once (e.g. a popular password right
+after it was rotated and dropped from the cache), only the first call runs
+the query, the calls with the same key that arrive while it is in flight
+wait for it and get the same result. Nothing is kept after the call
+finishes, so a later call always runs a new query.
+
+If the running call fails, the waiting calls get the same error. If it is
+cancelled (its client went away), one of the waiting calls runs the query
+again instead.
+
+Classes:
+    - SingleFlight: shares the result of identical concurrent calls.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from src.services.metrics import registry
+
+coalesced_calls = registry.counter(
+    "read_coalescing_calls_total",
+    "Reads by query, that ran the query (leader) or waited for another one (follower).",
+    ("query", "role"))
+
+
+class SingleFlight:
+    """
+    SingleFlight class runs one call per key at a time and shares its result.
+
+    Attributes:
+        enabled (bool): Whether the calls are coalesced, otherwise every call runs.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Number of keys with a running call."""
+        return len(self._calls)
+
+    async def do(self, name: str, key: Hashable,
+                 fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs fn, or waits for the running call with the same key.
+
+        The result is shared between the callers, it must not be modified.
+
+        Args:
+            name (str): The name of the query in the metrics.
+            key (Hashable): Calls with equal keys return the same result.
+            fn (Callable): Runs the query.
+
+        Returns:
+            Any: The result of fn.
+        """
+        if not self.enabled:
+            return await fn()
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            coalesced_calls.inc(query=name, role="follower")
+            await asyncio.wait([future])
+            if not future.cancelled():
+                return future.result()
+
+        coalesced_calls.inc(query=name, role="leader")
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # the error is raised here, the waiting calls may not exist
+            future.exception()
+            raise
+        finally:
+            del self._calls[key]
+        future.set_result(result)
+        return result
@@ -6,6 +6,7 @@ asynchronous HTTP client, and obtaining authorization tokens for authenticated r
 
 Methods:
     - override_get_async_session: override async session
+    - get_session_maker is overridden with the test session factory
     - client: Creates an asynchronous HTTP client for making requests to the FastAPI app.
     - db_session: Provides an asynchronous database session for interacting with the test database.
     - setup_db: Sets up and tears down the test database with initial password data before and after tests.
@@ -15,14 +16,21 @@ import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import (async_sessionmaker, create_async_engine)
 
-from src.config.dependencies import get_async_session
+from src.config.dependencies import get_async_session, get_session_maker
+from src.config.pool import TimedAsyncAdaptedQueuePool
 from src.config.settings import settings
 from src.main import app
+from src.managers.password import load_service_name_index
 from src.models.base import Base
 from src.models.password import Password
+from src.services.cache import password_cache
+from src.services.encryption import password_cipher
+from src.services.metrics import instrument_engine
 
 TEST_DB_URL = settings.DATABASE_URL_TEST
-test_engine = create_async_engine(TEST_DB_URL)
+test_engine = create_async_engine(TEST_DB_URL,
+                                  poolclass=TimedAsyncAdaptedQueuePool)
+instrument_engine(test_engine)
 TestingSessionLocal = async_sessionmaker(bind=test_engine,
                                          expire_on_commit=False,
                                          autocommit=False)
@@ -39,6 +47,7 @@ async def override_get_async_session():
 
 
 app.dependency_overrides[get_async_session] = override_get_async_session
+app.dependency_overrides[get_session_maker] = lambda: TestingSessionLocal
 
 
 @pytest_asyncio.fixture
@@ -86,21 +95,29 @@ async def setup_db(db_session):
     """
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    await password_cache.clear()
 
     initial_passwords = [
-        Password(service_name="default",
+        Password(owner_id=settings.DEFAULT_OWNER_ID,
+                 service_name="default",
                  hashed_password="hashed_1234567890qwe",
-                 password="1234567890qwe"),
-        Password(service_name="yandex",
+                 password=password_cipher.encrypt("1234567890qwe", settings.DEFAULT_OWNER_ID,
+                                                  "default")),
+        Password(owner_id=settings.DEFAULT_OWNER_ID,
+                 service_name="yandex",
                  hashed_password="hashed_09876543210ytr",
-                 password="09876543210ytr"),
-        Password(service_name="gmail",
+                 password=password_cipher.encrypt("09876543210ytr", settings.DEFAULT_OWNER_ID,
+                                                  "yandex")),
+        Password(owner_id=settings.DEFAULT_OWNER_ID,
+                 service_name="gmail",
                  hashed_password="hashed_gmailgmailgmail",
-                 password="gmailgmailgmail")
+                 password=password_cipher.encrypt("gmailgmailgmail", settings.DEFAULT_OWNER_ID,
+                                                  "gmail"))
     ]
     for pwd in initial_passwords:
         db_session.add(pwd)
     await db_session.commit()
+    await load_service_name_index(TestingSessionLocal)
 
     yield
 
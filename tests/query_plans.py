@@ -0,0 +1,198 @@
+"""
+This module contains the harness of the query plan regression tests.
+
+The SQL statements a call issues are captured from the engine, every
+statement is prepared on the seeded test table and explained with
+EXPLAIN (FORMAT JSON) EXECUTE as a generic plan, the plan asyncpg's
+prepared statement cache runs after a few executions, or as a custom
+plan, planned with the values of the parameters, as the first executions
+are. The plan is checked against the baseline file (query_plan_baseline.json):
+the index the query is expected to use and its estimated total cost.
+
+The generic plan of the paged search (search_page) walks
+uq_password_owner_id_service_name in the order of the page and filters the
+rows with LIKE until the page is full: the pattern is a parameter, so the
+planner can't tell how many rows match. That is the accepted plan of common
+patterns, it stops after one page. A pattern with few matches reads the whole
+partition of the owner with it, the custom plan of such a pattern uses
+ix_password_owner_id_service_name_trgm instead, which the selective search
+case (a custom plan) keeps checked.
+
+The indexes of the partitions are reported by the name of the index of
+the partitioned table they belong to (e.g. uq_password_owner_id_service_name),
+so the baseline doesn't depend on the partition an owner is hashed to.
+
+To add a query, add a case to the test and run it with
+PLAN_BASELINE_UPDATE=1: the costs of all cases are written to the baseline,
+a new case gets the index its current plan uses, review it in the diff.
+A query expected to read without an index (e.g. a full load) has the
+index null, only its cost is checked.
+
+Classes:
+    - QueryPlan: the explained plan of one statement.
+
+Methods:
+    - capture_statements: collects the statements executed on an engine.
+    - explain: explains a captured statement as a generic or a custom plan.
+    - load_baseline: reads the baseline file.
+    - check_plan: compares a plan with its baseline entry.
+    - update_baseline: writes the costs of the plans to the baseline file.
+"""
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+BASELINE_PATH = Path(__file__).with_name("query_plan_baseline.json")
+# a plan may cost this many times its baseline before the check fails
+COST_TOLERANCE = 1.5
+UPDATE_BASELINE = os.environ.get("PLAN_BASELINE_UPDATE") == "1"
+
+
+class QueryPlan:
+    """
+    The generic plan of a statement.
+
+    Attributes:
+        name (str): The name of the query in the baseline.
+        statement (str): The SQL statement.
+        plan (dict): The plan of EXPLAIN (FORMAT JSON).
+        cost (float): The estimated total cost of the plan.
+        indexes (Set[str]): The indexes the plan reads (scans and ON CONFLICT arbiters).
+        node_types (Set[str]): The node types of the plan, e.g. "Seq Scan".
+    """
+
+    def __init__(self, name: str, statement: str, plan: dict, indexes: Set[str]):
+        self.name = name
+        self.statement = statement
+        self.plan = plan
+        self.cost = plan["Total Cost"]
+        self.indexes = indexes
+        self.node_types = {node["Node Type"] for node in _walk(plan)}
+
+    def __repr__(self) -> str:
+        return f"QueryPlan({self.name}, cost={self.cost}, indexes={sorted(self.indexes)})"
+
+
+def _walk(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+@contextmanager
+def capture_statements(engine: AsyncEngine) -> Iterator[List[Tuple[str, tuple]]]:
+    """
+    Collects the statements and the parameters executed on the engine.
+
+    Yields:
+        List[Tuple[str, tuple]]: The statements, filled while the block runs.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, tuple(parameters or ())))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def _literals(raw, statement: str, parameters: tuple) -> List[str]:
+    """Renders the parameters as SQL literals of the parameter types of the statement."""
+    types = (await raw.prepare(statement)).get_parameters()
+    literals = []
+    for parameter_type, value in zip(types, parameters):
+        type_name = await raw.fetchval("SELECT format_type($1::oid, NULL)", parameter_type.oid)
+        literals.append(await raw.fetchval(f"SELECT quote_nullable($1::{type_name})", value))
+    return literals
+
+
+async def explain(conn: AsyncConnection, name: str, statement: str,
+                  parameters: tuple, generic: bool = True) -> QueryPlan:
+    """
+    Explains the statement with its parameters as a generic or a custom plan.
+
+    The statement is only planned, not executed, the connection is rolled back.
+
+    Args:
+        conn (AsyncConnection): A connection to the seeded database.
+        name (str): The name of the query in the baseline.
+        statement (str): The statement as sent by asyncpg ($1, $2, ... parameters).
+        parameters (tuple): The parameters of the statement.
+        generic (bool): Whether the generic plan is explained, otherwise the
+            custom plan of the parameters.
+
+    Returns:
+        QueryPlan: The plan with the indexes of the partitioned table it reads.
+    """
+    raw = (await conn.get_raw_connection()).driver_connection
+    literals = await _literals(raw, statement, parameters)
+    plan_cache_mode = "force_generic_plan" if generic else "force_custom_plan"
+    await raw.execute(f"SET plan_cache_mode = {plan_cache_mode}")
+    await raw.execute(f"PREPARE plan_check AS {statement}")
+    try:
+        arguments = f"({', '.join(literals)})" if literals else ""
+        # the json codec of SQLAlchemy's asyncpg dialect decodes the result
+        plan = (await raw.fetchval(
+            f"EXPLAIN (FORMAT JSON) EXECUTE plan_check{arguments}"))[0]["Plan"]
+    finally:
+        await raw.execute("DEALLOCATE plan_check")
+        await raw.execute("RESET plan_cache_mode")
+    indexes = set()
+    for node in _walk(plan):
+        if "Index Name" in node:
+            indexes.add(node["Index Name"])
+        indexes.update(node.get("Conflict Arbiter Indexes", []))
+    parents = dict(await raw.fetch(
+        "SELECT child.relname, parent.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = inhrelid "
+        "JOIN pg_class parent ON parent.oid = inhparent "
+        "WHERE child.relname = ANY($1::text[])", list(indexes)))
+    await conn.rollback()
+    return QueryPlan(name, statement, plan, {parents.get(index, index) for index in indexes})
+
+
+def load_baseline() -> Dict[str, dict]:
+    """Reads the baseline, an empty one if the file doesn't exist."""
+    if not BASELINE_PATH.exists():
+        return {}
+    return json.loads(BASELINE_PATH.read_text())
+
+
+def check_plan(plan: QueryPlan, baseline: Dict[str, dict]) -> Optional[str]:
+    """
+    Compares the plan with the baseline entry of its query.
+
+    Returns:
+        Optional[str]: The problem, None if the plan is as expected.
+    """
+    expected = baseline.get(plan.name)
+    if expected is None:
+        return f"{plan.name}: no baseline, run with PLAN_BASELINE_UPDATE=1"
+    if expected["index"] is not None and expected["index"] not in plan.indexes:
+        return (f"{plan.name}: expected index {expected['index']}, the plan uses "
+                f"{sorted(plan.indexes) or 'none'} ({', '.join(sorted(plan.node_types))})")
+    if plan.cost > expected["cost"] * COST_TOLERANCE:
+        return (f"{plan.name}: estimated cost {plan.cost} is above the baseline "
+                f"{expected['cost']} x {COST_TOLERANCE}")
+    return None
+
+
+def update_baseline(plans: List[QueryPlan]) -> None:
+    """
+    Writes the costs of the plans to the baseline file.
+
+    The expected indexes are kept, a new query is added with the index of its plan.
+    """
+    baseline = load_baseline()
+    for plan in plans:
+        entry = baseline.setdefault(plan.name, {"index": min(plan.indexes, default=None)})
+        entry["cost"] = plan.cost
+    BASELINE_PATH.write_text(json.dumps(dict(sorted(baseline.items())), indent=2) + "\n")
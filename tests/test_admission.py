@@ -0,0 +1,84 @@
+"""
+This module contains tests for the admission control of the password routes.
+
+Methods:
+    - test_token_bucket: Tests taking and refilling of tokens.
+    - test_rate_limiter_evicts_clients: Tests the bound on the number of buckets.
+    - test_read_rate_limit: Tests 429 with Retry-After when a client runs out of read tokens.
+    - test_write_concurrency_limit: Tests 503 when too many writes are running.
+"""
+
+import pytest
+from httpx import AsyncClient
+
+from src.config.settings import settings
+from src.services import admission
+from src.services.admission import ConcurrencyLimit, RateLimiter, TokenBucket
+
+
+def test_token_bucket():
+    """
+    Test the burst and the refill of a bucket
+    """
+    bucket = TokenBucket(rate=2, burst=2, now=0)
+    assert bucket.take(0) == 0
+    assert bucket.take(0) == 0
+    assert bucket.take(0) == pytest.approx(0.5)
+    assert bucket.take(0.5) == 0
+    assert bucket.take(100) == 0
+    assert bucket.tokens == 1
+
+
+def test_rate_limiter_evicts_clients():
+    """
+    Test that the least recently seen client is dropped above max_clients
+    """
+    limiter = RateLimiter(rate=0.001, burst=1, max_clients=2)
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("b") == 0
+    assert limiter.acquire("a") > 0
+    assert limiter.acquire("c") == 0
+    assert limiter.acquire("b") == 0
+    assert limiter.acquire("c") > 0
+
+
+@pytest.mark.asyncio
+async def test_read_rate_limit(client: AsyncClient, monkeypatch):
+    """
+    Test API for a client above its read budget, other clients are not affected
+    """
+    monkeypatch.setattr(settings, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(settings, "ADMISSION_CLIENT_HEADER", "X-Client-Id")
+    monkeypatch.setattr(admission, "read_limiter",
+                        RateLimiter(rate=0.1, burst=2, max_clients=10))
+    headers = {"X-Client-Id": "deploy"}
+    for _ in range(2):
+        response = await client.get("/password/gmail", headers=headers)
+        assert response.status_code == 200
+    response = await client.get("/password/gmail", headers=headers)
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "10"
+
+    response = await client.get("/password/gmail", headers={"X-Client-Id": "ui"})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_write_concurrency_limit(client: AsyncClient, monkeypatch):
+    """
+    Test API for a write while the hashing cap is used up, the place is freed afterwards
+    """
+    monkeypatch.setattr(settings, "ADMISSION_ENABLED", True)
+    limit = ConcurrencyLimit(1)
+    monkeypatch.setattr(admission, "hashing_limit", limit)
+    password_data = {"service_name": "limited", "password": "1234567890qwerty"}
+
+    assert limit.try_acquire()
+    response = await client.post("/password/", json=password_data)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    limit.release()
+
+    response = await client.post("/password/", json=password_data)
+    assert response.status_code == 201
+    assert limit.active == 0
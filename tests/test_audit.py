@@ -0,0 +1,152 @@
+"""
+This module contains tests for the audit log of password access.
+
+Methods:
+    - test_drop_policies: Tests the events kept on a full queue.
+    - test_flusher_writes_batches: Tests the batched writes and the flush on stop.
+    - test_failed_write_counted: Tests that a failed write doesn't stop the writer.
+    - test_table_sink_append_only: Tests the writes to the append-only table.
+    - test_file_sink_rotation: Tests the rotation of the audit file.
+    - test_password_access_audited: Tests the events recorded by the password routes.
+"""
+
+import json
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.exc import DBAPIError
+
+from src.models.audit import AuditEvent
+from src.services import audit
+from src.services.audit import AuditLog, FileSink, TableSink, audit_events
+from tests.conftest import TestingSessionLocal
+
+
+class ListSink:
+    """
+    Sink of the tests, keeps the written batches
+    """
+
+    def __init__(self, error: Exception = None):
+        self.batches = []
+        self.error = error
+
+    async def write(self, events):
+        if self.error is not None:
+            raise self.error
+        self.batches.append(events)
+
+
+def test_drop_policies():
+    """
+    Test that a full queue drops the new event or the oldest one
+    """
+    dropped = audit_events.value(outcome="dropped")
+    for policy, kept in (("drop_new", ["a", "b"]), ("drop_oldest", ["b", "c"])):
+        audit_log = AuditLog(queue_size=2, drop_policy=policy)
+        audit_log.sink = ListSink()
+        results = [audit_log.record("owner", "client", "read", name) for name in "abc"]
+        assert results == [True, True, policy == "drop_oldest"]
+        assert [event["service_name"] for event in audit_log._take(10)] == kept
+    assert audit_events.value(outcome="dropped") - dropped == 2
+
+    with pytest.raises(ValueError):
+        AuditLog(drop_policy="block")
+
+
+@pytest.mark.asyncio
+async def test_flusher_writes_batches():
+    """
+    Test that the events are written in batches and the rest is written on stop
+    """
+    sink = ListSink()
+    audit_log = AuditLog(batch_size=3, flush_interval=0.01)
+    assert audit_log.record("owner", "client", "read") is False
+    audit_log.start(sink)
+    for i in range(7):
+        audit_log.record("owner", "client", "read", f"service_{i}", "x" * 300)
+    await audit_log.stop()
+
+    assert all(len(batch) <= 3 for batch in sink.batches)
+    events = [event for batch in sink.batches for event in batch]
+    assert [event["service_name"] for event in events] == [f"service_{i}" for i in range(7)]
+    assert len(events[0]["detail"]) == 255
+    assert audit_log.sink is None and audit_log.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_write_counted():
+    """
+    Test that the events of a failed write are counted and later writes go on
+    """
+    failed = audit_events.value(outcome="failed")
+    sink = ListSink(error=RuntimeError("disk full"))
+    audit_log = AuditLog(flush_interval=0)
+    audit_log.start(sink)
+    audit_log.record("owner", "client", "read")
+    audit_log.record("owner", "client", "read")
+    await audit_log.stop()
+    assert audit_events.value(outcome="failed") - failed == 2
+
+
+@pytest.mark.asyncio
+async def test_table_sink_append_only(db_session):
+    """
+    Test that the events are inserted and can't be changed
+    """
+    await TableSink(TestingSessionLocal).write([
+        {"created_at": 1700000000.5, "owner_id": "team", "client": "10.0.0.1",
+         "action": "read", "service_name": "gmail", "detail": None},
+        {"created_at": 1700000001.0, "owner_id": "team", "client": "10.0.0.1",
+         "action": "export", "service_name": None, "detail": "csv"},
+    ])
+    events = (await db_session.execute(select(AuditEvent).order_by(AuditEvent.id))).scalars().all()
+    assert [(event.action, event.service_name) for event in events] == [
+        ("read", "gmail"), ("export", None)]
+    assert events[0].created_at.timestamp() == 1700000000.5
+
+    with pytest.raises(DBAPIError, match="append-only"):
+        await db_session.execute(update(AuditEvent).values(action="changed"))
+    await db_session.rollback()
+
+
+@pytest.mark.asyncio
+async def test_file_sink_rotation(tmp_path):
+    """
+    Test that the file is rotated at max_bytes and only the backups are kept
+    """
+    path = tmp_path / "audit.log"
+    sink = FileSink(str(path), max_bytes=300, backups=2)
+    event = {"created_at": 1700000000.5, "owner_id": "team", "client": "10.0.0.1",
+             "action": "read", "service_name": "gmail", "detail": None}
+    for _ in range(5):
+        await sink.write([event, event])
+    assert sorted(file.name for file in tmp_path.iterdir()) == [
+        "audit.log", "audit.log.1", "audit.log.2"]
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2 and json.loads(lines[0]) == event
+
+
+@pytest.mark.asyncio
+async def test_password_access_audited(client: AsyncClient, monkeypatch):
+    """
+    Test API events of reads and writes, with the owner and the client
+    """
+    audit_log = AuditLog()
+    audit_log.sink = ListSink()
+    monkeypatch.setattr(audit, "audit_log", audit_log)
+    headers = {"X-Owner-Id": "default"}
+
+    await client.get("/password/gmail", headers=headers)
+    await client.get("/password/missing", headers=headers)
+    await client.get("/password/", params={"service_name": "a"}, headers=headers)
+    await client.post("/password/", json={"service_name": "audited",
+                                          "password": "1234567890qwerty"})
+    await client.put("/password/audited", json={"password": "0987654321qwerty"})
+    await client.post("/password/batch-get", json={"service_names": ["yandex", "missing"]})
+
+    events = [(event["action"], event["service_name"]) for event in audit_log._take(100)]
+    assert events == [("read", "gmail"), ("read", "default"), ("read", "gmail"),
+                      ("read", "yandex"), ("create", "audited"), ("update", "audited"),
+                      ("read", "yandex")]
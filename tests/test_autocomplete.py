@@ -0,0 +1,81 @@
+"""
+This module contains tests for the autocomplete of service names.
+
+Methods:
+    - test_index_complete: Tests prefix queries and limits of the index.
+    - test_index_reload_keeps_added: Tests that names added during a reload are kept.
+    - test_autocomplete: Tests the autocomplete endpoint and the update on create.
+    - test_autocomplete_reload: Tests the reload of the index through the internal endpoint.
+"""
+
+import pytest
+from httpx import AsyncClient
+
+from src.services.autocomplete import ServiceNameIndex, service_name_index
+
+
+def test_index_complete():
+    """
+    Test prefix queries over the sorted names
+    """
+    index = ServiceNameIndex()
+    index.load([("team", name) for name in ["gmail", "github", "gitlab", "yandex", "git"]]
+               + [("other", "gitter")])
+    assert index.complete("team", "git", 10) == ["git", "github", "gitlab"]
+    assert index.complete("team", "git", 2) == ["git", "github"]
+    assert index.complete("team", "x", 10) == []
+    assert index.complete("other", "git", 10) == ["gitter"]
+    assert index.complete("nobody", "git", 10) == []
+    index.add("team", "gitea")
+    index.add("team", "gitea")
+    assert index.complete("team", "gite", 10) == ["gitea"]
+    assert ("team", "gitea") in index
+    assert ("other", "gitea") not in index
+    assert len(index) == 7
+
+
+def test_index_reload_keeps_added():
+    """
+    Test that a name added after the names were read is not lost by the reload
+    """
+    index = ServiceNameIndex()
+    index.begin_load()
+    index.add("team", "created_meanwhile")
+    index.load([("team", "old")])
+    assert index.complete("team", "", 10) == ["created_meanwhile", "old"]
+
+
+@pytest.mark.asyncio
+async def test_autocomplete(client: AsyncClient):
+    """
+    Test API for the autocomplete, a created name is found without a reload
+    """
+    response = await client.get("/password/autocomplete/g")
+    assert response.status_code == 200
+    assert response.json() == ["gmail"]
+
+    password_data = {"service_name": "google", "password": "1234567890qwerty"}
+    response = await client.post("/password/", json=password_data)
+    assert response.status_code == 201
+
+    response = await client.get("/password/autocomplete/g", params={"limit": 1})
+    assert response.json() == ["gmail"]
+    response = await client.get("/password/autocomplete/go")
+    assert response.json() == ["google"]
+
+
+@pytest.mark.asyncio
+async def test_autocomplete_reload(client: AsyncClient):
+    """
+    Test API for the reload of the index
+    """
+    service_name_index.load([])
+    response = await client.get("/password/autocomplete/yan")
+    assert response.json() == []
+
+    response = await client.post("/internal/autocomplete")
+    assert response.status_code == 200
+    assert response.json()["size"] == 3
+
+    response = await client.get("/password/autocomplete/yan")
+    assert response.json() == ["yandex"]
@@ -0,0 +1,108 @@
+"""
+This module contains tests for the group commit of password creates.
+
+Methods:
+    - test_batcher_collects_window: Tests that concurrent writes are flushed together.
+    - test_batcher_max_size: Tests that a full batch is flushed before the window ends.
+    - test_batcher_flush_error: Tests that an error of the flush reaches every caller.
+    - test_batched_creates: Tests concurrent API creates written in batches.
+"""
+
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from src.managers.password import create_batcher
+from src.models.password import Password
+from src.services.batching import GroupCommitBatcher
+
+
+class RecordingFlush:
+    """
+    Flush of a test batcher, records the batches and doubles the items
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    async def __call__(self, key, items):
+        self.batches.append((key, items))
+        return [item * 2 for item in items]
+
+
+@pytest.mark.asyncio
+async def test_batcher_collects_window():
+    """
+    Test that the writes of one window are flushed in one call, per key
+    """
+    flush = RecordingFlush()
+    batcher = GroupCommitBatcher("test", flush, window=0.05, max_size=100)
+    results = await asyncio.gather(*(batcher.submit(i, key="a") for i in range(5)),
+                                   batcher.submit(10, key="b"))
+    assert results == [0, 2, 4, 6, 8, 20]
+    assert sorted(flush.batches) == [("a", [0, 1, 2, 3, 4]), ("b", [10])]
+
+
+@pytest.mark.asyncio
+async def test_batcher_max_size():
+    """
+    Test that a batch is flushed as soon as it has max_size writes
+    """
+    flush = RecordingFlush()
+    batcher = GroupCommitBatcher("test", flush, window=60, max_size=2)
+    results = await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit(i) for i in range(4))), 1)
+    assert results == [0, 2, 4, 6]
+    assert [items for _, items in flush.batches] == [[0, 1], [2, 3]]
+
+    pending = asyncio.ensure_future(batcher.submit(4))
+    await asyncio.sleep(0)
+    await batcher.drain()
+    assert await pending == 8
+
+
+@pytest.mark.asyncio
+async def test_batcher_flush_error():
+    """
+    Test that every caller of a failed batch gets the error
+    """
+    async def failing_flush(key, items):
+        raise RuntimeError("database is down")
+
+    batcher = GroupCommitBatcher("test", failing_flush, window=0.01)
+    results = await asyncio.gather(batcher.submit(1), batcher.submit(2),
+                                   return_exceptions=True)
+    assert [str(result) for result in results] == ["database is down"] * 2
+
+
+@pytest.mark.asyncio
+async def test_batched_creates(client: AsyncClient, db_session, monkeypatch):
+    """
+    Test API creates written in shared batches, with a conflict inside a batch
+    """
+    flush = create_batcher.flush
+    batches = []
+
+    async def counting_flush(key, rows):
+        batches.append(len(rows))
+        return await flush(key, rows)
+
+    monkeypatch.setattr(create_batcher, "window", 0.5)
+    monkeypatch.setattr(create_batcher, "flush", counting_flush)
+    names = [f"batched_{i}" for i in range(6)] + ["batched_0"]
+    responses = await asyncio.gather(*(
+        client.post("/password/", json={"service_name": name, "password": "1234567890qwerty"})
+        for name in names))
+    assert sorted(response.status_code for response in responses) == [201] * 6 + [409]
+    assert sum(batches) == len(names) and len(batches) < len(names)
+    assert len({response.headers["etag"] for response in responses
+                if response.status_code == 201}) == 6
+
+    count = await db_session.scalar(select(func.count()).where(
+        Password.service_name.like("batched_%")))
+    await db_session.rollback()
+    assert count == 6
+    response = await client.get("/password/batched_3")
+    assert response.json()["password"] == "1234567890qwerty"
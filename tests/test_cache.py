@@ -0,0 +1,137 @@
+"""
+This module contains tests for the password cache.
+
+Methods:
+    - test_memory_cache_lru: Tests eviction of the least recently used entry.
+    - test_memory_cache_ttl: Tests that expired entries are missing.
+    - test_memory_cache_generation: Tests that a value read before a delete is not stored.
+    - test_incomplete_backend: Tests that a backend without all methods can't be created.
+    - test_get_password_cached: Tests that repeated reads are answered from the cache.
+    - test_read_during_write_not_cached: Tests a read interleaved with an upsert.
+"""
+
+import pytest
+from httpx import AsyncClient
+
+from src.managers.password import PasswordManager
+from src.schemas.password import PasswordCreate
+from src.services.cache import CacheBackend, MemoryCache, password_cache
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_lru():
+    """
+    Test LRU eviction of the in-process cache
+    """
+    cache = MemoryCache(max_size=2, ttl=60)
+    await cache.set("a", {"value": 1})
+    await cache.set("b", {"value": 2})
+    assert await cache.get("a") == {"value": 1}
+    await cache.set("c", {"value": 3})
+    assert await cache.get("b") is None
+    assert await cache.get("a") == {"value": 1}
+    assert await cache.get("c") == {"value": 3}
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["size"] == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_ttl():
+    """
+    Test TTL of the in-process cache
+    """
+    cache = MemoryCache(max_size=2, ttl=0)
+    await cache.set("a", {"value": 1})
+    assert await cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_generation():
+    """
+    Test that set is skipped for a key deleted after its generation was taken,
+    also when the stamp of the key was evicted
+    """
+    cache = MemoryCache(max_size=1, ttl=60)
+    generation = await cache.generation("a")
+    await cache.delete("a")
+    await cache.set("a", {"value": 1}, generation)
+    assert await cache.get("a") is None
+    await cache.set("a", {"value": 2}, await cache.generation("a"))
+    assert await cache.get("a") == {"value": 2}
+
+    generation = await cache.generation("a")
+    await cache.delete("a")
+    await cache.delete("b")
+    await cache.set("a", {"value": 3}, generation)
+    assert await cache.get("a") is None
+    await cache.set("a", {"value": 4})
+    assert await cache.get("a") == {"value": 4}
+
+
+def test_incomplete_backend():
+    """
+    Test that a backend missing an abstract method fails when it is created
+    """
+    class GetOnlyCache(CacheBackend):
+        name = "get-only"
+
+        async def _get(self, key):
+            return None
+
+    with pytest.raises(TypeError, match="abstract"):
+        GetOnlyCache()
+
+
+@pytest.mark.asyncio
+async def test_get_password_cached(client: AsyncClient):
+    """
+    Test API for get password served from the cache
+    """
+    for _ in range(3):
+        response = await client.get("/password/gmail")
+        assert response.status_code == 200
+        assert response.json()["password"] == "gmailgmailgmail"
+
+    response = await client.get("/password/cached_service")
+    assert response.status_code == 404
+    password_data = {"service_name": "cached_service", "password": "1234567890qwerty"}
+    response = await client.post("/password/", json=password_data)
+    assert response.status_code == 201
+    response = await client.get("/password/cached_service")
+    assert response.json() == password_data
+
+    stats = (await client.get("/internal/cache")).json()
+    assert stats["backend"] == "memory"
+    assert stats["hits"] == 2
+    assert stats["misses"] == 3
+
+
+@pytest.mark.asyncio
+async def test_read_during_write_not_cached(monkeypatch):
+    """
+    Test that a row read before a concurrent upsert is returned but not
+    cached, the next read gets the new password
+    """
+    read_shared = PasswordManager._read_shared
+
+    async def read_then_upsert(manager, name, key, query):
+        rows = await read_shared(manager, name, key, query)
+        async with TestingSessionLocal() as session:
+            await PasswordManager(session, TestingSessionLocal).upsert_password(
+                PasswordCreate(service_name="gmail", password="1234567890qwerty"))
+        return rows
+
+    monkeypatch.setattr(PasswordManager, "_read_shared", read_then_upsert)
+    async with TestingSessionLocal() as session:
+        stale = await PasswordManager(session, TestingSessionLocal).get_password("gmail")
+    assert stale["password"] == "gmailgmailgmail"
+    monkeypatch.undo()
+
+    async with TestingSessionLocal() as session:
+        fresh = await PasswordManager(session, TestingSessionLocal).get_password("gmail")
+    assert fresh["password"] == "1234567890qwerty"
+    assert fresh["version"] == stale["version"] + 1
+    assert password_cache.stats()["size"] == 1
@@ -0,0 +1,63 @@
+"""
+This module contains tests for the encryption of stored passwords.
+
+Methods:
+    - test_encrypt_round_trip: Tests that a password is decrypted only for its owner and service.
+    - test_decrypt_rows_in_thread: Tests that large batches are decrypted the same way.
+    - test_password_stored_encrypted: Tests that created passwords are not stored in plaintext.
+"""
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from src.models.password import Password
+from src.services.encryption import PasswordCipher, password_cipher
+
+
+def test_encrypt_round_trip():
+    """
+    Test encryption with the owner and the service name bound as associated data
+    """
+    stored = password_cipher.encrypt("1234567890qwerty", "team_a", "gmail")
+    assert "1234567890qwerty" not in stored
+    assert stored != password_cipher.encrypt("1234567890qwerty", "team_a", "gmail")
+    assert password_cipher.decrypt(stored, "team_a", "gmail") == "1234567890qwerty"
+    with pytest.raises(ValueError):
+        password_cipher.decrypt(stored, "team_a", "yandex")
+    with pytest.raises(ValueError):
+        password_cipher.decrypt(stored, "team_b", "gmail")
+    with pytest.raises(ValueError):
+        PasswordCipher(b"k" * 32).decrypt(stored, "team_a", "gmail")
+
+
+@pytest.mark.asyncio
+async def test_decrypt_rows_in_thread():
+    """
+    Test that a batch above the threshold is decrypted in a thread with the same result
+    """
+    cipher = PasswordCipher(b"k" * 32, thread_threshold=2)
+    rows = [{"id": i, "service_name": f"service_{i}",
+             "password": cipher.encrypt(f"password_{i}", "team", f"service_{i}")}
+            for i in range(5)]
+    decrypted = await cipher.decrypt_rows(rows, "team")
+    assert [row["password"] for row in decrypted] == [f"password_{i}" for i in range(5)]
+    assert [row["id"] for row in decrypted] == list(range(5))
+
+
+@pytest.mark.asyncio
+async def test_password_stored_encrypted(client: AsyncClient, db_session):
+    """
+    Test that the created password is encrypted in the table and decrypted by the API
+    """
+    password_data = {"service_name": "encrypted", "password": "1234567890qwerty"}
+    response = await client.post("/password/", json=password_data)
+    assert response.status_code == 201
+
+    stored = (await db_session.execute(select(Password.password).where(
+        Password.service_name == "encrypted"))).scalar_one()
+    await db_session.rollback()
+    assert stored != "1234567890qwerty"
+
+    response = await client.get("/password/encrypted")
+    assert response.json()["password"] == "1234567890qwerty"
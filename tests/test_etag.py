@@ -0,0 +1,68 @@
+"""
+This module contains tests for the conditional requests of the read routes.
+
+Methods:
+    - test_etag_matches: Tests the parsing of If-None-Match.
+    - test_get_password_not_modified: Tests ETag and 304 of a single password.
+    - test_search_password_not_modified: Tests ETag and 304 of a search page.
+"""
+
+import pytest
+from httpx import AsyncClient
+
+from src.services.etag import etag_matches
+
+
+def test_etag_matches():
+    """
+    Test the weak comparison of If-None-Match
+    """
+    assert etag_matches('"1-1"', '"1-1"')
+    assert etag_matches('"0-1", W/"1-1"', '"1-1"')
+    assert etag_matches("*", '"1-1"')
+    assert not etag_matches('"1-2"', '"1-1"')
+    assert not etag_matches(None, '"1-1"')
+
+
+@pytest.mark.asyncio
+async def test_get_password_not_modified(client: AsyncClient):
+    """
+    Test API for the conditional GET of a password
+    """
+    response = await client.get("/password/gmail")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = await client.get("/password/gmail", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    response = await client.get("/password/gmail", headers={"If-None-Match": '"0-0"'})
+    assert response.status_code == 200
+    assert response.headers["etag"] == etag
+
+    response = await client.get("/password/missing", headers={"If-None-Match": "*"})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_search_password_not_modified(client: AsyncClient):
+    """
+    Test API for the conditional search, a new row on the page changes the ETag
+    """
+    url = "/password/?service_name=a"
+    response = await client.get(url)
+    etag = response.headers["etag"]
+
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    password_data = {"service_name": "amazon", "password": "1234567890qwerty"}
+    response = await client.post("/password/", json=password_data)
+    assert response.status_code == 201
+
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert "amazon" in [item["service_name"] for item in response.json()["items"]]
@@ -0,0 +1,70 @@
+"""
+This module contains tests for the fast serialization path.
+
+Methods:
+    - test_fast_json_responses: Tests that the fast mode returns the same bodies.
+    - test_fast_json_openapi: Tests that the fast mode keeps the OpenAPI schema.
+    - test_fast_json_of_app_settings: Tests that the fast mode follows the settings of the app.
+"""
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from httpx import AsyncClient
+
+from src.config.settings import settings
+from src.main import app
+from src.routers.password import passwordroute
+from src.routers.responses import fast_response
+
+
+@pytest.mark.asyncio
+async def test_fast_json_responses(client: AsyncClient, monkeypatch):
+    """
+    Test API responses are the same with FAST_JSON
+    """
+    requests = [
+        ("GET", "/password/gmail", None),
+        ("GET", "/password/?service_name=a&limit=2", None),
+        ("GET", "/password/missing", None),
+    ]
+    expected = [await client.request(method, url, json=body)
+                for method, url, body in requests]
+    monkeypatch.setattr(settings, "FAST_JSON", True)
+    for (method, url, body), slow in zip(requests, expected):
+        fast = await client.request(method, url, json=body)
+        assert fast.status_code == slow.status_code
+        assert fast.json() == slow.json()
+        assert fast.headers.get("etag") == slow.headers.get("etag")
+
+    password_data = {"service_name": "fast_service", "password": "1234567890qwerty"}
+    response = await client.post("/password/", json=password_data)
+    assert response.status_code == 201
+    assert response.json() == password_data
+
+
+def test_fast_json_openapi():
+    """
+    Test OpenAPI schema is the same with the orjson default response class
+    """
+    fast_app = FastAPI(default_response_class=ORJSONResponse)
+    fast_app.include_router(passwordroute, prefix="/password", tags=["password"])
+    slow_app = FastAPI()
+    slow_app.include_router(passwordroute, prefix="/password", tags=["password"])
+    assert fast_app.openapi() == slow_app.openapi()
+    assert app.openapi()["paths"] == slow_app.openapi()["paths"]
+
+
+def test_fast_json_of_app_settings():
+    """
+    Test that fast_response uses FAST_JSON of the application of the request,
+    not of the environment
+    """
+    def request_of(fast_json: bool):
+        app_settings = settings.model_copy(update={"FAST_JSON": fast_json})
+        return SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(settings=app_settings)))
+
+    content = {"service_name": "gmail", "password": "1234567890qwerty"}
+    assert isinstance(fast_response(request_of(True), content), ORJSONResponse)
+    assert fast_response(request_of(False), content) is content
@@ -0,0 +1,68 @@
+"""
+This module contains tests for the asynchronous hashing service.
+
+Methods:
+    - test_hash_in_worker_pool: Tests that the pool returns a valid hash.
+    - test_hash_queue_full: Tests that the service rejects hashes when the queue is full.
+    - test_hash_cancelled_keeps_slot: Tests that a cancelled hash holds its slot until the worker finishes.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.services.hashing import HashingService, pwd_context
+
+
+@pytest.mark.asyncio
+async def test_hash_in_worker_pool():
+    """
+    Test hashing in the thread pool
+    """
+    service = HashingService(executor_type="thread", max_workers=2)
+    try:
+        hashed = await service.hash("1234567890qwerty")
+    finally:
+        service.shutdown()
+    assert pwd_context.verify("1234567890qwerty", hashed)
+    assert service.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_hash_queue_full():
+    """
+    Test backpressure of the hashing service
+    """
+    service = HashingService(executor_type="thread",
+                             max_workers=1,
+                             queue_size=0)
+    try:
+        running = asyncio.create_task(service.hash("1234567890qwerty"))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as exc:
+            await service.hash("1234567890qwerty")
+        assert exc.value.status_code == 503
+        assert exc.value.headers["Retry-After"] == "1"
+        await running
+    finally:
+        service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_cancelled_keeps_slot():
+    """
+    Test a cancelled hash is counted until the worker is done
+    """
+    service = HashingService(executor_type="thread", max_workers=1)
+    try:
+        task = asyncio.create_task(service.hash("1234567890qwerty"))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert service.pending == 1
+        while service.pending:
+            await asyncio.sleep(0.01)
+    finally:
+        service.shutdown()
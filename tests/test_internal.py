@@ -0,0 +1,54 @@
+"""
+This module contains tests for the internal service endpoints.
+
+Methods:
+    - test_pool_stats: Tests the state and checkout counters of the connection pool.
+    - test_internal_access: Tests that only allowed networks or the token reach the routes.
+"""
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src.main import app
+
+
+@pytest.mark.asyncio
+async def test_pool_stats(client: AsyncClient):
+    """
+    Test API for the connection pool statistics
+    """
+    response = await client.get("/password/gmail")
+    assert response.status_code == 200
+
+    response = await client.get("/internal/pool")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["size"] == 5
+    assert data["checked_out"] == 0
+    assert data["checkouts"] >= 1
+    assert data["timeouts"] == 0
+    assert data["wait_max_ms"] >= data["wait_avg_ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_internal_access(monkeypatch):
+    """
+    Test API for the internal routes from another network, with and without the token
+    """
+    monkeypatch.setattr(app.state.settings, "INTERNAL_TOKEN", "operator-token")
+    async with AsyncClient(transport=ASGITransport(app=app, client=("203.0.113.7", 4000)),
+                           base_url="http://test") as remote_client:
+        response = await remote_client.post("/internal/autocomplete")
+        assert response.status_code == 403
+        response = await remote_client.get("/internal/cache",
+                                           headers={"X-Internal-Token": "wrong"})
+        assert response.status_code == 403
+        response = await remote_client.get("/internal/cache",
+                                           headers={"X-Internal-Token": "operator-token"})
+        assert response.status_code == 200
+
+    monkeypatch.setattr(app.state.settings, "INTERNAL_ALLOWED_NETWORKS", ["203.0.113.0/24"])
+    async with AsyncClient(transport=ASGITransport(app=app, client=("203.0.113.7", 4000)),
+                           base_url="http://test") as remote_client:
+        response = await remote_client.get("/internal/cache")
+        assert response.status_code == 200
@@ -0,0 +1,72 @@
+"""
+This module contains tests for the metrics.
+
+Methods:
+    - test_histogram_render: Tests the Prometheus text format of a histogram.
+    - test_incomplete_metric: Tests that a metric without samples can't be created.
+    - test_metrics_endpoint: Tests route, query and hashing metrics served at /metrics.
+"""
+
+import pytest
+from httpx import AsyncClient
+
+from src.services.metrics import (Registry, _Metric, db_query_duration,
+                                  http_request_duration)
+
+
+def test_histogram_render():
+    """
+    Test cumulative buckets, sum and count of a histogram
+    """
+    registry = Registry()
+    histogram = registry.histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(5, route="/a")
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP test_seconds Test.", "# TYPE test_seconds histogram"]
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'test_seconds_sum{route="/a"} 5.55' in lines
+    assert 'test_seconds_count{route="/a"} 3' in lines
+
+
+def test_incomplete_metric():
+    """
+    Test that a metric type without _samples fails when it is created, not on the scrape
+    """
+    class Summary(_Metric):
+        type = "summary"
+
+    with pytest.raises(TypeError, match="abstract"):
+        Summary("request_size", "Size of requests.")
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client: AsyncClient):
+    """
+    Test API for metrics
+    """
+    labels = {"method": "GET", "route": "/password/{service_name}", "status": 200}
+    requests = http_request_duration.count(**labels)
+    selects = db_query_duration.count(statement="SELECT")
+
+    response = await client.get("/password/default")
+    assert response.status_code == 200
+    password_data = {"service_name": "metrics_service", "password": "1234567890qwerty"}
+    response = await client.post("/password/", json=password_data)
+    assert response.status_code == 201
+
+    assert http_request_duration.count(**labels) == requests + 1
+    assert db_query_duration.count(statement="SELECT") > selects
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/password/{service_name}",status="200"}' in body
+    assert "http_requests_in_flight 1" in body
+    assert "password_hash_duration_seconds_count" in body
+    assert 'db_query_duration_seconds_count{statement="INSERT"}' in body
+    assert "password_cache_misses_total" in body
@@ -0,0 +1,66 @@
+"""
+This module contains tests for the owner scoping of the password routes.
+
+Methods:
+    - test_owners_have_separate_namespaces: Tests that service names are unique per owner.
+    - test_owner_scoped_reads: Tests that reads, search, batch lookup and autocomplete see only the owner's passwords.
+    - test_owner_header_validation: Tests that invalid owner ids are rejected.
+"""
+
+import pytest
+from httpx import AsyncClient
+
+TEAM = {"X-Owner-Id": "team_a"}
+
+
+@pytest.mark.asyncio
+async def test_owners_have_separate_namespaces(client: AsyncClient):
+    """
+    Test API for the same service name in two owners
+    """
+    password_data = {"service_name": "gmail", "password": "team_a_password"}
+    response = await client.post("/password/", json=password_data, headers=TEAM)
+    assert response.status_code == 201
+    response = await client.post("/password/", json=password_data, headers=TEAM)
+    assert response.status_code == 409
+
+    response = await client.get("/password/gmail", headers=TEAM)
+    assert response.json()["password"] == "team_a_password"
+    response = await client.get("/password/gmail")
+    assert response.json()["password"] == "gmailgmailgmail"
+
+
+@pytest.mark.asyncio
+async def test_owner_scoped_reads(client: AsyncClient):
+    """
+    Test API for reads of another owner's passwords
+    """
+    response = await client.get("/password/yandex")
+    assert response.status_code == 200
+    response = await client.get("/password/yandex", headers=TEAM)
+    assert response.status_code == 404
+
+    response = await client.get("/password/?service_name=yan", headers=TEAM)
+    assert response.status_code == 404
+
+    response = await client.post("/password/batch-get",
+                                 json={"service_names": ["yandex"]}, headers=TEAM)
+    assert response.json() == {"items": [], "missing": ["yandex"]}
+
+    response = await client.get("/password/autocomplete/yan", headers=TEAM)
+    assert response.json() == []
+
+    response = await client.get("/password/export/ndjson", headers=TEAM)
+    assert response.status_code == 200
+    assert response.content == b""
+
+
+@pytest.mark.asyncio
+async def test_owner_header_validation(client: AsyncClient):
+    """
+    Test API for an owner id with characters outside of [A-Za-z0-9_.-]
+    """
+    response = await client.get("/password/gmail", headers={"X-Owner-Id": "team/a"})
+    assert response.status_code == 422
+    response = await client.get("/password/gmail", headers={"X-Owner-Id": "t" * 65})
+    assert response.status_code == 422
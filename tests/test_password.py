@@ -5,11 +5,30 @@ Methods:
     - test_post_password: Tests the creation of a new password.
     - test_get_password: Tests retrieving a specific password by its service.
     - test_search_password: Tests retrieving a password by its part of service name.
+    - test_search_password_pages: Tests the keyset pagination of the search.
+    - test_bulk_post_password_ndjson: Tests the bulk creation of passwords from NDJSON.
+    - test_bulk_post_password_csv: Tests the bulk creation of passwords from CSV.
+    - test_bulk_post_password_invalid_rows: Tests that unreadable and too long rows are reported.
+    - test_bulk_post_password_hashing_queue_full: Tests the partial report when hashing is overloaded.
+    - test_export_password: Tests the streaming export of all passwords.
+    - test_get_password_named_export: Tests that the export route doesn't shadow a service named "export".
+    - test_batch_get_password: Tests the lookup of many services with found and missing names.
+    - test_batch_get_password_limit: Tests that empty and too long lists are rejected.
+    - test_post_password_duplicate: Tests that a duplicate is rejected with 409 before hashing.
+    - test_post_password_duplicate_not_indexed: Tests the 409 of a duplicate unknown to the index.
+    - test_put_password: Tests the creation and the replacement of a password with PUT.
 """
 
+import json
+
 import pytest
+from fastapi import HTTPException
 from httpx import AsyncClient
 
+from src.config.settings import settings
+from src.services.autocomplete import service_name_index
+from src.services.hashing import hashing_service
+
 
 @pytest.mark.asyncio
 async def test_post_password(client: AsyncClient):
@@ -76,9 +95,36 @@ async def test_search_password(client: AsyncClient):
     response = await client.get(f"/password/?service_name={service_name}")
     assert response.status_code == 200
     data = response.json()
-    assert len(data) == 1
-    assert data[0]["service_name"] == "yandex"
-    assert data[0]["password"] == "09876543210ytr"
+    assert len(data["items"]) == 1
+    assert data["items"][0]["service_name"] == "yandex"
+    assert data["items"][0]["password"] == "09876543210ytr"
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_search_password_pages(client: AsyncClient):
+    """
+    Test API for search password page by page
+    """
+    names = []
+    cursor = None
+    while True:
+        params = {"service_name": "a", "limit": 1}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/password/", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["items"]) == 1
+        names.append(data["items"][0]["service_name"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    assert names == ["default", "gmail", "yandex"]
+
+    response = await client.get("/password/",
+                                params={"service_name": "a", "cursor": "???"})
+    assert response.status_code == 400
 
 
 @pytest.mark.asyncio
@@ -91,3 +137,212 @@ async def test_search_unexist_password(client: AsyncClient):
     assert response.status_code == 404
     data = response.json()
     assert data["detail"] == "Password(s) not found"
+
+
+@pytest.mark.asyncio
+async def test_bulk_post_password_ndjson(client: AsyncClient):
+    """
+    Test API for bulk post password from NDJSON
+    """
+    body = "\n".join([
+        '{"service_name": "bulk_one", "password": "1234567890qwerty"}',
+        '{"service_name": "bulk_two", "password": "123"}',
+        '{"service_name": "gmail", "password": "1234567890qwerty"}',
+        'not json',
+        '{"service_name": "bulk_one", "password": "1234567890qwerty"}',
+        '{"service_name": "bulk_three", "password": "1234567890qwerty"}',
+    ])
+    response = await client.post("/password/bulk",
+                                 content=body,
+                                 headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["inserted"] == 2
+    assert data["failed"] == 4
+    assert sorted(error["line"] for error in data["errors"]) == [2, 3, 4, 5]
+
+    response = await client.get("/password/bulk_three")
+    assert response.status_code == 200
+    assert response.json()["password"] == "1234567890qwerty"
+
+
+@pytest.mark.asyncio
+async def test_bulk_post_password_csv(client: AsyncClient):
+    """
+    Test API for bulk post password from CSV
+    """
+    body = "service_name,password\r\nbulk_csv,1234567890qwerty\r\n"
+    response = await client.post("/password/bulk",
+                                 content=body,
+                                 headers={"content-type": "text/csv"})
+    assert response.status_code == 200
+    assert response.json() == {"inserted": 1, "failed": 0, "errors": [], "detail": None}
+
+
+@pytest.mark.asyncio
+async def test_bulk_post_password_invalid_rows(client: AsyncClient):
+    """
+    Test API for bulk post password with unreadable and too long rows
+    """
+    body = b"\n".join([
+        b'{"service_name": "' + b"s" * 31 + b'", "password": "1234567890qwerty"}',
+        b'{"service_name": "bulk_utf", "password": "\xff\xfe"}',
+        b'{"service_name": "bulk_long", "password": "' + b"p" * 70000 + b'"}',
+        b'{"service_name": "bulk_ok", "password": "1234567890qwerty"}',
+    ])
+    response = await client.post("/password/bulk",
+                                 content=body,
+                                 headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["inserted"] == 1
+    assert [error["line"] for error in data["errors"]] == [1, 2, 3]
+    assert data["detail"] is None
+
+
+@pytest.mark.asyncio
+async def test_bulk_post_password_hashing_queue_full(client: AsyncClient,
+                                                     monkeypatch):
+    """
+    Test API for bulk post password when the hashing queue stays full
+    """
+    async def queue_full(passwords):
+        raise HTTPException(status_code=503, detail="Hashing queue is full")
+
+    monkeypatch.setattr(settings, "BULK_BATCH_SIZE", 1)
+    monkeypatch.setattr(settings, "BULK_HASH_RETRIES", 0)
+    monkeypatch.setattr(hashing_service, "hash_many", queue_full)
+    body = "\n".join([
+        '{"service_name": "bulk_one", "password": "1234567890qwerty"}',
+        '{"service_name": "bulk_two", "password": "1234567890qwerty"}',
+    ])
+    response = await client.post("/password/bulk",
+                                 content=body,
+                                 headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["inserted"] == 0
+    assert data["errors"] == [{"line": 1, "detail": "Hashing queue is full"}]
+    assert data["detail"] == "Import stopped, the hashing queue is full"
+
+
+@pytest.mark.asyncio
+async def test_export_password(client: AsyncClient):
+    """
+    Test API for export password as NDJSON and CSV
+    """
+    response = await client.get("/password/export/ndjson")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows == [
+        {"service_name": "default", "password": "1234567890qwe"},
+        {"service_name": "yandex", "password": "09876543210ytr"},
+        {"service_name": "gmail", "password": "gmailgmailgmail"},
+    ]
+
+    response = await client.get("/password/export/csv")
+    assert response.status_code == 200
+    assert response.text.splitlines() == [
+        "service_name,password",
+        "default,1234567890qwe",
+        "yandex,09876543210ytr",
+        "gmail,gmailgmailgmail",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_password_named_export(client: AsyncClient):
+    """
+    Test API for get password of the service named like the export route
+    """
+    password_data = {"service_name": "export", "password": "1234567890qwerty"}
+    response = await client.post("/password/", json=password_data)
+    assert response.status_code == 201
+    response = await client.get("/password/export")
+    assert response.status_code == 200
+    assert response.json() == password_data
+
+
+@pytest.mark.asyncio
+async def test_batch_get_password(client: AsyncClient):
+    """
+    Test the batch lookup, the order of the request is kept and missing names are listed
+    """
+    response = await client.post("/password/batch-get", json={
+        "service_names": ["gmail", "unknown", "default", "gmail"]})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["items"] == [
+        {"service_name": "gmail", "password": "gmailgmailgmail"},
+        {"service_name": "default", "password": "1234567890qwe"},
+    ]
+    assert data["missing"] == ["unknown"]
+
+
+@pytest.mark.asyncio
+async def test_batch_get_password_limit(client: AsyncClient):
+    """
+    Test that an empty list and a list above BATCH_GET_MAX_NAMES are rejected
+    """
+    response = await client.post("/password/batch-get", json={"service_names": []})
+    assert response.status_code == 422
+    response = await client.post("/password/batch-get", json={
+        "service_names": ["name"] * (settings.BATCH_GET_MAX_NAMES + 1)})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_post_password_duplicate(client: AsyncClient, monkeypatch):
+    """
+    Test API for post password with an existing service name, bcrypt is not run
+    """
+    async def no_hash(password):
+        raise AssertionError("the password must not be hashed")
+
+    monkeypatch.setattr(hashing_service, "hash", no_hash)
+    password_data = {"service_name": "gmail", "password": "1234567890qwerty"}
+    response = await client.post("/password/", json=password_data)
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Service name already exists"
+
+
+@pytest.mark.asyncio
+async def test_post_password_duplicate_not_indexed(client: AsyncClient):
+    """
+    Test API for post password with a service name created by another worker
+    """
+    service_name_index.load([])
+    password_data = {"service_name": "gmail", "password": "1234567890qwerty"}
+    response = await client.post("/password/", json=password_data)
+    assert response.status_code == 409
+    assert (settings.DEFAULT_OWNER_ID, "gmail") in service_name_index
+
+    response = await client.get("/password/gmail")
+    assert response.json()["password"] == "gmailgmailgmail"
+
+
+@pytest.mark.asyncio
+async def test_put_password(client: AsyncClient):
+    """
+    Test API for put password, 201 on creation, 200 and a new ETag on replacement
+    """
+    response = await client.put("/password/new_service",
+                                json={"password": "1234567890qwerty"})
+    assert response.status_code == 201
+    assert response.json() == {"service_name": "new_service",
+                               "password": "1234567890qwerty"}
+    created_etag = response.headers["etag"]
+
+    response = await client.put("/password/new_service",
+                                json={"password": "qwerty1234567890"})
+    assert response.status_code == 200
+    assert response.headers["etag"] != created_etag
+
+    response = await client.get("/password/new_service",
+                                headers={"If-None-Match": created_etag})
+    assert response.status_code == 200
+    assert response.json()["password"] == "qwerty1234567890"
+
+    response = await client.put("/password/x", json={"password": "1234567890qwerty"})
+    assert response.status_code == 422
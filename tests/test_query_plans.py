@@ -0,0 +1,102 @@
+"""
+This module contains the query plan regression test of the PasswordManager queries.
+
+Every case calls a PasswordManager method on a seeded table, the statements
+it issues are explained as generic plans (custom plans for CUSTOM_PLAN_CASES)
+and checked against query_plan_baseline.json (see tests.query_plans).
+With PLAN_BASELINE_UPDATE=1 the baseline is rewritten instead.
+
+Methods:
+    - test_query_plans: Tests the indexes and the costs of the PasswordManager queries.
+"""
+import hashlib
+from contextlib import suppress
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from src.managers.password import PasswordManager, load_service_name_index
+from src.schemas.password import PasswordCreate
+from src.services.cache import password_cache
+from src.services.pagination import encode_cursor
+from tests.conftest import TestingSessionLocal, test_engine
+from tests.query_plans import (UPDATE_BASELINE, capture_statements, check_plan,
+                               explain, load_baseline, update_baseline)
+
+OWNER_ID = "team_1"
+# a seeded service name of OWNER_ID (see seed_passwords)
+SERVICE_NAME = hashlib.md5(b"1").hexdigest()[:20]
+
+
+async def export_first_chunk(manager: PasswordManager) -> None:
+    async for _ in manager.export_passwords("ndjson"):
+        break
+
+
+CASES = {
+    "get_password": lambda manager: manager.get_password(SERVICE_NAME),
+    "get_password_version": lambda manager: manager.get_password_version(SERVICE_NAME),
+    "batch_get_passwords": lambda manager: manager.batch_get_passwords(
+        [SERVICE_NAME, "missing"]),
+    "search_page": lambda manager: manager.search_page("abc", 20),
+    "search_page_cursor": lambda manager: manager.search_page(
+        "abc", 20, encode_cursor("abc", 1)),
+    "search_page_selective": lambda manager: manager.search_page(SERVICE_NAME[:8], 20),
+    "create_password": lambda manager: manager.create_password(
+        PasswordCreate(service_name="plan_create", password="1234567890qwerty")),
+    "upsert_password": lambda manager: manager.upsert_password(
+        PasswordCreate(service_name=SERVICE_NAME, password="1234567890qwerty")),
+    "export_passwords": export_first_chunk,
+    "load_service_name_index": lambda manager: load_service_name_index(
+        manager.session_maker),
+}
+# cases whose plan depends on the values, they are explained as custom plans
+CUSTOM_PLAN_CASES = {"search_page_selective"}
+
+
+async def seed_passwords(session) -> None:
+    """
+    Seeds 40000 passwords of two owners and updates the statistics
+    """
+    await session.execute(text(
+        "INSERT INTO password (owner_id, service_name, password, hashed_password) "
+        "SELECT 'team_' || (i % 2), left(md5(i::text), 20), 'password', 'hashed' "
+        "FROM generate_series(1, 40000) AS i"))
+    await session.commit()
+    async with test_engine.connect() as conn:
+        await conn.execute(text("ANALYZE password"))
+        await conn.commit()
+
+
+@pytest.mark.asyncio
+async def test_query_plans(db_session):
+    """
+    Test that every PasswordManager query uses its index of the baseline
+    and stays within its baseline cost
+    """
+    await seed_passwords(db_session)
+
+    plans = []
+    for name, call in CASES.items():
+        # every case reads the database, not a password cached by the previous one
+        await password_cache.clear()
+        with capture_statements(test_engine) as statements:
+            async with TestingSessionLocal() as session:
+                # the seeded passwords aren't encrypted, the queries run before decrypting
+                with suppress(HTTPException, ValueError):
+                    await call(PasswordManager(session, TestingSessionLocal, OWNER_ID))
+        assert statements, f"{name} issued no statement"
+        async with test_engine.connect() as conn:
+            for i, (statement, parameters) in enumerate(statements):
+                plan_name = name if len(statements) == 1 else f"{name}#{i}"
+                plans.append(await explain(conn, plan_name, statement, parameters,
+                                           generic=name not in CUSTOM_PLAN_CASES))
+
+    if UPDATE_BASELINE:
+        update_baseline(plans)
+        pytest.skip("query plan baseline updated")
+    baseline = load_baseline()
+    problems = [problem for problem in (check_plan(plan, baseline) for plan in plans)
+                if problem is not None]
+    assert not problems, "\n".join(problems)
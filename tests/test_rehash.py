@@ -0,0 +1,56 @@
+"""
+This module contains tests for the rehash job.
+
+Methods:
+    - test_rehash_outdated_hashes: Tests that outdated hashes are upgraded once.
+    - test_needs_rehash_cost: Tests that hashes of another cost are verified and reported.
+"""
+
+import pytest
+from sqlalchemy import select
+
+from src.jobs.rehash import rehash_passwords
+from src.models.password import Password
+from src.services.encryption import password_cipher
+from src.services.hashing import HashingService, needs_rehash, pwd_context
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_rehash_outdated_hashes():
+    """
+    Test that the seeded placeholder hashes are replaced and a second run is a no-op
+    """
+    service = HashingService(executor_type="thread", max_workers=2)
+    try:
+        result = await rehash_passwords(TestingSessionLocal, service,
+                                        batch_size=2, pause=0)
+        assert result == {"checked": 3, "upgraded": 3}
+
+        result = await rehash_passwords(TestingSessionLocal, service,
+                                        batch_size=2, pause=0)
+        assert result == {"checked": 3, "upgraded": 0}
+    finally:
+        service.shutdown()
+
+    async with TestingSessionLocal() as session:
+        rows = (await session.execute(
+            select(Password.owner_id, Password.service_name, Password.password,
+                   Password.hashed_password))).all()
+        await session.rollback()
+    for row in rows:
+        assert not needs_rehash(row.hashed_password)
+        password = password_cipher.decrypt(row.password, row.owner_id, row.service_name)
+        assert pwd_context.verify(password, row.hashed_password)
+
+
+def test_needs_rehash_cost():
+    """
+    Test that a bcrypt hash of another cost is still verified and only
+    the rehash job reports it
+    """
+    hashed = pwd_context.hash("1234567890qwerty", rounds=4)
+    assert pwd_context.verify("1234567890qwerty", hashed)
+    assert not pwd_context.needs_update(hashed)
+    assert needs_rehash(hashed, bcrypt_rounds=5)
+    assert not needs_rehash(hashed, bcrypt_rounds=4)
@@ -0,0 +1,65 @@
+"""
+This module contains tests for the query plan of the substring search.
+
+Methods:
+    - test_search_uses_trigram_index: Tests that the search query is served by the trigram index of one partition.
+    - test_search_escapes_wildcards: Tests that LIKE wildcards in the search are matched literally.
+"""
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from src.managers.password import PasswordManager
+from tests.conftest import test_engine
+
+
+@pytest.mark.asyncio
+async def test_search_uses_trigram_index(db_session):
+    """
+    Test EXPLAIN of the search query reads one partition through its copy of
+    ix_password_owner_id_service_name_trgm
+
+    The query is explained as a prepared statement with the bound owner and
+    pattern, the way asyncpg sends it, and with a generic plan, which is used
+    after a statement has been executed a few times. The partitions of the
+    other owners are pruned when the statement is executed.
+    """
+    await db_session.execute(text(
+        "INSERT INTO password (owner_id, service_name, password, hashed_password) "
+        "SELECT 'team_' || (i % 2), left(md5(i::text), 20), 'password', 'hashed' "
+        "FROM generate_series(1, 40000) AS i"))
+    await db_session.commit()
+
+    async with test_engine.connect() as conn:
+        await conn.execute(text("ANALYZE password"))
+        compiled = PasswordManager.search_query("team_1", "yandex").compile(
+            dialect=conn.dialect)
+        owner_id, pattern = (compiled.params[name].replace("'", "''")
+                             for name in compiled.positiontup)
+        raw = (await conn.get_raw_connection()).driver_connection
+        await raw.execute("SET plan_cache_mode = force_generic_plan")
+        await raw.execute(f"PREPARE search_query AS {compiled}")
+        plan = await raw.fetch(
+            f"EXPLAIN EXECUTE search_query('{owner_id}', '{pattern}')")
+        await raw.execute("DEALLOCATE search_query")
+        await raw.execute("RESET plan_cache_mode")
+        await conn.rollback()
+
+    plan = "\n".join(row[0] for row in plan)
+    assert "$2" in plan
+    assert "Subplans Removed" in plan
+    # partition copies of ix_password_owner_id_service_name_trgm
+    assert "_owner_id_service_name_idx" in plan
+    assert "Seq Scan" not in plan
+
+
+@pytest.mark.asyncio
+async def test_search_escapes_wildcards(client: AsyncClient):
+    """
+    Test API for search password with LIKE wildcards
+    """
+    response = await client.get("/password/?service_name=%25")
+    assert response.status_code == 404
+    response = await client.get("/password/?service_name=y_ndex")
+    assert response.status_code == 404
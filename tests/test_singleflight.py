@@ -0,0 +1,104 @@
+"""
+This module contains tests for the coalescing of identical concurrent reads.
+
+Methods:
+    - test_concurrent_calls_share_result: Tests that one call runs for concurrent callers.
+    - test_error_shared: Tests that the error of the running call reaches the waiting calls.
+    - test_cancelled_leader: Tests that a waiting call runs again after a cancelled one.
+    - test_concurrent_gets_coalesced: Tests concurrent API reads of the same password.
+"""
+
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from src.services.singleflight import SingleFlight, coalesced_calls
+
+
+class SlowQuery:
+    """
+    Stand-in of a query, counts its runs
+    """
+
+    def __init__(self, delay: float = 0.05, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.runs = 0
+
+    async def __call__(self):
+        self.runs += 1
+        run = self.runs
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [{"run": run}]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_result():
+    """
+    Test that concurrent calls with one key run once, other keys run separately
+    """
+    flights = SingleFlight()
+    query = SlowQuery()
+    followers = coalesced_calls.value(query="unit", role="follower")
+    results = await asyncio.gather(*(flights.do("unit", "a", query) for _ in range(5)),
+                                   flights.do("unit", "b", query))
+    assert query.runs == 2
+    assert results[:5] == [[{"run": 1}]] * 5
+    assert coalesced_calls.value(query="unit", role="follower") - followers == 4
+    assert flights.in_flight == 0
+
+    assert await flights.do("unit", "a", query) == [{"run": 3}]
+    flights.enabled = False
+    await asyncio.gather(*(flights.do("unit", "a", query) for _ in range(3)))
+    assert query.runs == 6
+
+
+@pytest.mark.asyncio
+async def test_error_shared():
+    """
+    Test that the waiting calls get the error of the running call
+    """
+    flights = SingleFlight()
+    query = SlowQuery(error=ValueError("query failed"))
+    results = await asyncio.gather(*(flights.do("unit", "a", query) for _ in range(3)),
+                                   return_exceptions=True)
+    assert query.runs == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader():
+    """
+    Test that a waiting call runs the query itself if the running call is cancelled
+    """
+    flights = SingleFlight()
+    query = SlowQuery()
+    leader = asyncio.ensure_future(flights.do("unit", "a", query))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flights.do("unit", "a", query))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == [{"run": 2}]
+    assert leader.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_gets_coalesced(client: AsyncClient):
+    """
+    Test API concurrent reads of one password and of one search run one query each
+    """
+    leaders = coalesced_calls.value(query="get", role="leader")
+    responses = await asyncio.gather(*(client.get("/password/gmail") for _ in range(10)))
+    assert {response.status_code for response in responses} == {200}
+    assert {response.json()["password"] for response in responses} == {"gmailgmailgmail"}
+    assert coalesced_calls.value(query="get", role="leader") - leaders == 1
+
+    leaders = coalesced_calls.value(query="search", role="leader")
+    responses = await asyncio.gather(*(
+        client.get("/password/", params={"service_name": "ya", "limit": 5})
+        for _ in range(10)))
+    assert {response.status_code for response in responses} == {200}
+    assert coalesced_calls.value(query="search", role="leader") - leaders == 1
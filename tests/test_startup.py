@@ -0,0 +1,103 @@
+"""
+This module contains tests for the application factory and its startup.
+
+Methods:
+    - test_import_does_not_connect: Tests that importing the app creates no engine.
+    - test_not_ready_before_startup: Tests that readiness fails before the startup.
+    - test_lifespan_warm_up: Tests the warm-up of the pool and the hashing workers.
+    - test_warm_up_failure_releases_connections: Tests a warm-up with a failed connection.
+"""
+
+import subprocess
+import sys
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+
+from src import main
+from src.config.dependencies import Database, database
+from src.config.settings import settings
+from src.main import app, create_app
+from src.services.hashing import HashingService
+
+
+def test_import_does_not_connect():
+    """
+    Test that the engines are created on first use, not on import
+    """
+    code = ("import src.main, src.config.dependencies as d;"
+            "assert not d.database.connected;"
+            "print(src.main.app.state.startup['import'])")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                            text=True, check=True)
+    assert float(result.stdout) > 0
+
+
+@pytest.mark.asyncio
+async def test_not_ready_before_startup(client: AsyncClient):
+    """
+    Test API readiness of a worker whose lifespan has not run
+    """
+    response = await client.get("/internal/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"] == {"startup": False, "database": True, "replicas": 0}
+
+
+@pytest.mark.asyncio
+async def test_lifespan_warm_up(monkeypatch):
+    """
+    Test that the startup opens the pool connections, starts the hashing
+    workers, records the phases and makes the app ready
+    """
+    app_settings = settings.model_copy(update={
+        "DB_NAME": settings.DB_TEST_NAME,
+        "WARMUP_DB_CONNECTIONS": 2,
+        "AUTOCOMPLETE_REFRESH_SECONDS": 0,
+    })
+    hashing_service = HashingService(executor_type="thread", max_workers=2)
+    monkeypatch.setattr(main, "hashing_service", hashing_service)
+    assert not database.connected
+    test_app = create_app(app_settings)
+    try:
+        async with test_app.router.lifespan_context(test_app):
+            assert database.engine.url.database == settings.DB_TEST_NAME
+            assert database.engine.pool.checkedin() == 2
+            assert hashing_service._executor is not None
+            assert set(test_app.state.startup) == {
+                "import", "database", "hashing", "autocomplete", "total"}
+            assert test_app.state.startup_errors == {}
+
+            async with AsyncClient(transport=ASGITransport(app=test_app),
+                                   base_url="http://test") as test_client:
+                response = await test_client.get("/internal/ready")
+            assert response.status_code == 200
+            assert response.json()["ready"] is True
+        assert not database.connected
+        assert hashing_service._executor is None
+    finally:
+        await database.dispose()
+        database.configure(app.state.settings)
+
+
+@pytest.mark.asyncio
+async def test_warm_up_failure_releases_connections():
+    """
+    Test that the connections opened before a failed one are returned to the pool
+    """
+    test_database = Database(settings.model_copy(update={"DB_NAME": settings.DB_TEST_NAME}))
+    connects = []
+
+    def fail_third_connect(dbapi_connection, connection_record):
+        connects.append(dbapi_connection)
+        if len(connects) == 3:
+            raise RuntimeError("connection refused")
+
+    event.listen(test_database.engine.sync_engine, "connect", fail_third_connect)
+    try:
+        with pytest.raises(RuntimeError, match="connection refused"):
+            await test_database.warm_up(5)
+        assert test_database.engine.pool.checkedout() == 0
+        assert len(connects) == 5
+    finally:
+        await test_database.dispose()